@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import OTP
+from accounts.otp_store import STORES
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare OTP stores (database vs cache) on a signup burst: DB writes, queries and time per flow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signups', type=int, default=200, help='Signup flows (issue + verify) per store')
+        parser.add_argument('--resends', type=int, default=1, help='Extra "resend code" issues per signup')
+
+    def handle(self, *args, **options):
+        n = max(1, options['signups'])
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{n} signup flows (issue x{1 + options["resends"]}, one wrong guess, verify); OTP work only'
+        ))
+        self.stdout.write(f'{"store":<10} {"queries":>8} {"writes":>8} {"writes/flow":>12} {"ms/flow":>9}')
+        for name, store_class in STORES.items():
+            store = store_class()
+            emails = [f'bench-otp-{i}@example.invalid' for i in range(n)]
+            try:
+                # Run inside a rolled-back transaction so the benchmark leaves no rows behind
+                with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for email in emails:
+                        for _ in range(options['resends']):
+                            store.issue(email, OTP.PURPOSE_SIGNUP)
+                        code = store.issue(email, OTP.PURPOSE_SIGNUP)
+                        store.consume(email, '000000' if code != '000000' else '111111', OTP.PURPOSE_SIGNUP)
+                        if not store.consume(email, code, OTP.PURPOSE_SIGNUP):
+                            self.stderr.write(f'{name}: verification failed for {email}')
+                    elapsed = time.perf_counter() - start
+                    raise Rollback
+            except Rollback:
+                pass
+            writes = sum(1 for q in queries.captured_queries if q['sql'].lstrip().upper().startswith(WRITE_PREFIXES))
+            self.stdout.write(
+                f'{name:<10} {len(queries):>8} {writes:>8} {writes / n:>12.1f} {elapsed * 1000 / n:>9.2f}'
+            )
@@ -0,0 +1,91 @@
+"""
+Pluggable storage for one-time passwords (signup verification, password reset).
+
+OTP_STORE = 'database' (default) keeps codes in the OTP table. OTP_STORE = 'cache' keeps them in the
+Django cache instead: no database writes, expiry by cache TTL, verification consumes the code
+atomically (only one of two concurrent verifications succeeds), and a code is discarded after
+OTP_MAX_ATTEMPTS wrong guesses. Use a shared, persistent cache (e.g. Redis) with several workers.
+
+Both stores expose:
+- issue(email, purpose) -> code: replace any previous code for email+purpose and return the new one;
+- consume(email, code, purpose) -> bool: True (and the code is used up) if it is valid and not expired.
+"""
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import OTP, OTP_EXPIRE_MINUTES
+
+
+def generate_code():
+    return ''.join(secrets.choice('0123456789') for _ in range(6))
+
+
+class DatabaseOTPStore:
+    """OTP table: one DELETE + INSERT per issue, one DELETE per successful consume."""
+
+    def issue(self, email, purpose):
+        return OTP.create_otp(email, purpose).otp_code
+
+    def consume(self, email, code, purpose):
+        deleted, _ = OTP.objects.filter(
+            email__iexact=email,
+            purpose=purpose,
+            otp_code=code.strip(),
+            expires_at__gt=timezone.now(),
+        ).delete()
+        return deleted > 0
+
+
+class CacheOTPStore:
+    """Django cache: TTL expiry, atomic consume, per-code attempt counter. No database writes."""
+    prefix = 'otp'
+
+    def _keys(self, email, purpose):
+        who = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        base = f'{self.prefix}:{purpose}:{who}'
+        return base, base + ':attempts'
+
+    def _digest(self, code):
+        # Codes are stored hashed so a cache dump does not reveal them
+        return hmac.new(settings.SECRET_KEY.encode(), code.strip().encode(), hashlib.sha256).hexdigest()
+
+    def issue(self, email, purpose):
+        code = generate_code()
+        key, attempts_key = self._keys(email, purpose)
+        ttl = OTP_EXPIRE_MINUTES * 60
+        cache.set(key, self._digest(code), ttl)
+        cache.set(attempts_key, 0, ttl)
+        return code
+
+    def consume(self, email, code, purpose):
+        key, attempts_key = self._keys(email, purpose)
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:  # no code issued, or expired
+            return False
+        if attempts > getattr(settings, 'OTP_MAX_ATTEMPTS', 5):
+            cache.delete_many([key, attempts_key])
+            return False
+        stored = cache.get(key)
+        if stored is None or not hmac.compare_digest(stored, self._digest(code)):
+            return False
+        # delete() reports whether this call removed the key: only one concurrent verify wins
+        if not cache.delete(key):
+            return False
+        cache.delete(attempts_key)
+        return True
+
+
+STORES = {
+    'database': DatabaseOTPStore,
+    'cache': CacheOTPStore,
+}
+
+
+def get_otp_store(name=None):
+    return STORES[name or getattr(settings, 'OTP_STORE', 'database')]()
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import OTP
+from .otp_store import get_otp_store
 from .validators import validate_strong_password
 
 User = get_user_model()
@@ -53,10 +54,9 @@ class VerifyEmailSerializer(serializers.Serializer):
     otp = serializers.CharField(write_only=True, max_length=8)
 
     def validate(self, data):
-        otp_record = OTP.verify(data['email'], data['otp'], OTP.PURPOSE_SIGNUP)
-        if not otp_record:
+        # Consumes the code: a second verification with the same code fails
+        if not get_otp_store().consume(data['email'], data['otp'], OTP.PURPOSE_SIGNUP):
             raise serializers.ValidationError('Invalid or expired verification code.')
-        data['otp_record'] = otp_record
         return data
 
 
@@ -85,8 +85,6 @@ class ResetPasswordSerializer(serializers.Serializer):
         return value
 
     def validate(self, data):
-        otp_record = OTP.verify(data['email'], data['otp'], OTP.PURPOSE_FORGOT_PASSWORD)
-        if not otp_record:
+        if not get_otp_store().consume(data['email'], data['otp'], OTP.PURPOSE_FORGOT_PASSWORD):
             raise serializers.ValidationError('Invalid or expired reset code.')
-        data['otp_record'] = otp_record
         return data
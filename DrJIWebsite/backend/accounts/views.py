@@ -4,8 +4,10 @@ from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from config.idempotency import idempotent
 from config.utils import success_response, error_response
 from .models import OTP
+from .otp_store import get_otp_store
 from .serializers import (
     SignUpSerializer,
     VerifyEmailSerializer,
@@ -34,12 +36,13 @@ class SignUpView(APIView):
     """Customer sign up. Creates inactive user and sends OTP to email."""
     permission_classes = [AllowAny]
 
+    @idempotent('signup')
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        otp_record = OTP.create_otp(user.email, OTP.PURPOSE_SIGNUP)
-        send_otp_email(user.email, otp_record.otp_code, OTP.PURPOSE_SIGNUP)
+        code = get_otp_store().issue(user.email, OTP.PURPOSE_SIGNUP)
+        send_otp_email(user.email, code, OTP.PURPOSE_SIGNUP)
         return success_response(
             data={'email': user.email},
             message='Verification code sent to your email. Please verify within 5 minutes.',
@@ -54,11 +57,9 @@ class VerifyEmailView(APIView):
     def post(self, request):
         serializer = VerifyEmailSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        otp_record = serializer.validated_data['otp_record']
-        user = User.objects.get(email__iexact=otp_record.email)
+        user = User.objects.get(email__iexact=serializer.validated_data['email'])
         user.is_active = True
         user.save(update_fields=['is_active'])
-        otp_record.delete()
         return success_response(
             data={'email': user.email},
             message='Email verified. You can now sign in.',
@@ -89,12 +90,13 @@ class ForgotPasswordView(APIView):
     """Send OTP to email for password reset."""
     permission_classes = [AllowAny]
 
+    @idempotent('forgot-password')
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
-        otp_record = OTP.create_otp(email, OTP.PURPOSE_FORGOT_PASSWORD)
-        send_otp_email(email, otp_record.otp_code, OTP.PURPOSE_FORGOT_PASSWORD)
+        code = get_otp_store().issue(email, OTP.PURPOSE_FORGOT_PASSWORD)
+        send_otp_email(email, code, OTP.PURPOSE_FORGOT_PASSWORD)
         return success_response(
             data={'email': email},
             message='Password reset code sent to your email. Valid for 5 minutes.',
@@ -110,11 +112,9 @@ class ResetPasswordView(APIView):
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email'].strip().lower()
         new_password = serializer.validated_data['new_password']
-        otp_record = serializer.validated_data['otp_record']
         user = User.objects.get(email__iexact=email)
         user.set_password(new_password)
         user.save(update_fields=['password'])
-        otp_record.delete()
         return success_response(
             data={'email': email},
             message='Password reset successfully. You can now sign in.',
@@ -0,0 +1,144 @@
+"""
+Read-replica routing for GET traffic.
+
+DATABASE_READ_REPLICAS lists database aliases holding (possibly lagging) copies of `default`.
+ReplicaRouter sends reads to a random replica only while ReplicaRoutingMiddleware has marked the
+current request as replica-safe; everything else uses the primary:
+- requests with an unsafe method (POST, PUT, PATCH, DELETE) and code outside a request (cron, shell);
+- the rest of a request once it has written anything, and any read inside transaction.atomic();
+- requests from a client that wrote within READ_YOUR_WRITES_SECONDS. After a write the middleware
+  sets a short-lived cookie (browser / session) and, for an authenticated user, a cache marker keyed
+  by user id, so the client reads its own writes until the replicas have caught up.
+
+The cookie is SameSite=Lax, so a browser sends it back only to the same site (any port of the same
+host counts, e.g. the Vite dev server). When the frontend is on another site and CORS credentials are
+allowed, it is set as SameSite=None; Secure on HTTPS requests; over plain HTTP cross-site clients are
+pinned only through the user marker (signed in) or not at all.
+
+Data memoised per process under a cache version (dental.schedule rules, the dental.tenancy clinic
+registry) is always read from the primary, since a stale copy would be kept until the next change.
+
+Replicas are never migrated: they receive the schema from the replication itself. Locally,
+`manage.py replicate_db --loop N` copies the SQLite primary into the replica files every N seconds,
+simulating replication lag.
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Per-request routing state: None outside a request (always primary)
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_READ_REPLICAS', ()))
+
+
+def _window():
+    return getattr(settings, 'READ_YOUR_WRITES_SECONDS', 5)
+
+
+def _user_key(user_id):
+    return f'db:primary:user:{user_id}'
+
+
+def _token_user_id(request):
+    """User id from a Bearer token, without the user lookup JWTAuthentication would make."""
+    if not request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer '):
+        return None
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.settings import api_settings
+    auth = JWTAuthentication()
+    try:
+        token = auth.get_validated_token(auth.get_raw_token(auth.get_header(request)))
+    except Exception:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+def _pinned(request):
+    """True if this client wrote recently (cookie or per-user cache marker still valid)."""
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user_id = _token_user_id(request)
+    return user_id is not None and cache.get(_user_key(user_id)) is not None
+
+
+def use_primary():
+    """Send the remaining reads of the current request to the primary."""
+    state = _state.get()
+    if state is not None:
+        state['replica'] = False
+        state['wrote'] = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if not state or not state['replica']:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(state['aliases'])
+
+    def db_for_write(self, model, **hints):
+        use_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Decide per request whether reads may use a replica; pin the client to the primary after a write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        aliases = replicas()
+        safe = request.method in SAFE_METHODS
+        state = {
+            'aliases': aliases,
+            'replica': bool(aliases) and safe and not _pinned(request),
+            'wrote': not safe,
+        }
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if aliases and state['wrote'] and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        window = _window()
+        secure = request.is_secure()
+        cross_site = secure and getattr(settings, 'CORS_ALLOW_CREDENTIALS', False)
+        response.set_cookie(
+            PIN_COOKIE, f'{time.time() + window:.3f}', max_age=window, httponly=True,
+            samesite='None' if cross_site else 'Lax', secure=secure,
+        )
+        # DRF replaces request.user with the token's user once a view has authenticated
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(_user_key(user.pk), 1, window)
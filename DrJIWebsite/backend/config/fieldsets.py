@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets: `?fields=name,slug,icon` on read-only viewsets.
+
+SparseFieldsetsMixin (viewset) validates the requested names against the serializer (unknown names
+are a 400), passes them to the serializer through its context and narrows the queryset with
+`.only()`, so long text columns that are not asked for are not read either. SparseFieldsMixin
+(serializer) drops every field that was not requested.
+
+Columns are taken from each field's source. A method field (source "*") declares the model fields
+it reads in `Meta.field_sources`; without that entry the queryset is left unnarrowed.
+"""
+import functools
+
+from rest_framework.exceptions import ValidationError
+
+QUERY_PARAM = 'fields'
+
+
+class SparseFieldsMixin:
+    """ModelSerializer mixin: keep only the fields listed in context['fields'] (all when absent)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get('fields')
+        if wanted:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+
+@functools.lru_cache(maxsize=None)
+def serializer_sources(serializer_class):
+    """{field name: source} of a serializer class (built once; ModelSerializer field introspection is slow)."""
+    return {name: field.source for name, field in serializer_class().fields.items()}
+
+
+def model_columns(serializer_class, names):
+    """Model field names to load for serializer fields `names`, or None if they cannot be narrowed."""
+    model = serializer_class.Meta.model
+    concrete = {f.name for f in model._meta.concrete_fields}
+    field_sources = getattr(serializer_class.Meta, 'field_sources', {})
+    sources = serializer_sources(serializer_class)
+    columns = {model._meta.pk.name}
+    for name in names:
+        source = sources[name]
+        if source == '*':
+            if name not in field_sources:
+                return None
+            columns.update(field_sources[name])
+            continue
+        column = source.split('.')[0]
+        if column not in concrete:
+            return None  # property or relation traversal: needs the whole row
+        columns.add(column)
+    return sorted(columns)
+
+
+class SparseFieldsetsMixin:
+    """Viewset mixin: honour `?fields=` in the serializer output and the SQL column list."""
+
+    def requested_fields(self):
+        """Validated field names from the query string, or None for every field."""
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            raw = self.request.query_params.get(QUERY_PARAM, '') if self.request is not None else ''
+            names = list(dict.fromkeys(n.strip() for n in raw.split(',') if n.strip()))
+            if names:
+                available = serializer_sources(self.get_serializer_class())
+                unknown = [n for n in names if n not in available]
+                if unknown:
+                    raise ValidationError({QUERY_PARAM: [
+                        f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(available)}.'
+                    ]})
+                self._requested_fields = names
+        return self._requested_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        names = self.requested_fields()
+        if names:
+            columns = model_columns(self.get_serializer_class(), names)
+            if columns:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields()
+        return context
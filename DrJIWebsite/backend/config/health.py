@@ -0,0 +1,133 @@
+"""
+Liveness and readiness endpoints for load balancers and orchestrators.
+
+- /health/live: the process is up and serving requests. No dependency is touched.
+- /health/ready: probes each database alias (a read of django_migrations, so a locked SQLite file
+  shows up), the SMTP server (connect + login, only with the SMTP email backend) and the Google
+  Calendar API (fetch the clinic calendar, only when configured). Probes run in parallel, each
+  reported with its latency and bounded by HEALTH_PROBE_TIMEOUT; a probe still running from an
+  earlier check is reported as timed out rather than started again.
+
+Results are cached in the process for HEALTH_CACHE_SECONDS, so frequent polling costs one probe
+run per worker per interval. Ready returns 503 only if a probe in HEALTH_REQUIRED_PROBES (default:
+database) fails; other failures report "degraded" with 200, as bookings still work without email
+or Calendar.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils import timezone
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='health-probe')
+_running = {}
+_lock = threading.Lock()
+_last = None  # (monotonic time, payload, status code)
+
+
+def _timeout():
+    return getattr(settings, 'HEALTH_PROBE_TIMEOUT', 2.0)
+
+
+def probe_database():
+    for alias in connections:
+        conn = connections[alias]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+                cursor.fetchone()
+        finally:
+            conn.close()  # probe threads are long-lived; do not keep connections open
+    return {'aliases': list(connections)}
+
+
+def probe_email():
+    backend = getattr(settings, 'EMAIL_BACKEND', '')
+    if not backend.endswith('smtp.EmailBackend'):
+        return None
+    from django.core.mail import get_connection
+    conn = get_connection(timeout=_timeout())
+    conn.open()
+    conn.close()
+    return {'host': settings.EMAIL_HOST}
+
+
+def probe_calendar():
+    from dental import calendar_service, tenancy
+    service, calendar_id = calendar_service._get_calendar_service(calendar_service.SCOPES_READ)
+    if service is None:
+        if tenancy.calendar_id():
+            raise RuntimeError('Calendar client could not be created (check GOOGLE_APPLICATION_CREDENTIALS).')
+        return None
+    service.calendars().get(calendarId=calendar_id, fields='id').execute(num_retries=0)
+    return {}
+
+
+PROBES = {
+    'database': probe_database,
+    'email': probe_email,
+    'calendar': probe_calendar,
+}
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        detail = func()
+    except Exception as e:
+        return {'status': 'error', 'error': f'{type(e).__name__}: {e}'[:300],
+                'latency_ms': round((time.perf_counter() - start) * 1000, 1)}
+    result = {'status': 'skipped' if detail is None else 'ok',
+              'latency_ms': round((time.perf_counter() - start) * 1000, 1)}
+    if detail:
+        result.update(detail)
+    return result
+
+
+def run_probes():
+    """Run every probe in parallel under the timeout. Returns {name: result}."""
+    deadline = time.monotonic() + _timeout()
+    futures = {}
+    for name, func in PROBES.items():
+        future = _running.get(name)
+        if future is None or future.done():
+            future = _running[name] = _executor.submit(_timed, func)
+        futures[name] = future
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except TimeoutError:
+            results[name] = {'status': 'timeout', 'latency_ms': round(_timeout() * 1000, 1)}
+    return results
+
+
+def readiness():
+    """(payload, status code), reusing the last result for HEALTH_CACHE_SECONDS."""
+    global _last
+    ttl = getattr(settings, 'HEALTH_CACHE_SECONDS', 5)
+    with _lock:
+        if _last is not None and time.monotonic() - _last[0] < ttl:
+            return {**_last[1], 'cached': True}, _last[2]
+        probes = run_probes()
+        required = getattr(settings, 'HEALTH_REQUIRED_PROBES', ('database',))
+        failed = {name for name, r in probes.items() if r['status'] in ('error', 'timeout')}
+        if failed & set(required):
+            state, code = 'unavailable', 503
+        else:
+            state, code = ('degraded' if failed else 'ok'), 200
+        payload = {'status': state, 'checked_at': timezone.now().isoformat(), 'probes': probes}
+        _last = (time.monotonic(), payload, code)
+        return {**payload, 'cached': False}, code
+
+
+def live(request):
+    return JsonResponse({'success': True, 'data': {'status': 'ok'}}, headers={'Cache-Control': 'no-store'})
+
+
+def ready(request):
+    payload, code = readiness()
+    return JsonResponse({'success': code == 200, 'data': payload}, status=code, headers={'Cache-Control': 'no-store'})
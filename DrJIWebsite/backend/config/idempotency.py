@@ -0,0 +1,130 @@
+"""
+Idempotency-Key support for POST endpoints that have side effects (bookings, OTP emails).
+
+A client sends the same `Idempotency-Key` header on every retry of one logical request. The first
+successful (2xx) response is stored for IDEMPOTENCY_TTL_SECONDS under the key, together with a
+fingerprint of the request (method, path, user, body). Retries replay the stored response without
+running validation or sending email again; reusing a key for a different request is rejected with 422.
+Failed requests are not stored, so they can be retried with the same key.
+
+Keys are rows of dental.IdempotencyKey with a unique constraint, so exactly one request claims a key
+however many workers its duplicates reach. The row is inserted before the handler runs (the in-flight
+lock) and receives the response afterwards. While the first request is still running, duplicates wait
+for it (polling the row, up to IDEMPOTENCY_WAIT_SECONDS) instead of running concurrently. A lock left
+behind by a crashed worker expires after three times the wait and can then be taken over. Expired
+rows are deleted whenever a new key is claimed.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .utils import error_response
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def _row_key(scope, key, request):
+    # Keys are per clinic (request.tenant, set by dental.tenancy.TenantMiddleware)
+    tenant = getattr(getattr(request, 'tenant', None), 'id', '')
+    return hashlib.sha256(f'{tenant}:{scope}:{key}'.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):  # QueryDict (form posts)
+        data = {k: v for k, v in data.lists()}
+    user = request.user.pk if request.user and request.user.is_authenticated else None
+    raw = json.dumps([request.method, request.path, user, data], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return error_response(
+            'Idempotency-Key has already been used for a different request.',
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(stored.response, status=stored.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def _claim(row_key, fingerprint, lock_seconds):
+    """Insert the in-flight row for `row_key`; False if another request holds (or has completed) it."""
+    from dental.models import IdempotencyKey
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=row_key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=lock_seconds),
+            )
+    except IntegrityError:
+        # An expired response or a crashed worker's lock: take the key over (read first, no write lock)
+        expired = IdempotencyKey.objects.filter(key=row_key, expires_at__lte=now)
+        if expired.exists() and expired.delete()[0]:
+            return _claim(row_key, fingerprint, lock_seconds)
+        return False
+    IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+    return True
+
+
+def idempotent(scope):
+    """
+    Decorator for APIView/ViewSet handler methods: honour the Idempotency-Key header.
+    `scope` namespaces keys per endpoint. Requests without the header run as usual.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.META.get(HEADER, '').strip()
+            if not key:
+                return method(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return error_response(f'Idempotency-Key must be {MAX_KEY_LENGTH} characters or fewer.')
+
+            from dental.models import IdempotencyKey
+
+            row_key = _row_key(scope, key, request)
+            rows = IdempotencyKey.objects.filter(key=row_key)
+            fingerprint = _fingerprint(request)
+            ttl = getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', 86400)
+            wait = getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 10)
+            deadline = time.monotonic() + wait
+            while True:
+                stored = rows.filter(status_code__isnull=False, expires_at__gt=timezone.now()).first()
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+                # The lock outlives the wait so a slow first request is not run twice
+                if _claim(row_key, fingerprint, wait * 3):
+                    break
+                if time.monotonic() >= deadline:
+                    return error_response(
+                        'A request with this Idempotency-Key is still being processed. Retry shortly.',
+                        status_code=status.HTTP_409_CONFLICT,
+                    )
+                time.sleep(POLL_INTERVAL)
+
+            completed = False
+            try:
+                response = method(view, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    completed = bool(rows.filter(status_code__isnull=True).update(
+                        status_code=response.status_code,
+                        response=response.data,
+                        expires_at=timezone.now() + timedelta(seconds=ttl),
+                    ))
+                return response
+            finally:
+                if not completed:
+                    rows.filter(status_code__isnull=True).delete()
+        return wrapper
+    return decorator
@@ -0,0 +1,87 @@
+"""
+Delivery middleware:
+- StaticFilesMiddleware serves collected static files (STATIC_ROOT) and uploads (MEDIA_ROOT) directly,
+  picking a precompressed .br/.gz sibling when the client accepts it, with long-lived Cache-Control.
+- APIGZipMiddleware gzips API (JSON/MessagePack) and .ics responses on the fly when the client accepts gzip.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# ManifestStaticFilesStorage names: app.5af66c1b1797.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_URL from STATIC_ROOT and MEDIA_URL from MEDIA_ROOT with compression negotiation."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mounts = []
+        if getattr(settings, 'STATIC_ROOT', None):
+            self.mounts.append(('/' + settings.STATIC_URL.lstrip('/'), str(settings.STATIC_ROOT), True))
+        if getattr(settings, 'MEDIA_ROOT', None):
+            self.mounts.append(('/' + settings.MEDIA_URL.lstrip('/'), str(settings.MEDIA_ROOT), False))
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            for prefix, root, is_static in self.mounts:
+                if request.path_info.startswith(prefix):
+                    response = self.serve(request, root, request.path_info[len(prefix):], is_static)
+                    if response is not None:
+                        return response
+        return self.get_response(request)
+
+    def serve(self, request, root, name, is_static):
+        try:
+            path = safe_join(root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not name or not os.path.isfile(path):
+            return None  # fall through (e.g. runserver's finders in development)
+
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding, served_path = None, path
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, served_path = candidate, path + suffix
+                break
+
+        stat = os.stat(served_path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            content_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(open(served_path, 'rb'), content_type=content_type or 'application/octet-stream')
+            response['Content-Length'] = stat.st_size
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Last-Modified'] = http_date(stat.st_mtime)
+        response['ETag'] = etag
+        if is_static and HASHED_NAME.search(name):
+            response['Cache-Control'] = IMMUTABLE
+        elif is_static:
+            response['Cache-Control'] = f"public, max-age={getattr(settings, 'STATIC_CACHE_SECONDS', 3600)}"
+        else:
+            response['Cache-Control'] = f"public, max-age={getattr(settings, 'MEDIA_CACHE_SECONDS', 86400)}"
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class APIGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware restricted to JSON, MessagePack and iCalendar responses."""
+    content_types = ('application/json', 'application/msgpack', 'text/calendar')
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith(self.content_types):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,185 @@
+"""
+Sampling profiler for slow API requests (opt-in).
+
+With PROFILE_SAMPLE_RATE > 0, SamplingProfilerMiddleware runs cProfile on that fraction of
+requests under PROFILE_PATH_PREFIXES. A profile is kept only when the request took at least
+PROFILE_SLOW_MS. It is written to PROFILE_DIR as <stamp>.prof (open it with pstats or snakeviz)
+next to a <stamp>.json summary: route, status, total time, and the time spent in SQL (measured
+with a connection execute wrapper), sending email and Google Calendar API calls (from the
+profile). Only the newest PROFILE_KEEP profiles are kept.
+
+Staff list the summaries at GET /api/profiles/ and download a profile from /api/profiles/<name>.prof.
+"""
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .utils import success_response
+
+logger = logging.getLogger(__name__)
+
+# (file path suffix, function name) whose cumulative time is reported per category
+EMAIL_FUNCTIONS = {(os.path.join('django', 'core', 'mail', 'message.py'), 'send')}
+CALENDAR_FUNCTIONS = {(os.path.join('googleapiclient', 'http.py'), 'execute')}
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+
+
+class _SQLTimer:
+    """connection.execute_wrapper that adds up query count and wall time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _cumulative_ms(stats, functions):
+    total = 0.0
+    for (filename, _, name), (_, _, _, cumulative, _) in stats.stats.items():
+        if any(name == fn and filename.endswith(suffix) for suffix, fn in functions):
+            total += cumulative
+    return round(total * 1000, 1)
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    if not match.route:
+        return match.view_name
+    # DRF router patterns are regexes: "api/^appointments/available-slots/$"
+    return '/' + match.route.replace('/^', '/').lstrip('^').rstrip('$')
+
+
+class SamplingProfilerMiddleware:
+    """Profile a sample of requests; keep the profile when the request was slow (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+        self.slow_ms = getattr(settings, 'PROFILE_SLOW_MS', 500)
+        self.keep = getattr(settings, 'PROFILE_KEEP', 50)
+        self.prefixes = tuple(getattr(settings, 'PROFILE_PATH_PREFIXES', ('/api/',)))
+
+    def __call__(self, request):
+        if (
+            self.rate <= 0
+            or not request.path.startswith(self.prefixes)
+            or request.path.startswith('/api/profiles/')
+            or random.random() >= self.rate
+        ):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        sql = _SQLTimer()
+        wrappers = [conn.execute_wrapper(sql) for conn in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+        if elapsed_ms >= self.slow_ms:
+            try:
+                self.save(request, response, profiler, sql, elapsed_ms)
+            except Exception:
+                logger.exception('Could not save request profile')
+        return response
+
+    def save(self, request, response, profiler, sql, elapsed_ms):
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f'{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}'
+        profiler.create_stats()
+        stats = pstats.Stats(profiler)
+        summary = {
+            'name': f'{name}.prof',
+            'captured_at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'route': _route(request),
+            'status': response.status_code,
+            'duration_ms': round(elapsed_ms, 1),
+            'sql_queries': sql.count,
+            'sql_ms': round(sql.seconds * 1000, 1),
+            'email_ms': _cumulative_ms(stats, EMAIL_FUNCTIONS),
+            'calendar_ms': _cumulative_ms(stats, CALENDAR_FUNCTIONS),
+        }
+        # Write to temporary names and rename, so the list endpoint never sees half a profile
+        tmp = directory / f'.{name}.tmp'
+        stats.dump_stats(tmp)
+        os.replace(tmp, directory / f'{name}.prof')
+        tmp.write_text(json.dumps(summary))
+        os.replace(tmp, directory / f'{name}.json')
+        self.prune(directory)
+
+    def prune(self, directory):
+        """Keep the newest PROFILE_KEEP profiles (names sort by capture time)."""
+        summaries = sorted(directory.glob('*.json'))
+        for old in summaries[:max(0, len(summaries) - self.keep)]:
+            for path in (old, old.with_suffix('.prof')):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass  # pruned by another worker
+
+
+def list_profiles():
+    """Summaries of the captured profiles, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # pruned or being written
+    return profiles
+
+
+class ProfileListView(APIView):
+    """Staff only: captured slow-request profiles, newest first."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return success_response(data=list_profiles(), message='Profiles retrieved.')
+
+
+class ProfileDownloadView(APIView):
+    """Staff only: download one .prof file (python -m pstats / snakeviz)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profile_dir() / f'{name}.prof'
+        if '/' in name or name.startswith('.') or not path.is_file():
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name,
+                            content_type='application/octet-stream')
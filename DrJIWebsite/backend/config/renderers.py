@@ -0,0 +1,88 @@
+"""
+Fast renderers/parsers for the API envelope.
+
+FastJSONRenderer / FastJSONParser use orjson when it is installed and fall back to DRF's stdlib-json
+implementation otherwise (or for indented output). Values orjson does not handle natively the same way
+as DRF (datetimes, dates, times, Decimal, lazy strings, ...) go through DRF's JSONEncoder.default,
+so strings, integers, Decimals and temporal values render exactly as with JSONRenderer. Floats do
+not: orjson writes exponents without sign and zero padding (1e16 and 1e-7 rather than 1e+16 and
+1e-07), and renders NaN and +/-Infinity as null where JSONRenderer (STRICT_JSON) raises ValueError.
+The API's payloads carry no floats today; a view that starts returning them should not rely on the
+ValueError.
+
+MessagePackRenderer / MessagePackParser add an optional `application/msgpack` content type
+(enabled in settings when the msgpack package is installed).
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_encode_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson (compact output only; floats differ, see the module docstring)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_encode_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # e.g. integers beyond 64 bits; stdlib json handles (or reports) them as before
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict-javascript-subset escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by orjson for UTF-8 request bodies."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary MessagePack rendering of the same data the JSON renderer would produce."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        import msgpack
+
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
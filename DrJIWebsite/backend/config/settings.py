@@ -7,8 +7,10 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Load .env from backend folder (not committed; use for EMAIL_* etc.)
-from dotenv import load_dotenv
-load_dotenv(BASE_DIR / '.env')
+# Deployments that set real environment variables skip importing dotenv entirely.
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -32,15 +34,33 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.StaticFilesMiddleware',
+    'config.middleware.APIGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'dental.tenancy.TenantMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.db_router.ReplicaRoutingMiddleware',
 ]
 
+# Opt-in sampling profiler: profile this fraction of /api/ requests (0 = off) and keep those slower than
+# PROFILE_SLOW_MS as .prof files in PROFILE_DIR (newest PROFILE_KEEP). Staff list them at /api/profiles/.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS', '500'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '50'))
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles'))
+if PROFILE_SAMPLE_RATE > 0:
+    MIDDLEWARE.insert(0, 'config.profiling.SamplingProfilerMiddleware')
+
+# /health/ready: per-probe timeout (seconds), how long a result is reused, and which probe failures return 503
+HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT', '2'))
+HEALTH_CACHE_SECONDS = float(os.environ.get('HEALTH_CACHE_SECONDS', '5'))
+HEALTH_REQUIRED_PROBES = ('database',)
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -67,6 +87,36 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+# Read replicas (comma-separated SQLite files, e.g. replica.sqlite3): safe GET reads go to a replica,
+# see config/db_router.py. Locally, `python manage.py replicate_db --loop 2` keeps them ~2s behind.
+DATABASE_READ_REPLICAS = []
+for _i, _name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{_i}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / _name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_REPLICAS.append(f'replica{_i}')
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+# After a write, the client (cookie) and user (cache) read from the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', '5'))
+
+# Django cache. It must be shared by every worker process: schedule and clinic version numbers, bootstrap
+# payloads, OTP codes and read-your-writes markers live here. CACHE_URL: redis://host:6379/0 (needs the `redis`
+# package), file:///absolute/dir, or locmem:// (one process only, e.g. tests). Default: a file cache in
+# BASE_DIR/cache, shared by the gunicorn workers of one host.
+_cache_url = os.environ.get('CACHE_URL', '')
+if _cache_url.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': _cache_url}}
+elif _cache_url.startswith('locmem://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+else:
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': _cache_url[len('file://'):] if _cache_url.startswith('file://') else str(BASE_DIR / 'cache'),
+        # Culling drops random entries; version keys survive a cull (see dental.schedule) but keep it rare
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }}
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -82,6 +132,19 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Hashed filenames + .gz/.br written by collectstatic; served by config.middleware.StaticFilesMiddleware
+    'staticfiles': {'BACKEND': 'config.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Cache-Control max-age for unhashed static files and for media (hashed static files are immutable)
+STATIC_CACHE_SECONDS = 3600
+MEDIA_CACHE_SECONDS = int(os.environ.get('MEDIA_CACHE_SECONDS', '86400'))
+# Widths (px) of the responsive WebP/JPEG variants generated for uploaded dentist photos
+RESPONSIVE_IMAGE_WIDTHS = (320, 640, 960, 1280)
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS - allow frontend during development
@@ -92,8 +155,24 @@ CORS_ALLOWED_ORIGINS = [
     'http://127.0.0.1:5173',
 ]
 CORS_ALLOW_CREDENTIALS = True
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-clinic')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
+# Optional binary content type for our own frontend (Accept: application/msgpack)
+from importlib.util import find_spec
+_MSGPACK = find_spec('msgpack') is not None
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['config.renderers.MessagePackRenderer'] if _MSGPACK else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ] + (['config.renderers.MessagePackParser'] if _MSGPACK else []),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
@@ -103,6 +182,11 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'config.utils.exception_handler',
 }
 
+# Where sign-up / password-reset codes live: 'database' (OTP table) or 'cache' (TTL expiry, no DB writes;
+# needs a shared cache such as Redis with several workers). Wrong guesses allowed per code (cache store).
+OTP_STORE = os.environ.get('OTP_STORE', 'database')
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', '5'))
+
 # JWT (customer sign-in)
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -120,13 +204,53 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@drjidental.co
 APPOINTMENT_NOTIFY_EMAILS = [
     e.strip() for e in os.environ.get('APPOINTMENT_NOTIFY_EMAILS', 'info@drjidental.com').split(',') if e.strip()
 ]
-# Slot-based booking: working hours and slot duration (minutes)
+# Staff notifications: 'immediate' (one email per booking) or 'digest' (summary sent by
+# `manage.py send_appointment_digest`); bookings within APPOINTMENT_DIGEST_URGENT_DAYS of today bypass the digest
+APPOINTMENT_NOTIFY_MODE = os.environ.get('APPOINTMENT_NOTIFY_MODE', 'immediate')
+APPOINTMENT_DIGEST_URGENT_DAYS = int(os.environ.get('APPOINTMENT_DIGEST_URGENT_DAYS', '0'))
+# Slot-based booking: default working hours (used until Opening hours are set in admin) and slot duration (minutes)
 APPOINTMENT_SLOT_START_HOUR = int(os.environ.get('APPOINTMENT_SLOT_START_HOUR', '9'))
 APPOINTMENT_SLOT_END_HOUR = int(os.environ.get('APPOINTMENT_SLOT_END_HOUR', '17'))
 APPOINTMENT_SLOT_DURATION_MINUTES = int(os.environ.get('APPOINTMENT_SLOT_DURATION_MINUTES', '30'))
+# Idempotency-Key replay store (dental.IdempotencyKey rows; booking, signup, forgot-password POSTs): how long responses are kept,
+# and how long a duplicate waits for the first request still in flight (seconds)
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+IDEMPOTENCY_WAIT_SECONDS = int(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '10'))
+# How long a slot stays reserved for a patient filling in the booking form (seconds)
+SLOT_HOLD_SECONDS = int(os.environ.get('SLOT_HOLD_SECONDS', '300'))
+# How far ahead /api/appointments/next-available/ searches for free slots (days)
+NEXT_AVAILABLE_MAX_DAYS = int(os.environ.get('NEXT_AVAILABLE_MAX_DAYS', '60'))
+# How often (seconds) a worker re-reads the clinic schedule version from the shared cache (dental.schedule)
+SCHEDULE_CHECK_SECONDS = float(os.environ.get('SCHEDULE_CHECK_SECONDS', '1'))
+# `manage.py archive_appointments` moves appointments older than this many days to the archive table
+ARCHIVE_APPOINTMENTS_AFTER_DAYS = int(os.environ.get('ARCHIVE_APPOINTMENTS_AFTER_DAYS', '365'))
+# /api/bootstrap/: default days of availability, how long the assembled payload is cached (seconds),
+# and its size budget in bytes (availability days are dropped to fit)
+BOOTSTRAP_DAYS = int(os.environ.get('BOOTSTRAP_DAYS', '7'))
+BOOTSTRAP_CACHE_SECONDS = int(os.environ.get('BOOTSTRAP_CACHE_SECONDS', '30'))
+BOOTSTRAP_MAX_BYTES = int(os.environ.get('BOOTSTRAP_MAX_BYTES', '65536'))
+
+# Staff .ics feed: how long rendered feeds/events stay cached (ETag changes invalidate sooner)
+CALENDAR_FEED_CACHE_SECONDS = int(os.environ.get('CALENDAR_FEED_CACHE_SECONDS', '3600'))
+
+# Static catalogue export (dental.catalogue_export): directory written by `manage.py export_catalogue` and, when set,
+# re-exported on every Service / Dentist save ('' = on demand only, to --output); base URL for absolute photo URLs
+_catalogue_dir = os.environ.get('CATALOGUE_EXPORT_DIR', '')
+CATALOGUE_EXPORT_DIR = str(BASE_DIR / _catalogue_dir) if _catalogue_dir and not os.path.isabs(_catalogue_dir) else _catalogue_dir
+CATALOGUE_EXPORT_BASE_URL = os.environ.get('CATALOGUE_EXPORT_BASE_URL', 'http://localhost:8000')
+
+# Clinics (dental.tenancy): header naming the clinic by slug ('' to resolve by host only), the clinic used
+# for unknown hosts and outside requests, and whether unknown hosts get a 404 (except TENANT_EXEMPT_PATHS).
+# Each clinic can override the APPOINTMENT_SLOT_* and GOOGLE_* settings below in the admin.
+TENANT_HEADER = os.environ.get('TENANT_HEADER', 'X-Clinic')
+TENANT_DEFAULT = os.environ.get('TENANT_DEFAULT', 'default')
+TENANT_STRICT_HOSTS = os.environ.get('TENANT_STRICT_HOSTS', 'false').lower() == 'true'
+TENANT_EXEMPT_PATHS = ('/health/',)
 
 # Google Calendar (optional): sync slots and create events. Use service account JSON path.
 GOOGLE_CALENDAR_ID = os.environ.get('GOOGLE_CALENDAR_ID', '')
+# 'live' = freebusy API per availability request; 'mirror' = local table synced by `manage.py sync_calendar`
+GOOGLE_CALENDAR_BUSY_SOURCE = os.environ.get('GOOGLE_CALENDAR_BUSY_SOURCE', 'live')
 _google_creds = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', '')
 GOOGLE_APPLICATION_CREDENTIALS = str(BASE_DIR / _google_creds) if _google_creds and not os.path.isabs(_google_creds) else _google_creds
 
@@ -0,0 +1,59 @@
+"""
+Static file storage: content-hashed names (manifest) plus precompressed .gz / .br siblings
+written at collectstatic time, so config.middleware.StaticFilesMiddleware never compresses per request.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.ttf', '.otf', '.eot')
+MIN_COMPRESS_SIZE = 256
+
+
+def compressed_variants(data):
+    """[(suffix, bytes)] of the .gz (and .br when brotli is installed) encodings that save at least 5%."""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    encoders = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+        encoders.append(('.br', lambda d: brotli.compress(d, quality=11)))
+    except ImportError:
+        pass
+    variants = []
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) < len(data) * 0.95:
+            variants.append((suffix, compressed))
+    return variants
+
+
+def compress_file(path):
+    """Write path.gz (and path.br) next to path; see compressed_variants."""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    written = []
+    for suffix, compressed in compressed_variants(data):
+        with open(path + suffix, 'wb') as fh:
+            fh.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also precompresses text assets after hashing."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                path = self.path(name)
+                if os.path.exists(path):
+                    compress_file(path)
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.http import JsonResponse
-from django.urls import path, include
+from django.urls import path, re_path, include
+
+from . import health
+from .profiling import ProfileDownloadView, ProfileListView
 
 def api_root(request):
     """Root URL: standard response format."""
@@ -11,12 +14,17 @@ def api_root(request):
             'docs': '/api/',
             'admin': '/admin/',
             'auth': '/api/auth/',
+            'health': '/health/ready',
         },
     })
 
 urlpatterns = [
     path('', api_root),
+    re_path(r'^health/live/?$', health.live),
+    re_path(r'^health/ready/?$', health.ready),
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
+    path('api/profiles/', ProfileListView.as_view()),
+    path('api/profiles/<str:name>.prof', ProfileDownloadView.as_view()),
     path('api/', include('dental.urls')),
 ]
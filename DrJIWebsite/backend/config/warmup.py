@@ -0,0 +1,60 @@
+"""
+Worker warm-up: do the one-off work a fresh process would otherwise do on its first request.
+Called from gunicorn's post_worker_init hook (gunicorn.conf.py), i.e. after the app is loaded and
+before the worker accepts traffic. Safe to call more than once.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(timings, name, func):
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        logger.warning('Warm-up step %s failed: %s', name, e)
+    timings[name] = time.perf_counter() - start
+
+
+def _database():
+    from django.db import connections
+    for conn in connections.all():
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def _urlconf():
+    # Imports every view module (DRF, serializers, simplejwt views, admin) and builds the resolver
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def _rest_framework():
+    from rest_framework.settings import api_settings
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                 'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES', 'EXCEPTION_HANDLER'):
+        getattr(api_settings, name)
+
+
+def _password_hashers():
+    from django.contrib.auth.hashers import get_hashers
+    get_hashers()
+
+
+def _calendar():
+    from dental import calendar_service
+    calendar_service.warm_up()
+
+
+def warm_up():
+    """Pre-initialise DB connections, URLconf/views, DRF and the Calendar client. Returns seconds per step."""
+    timings = {}
+    _timed(timings, 'database', _database)
+    _timed(timings, 'urlconf', _urlconf)
+    _timed(timings, 'rest_framework', _rest_framework)
+    _timed(timings, 'password_hashers', _password_hashers)
+    _timed(timings, 'calendar', _calendar)
+    logger.info('Worker warm-up done: %s', ', '.join(f'{k}={v * 1000:.0f}ms' for k, v in timings.items()))
+    return timings
@@ -1,25 +1,136 @@
 from django.contrib import admin
-from .models import Dentist, Service, Appointment
+
+from . import search, tenancy
+from .models import (
+    Clinic, Dentist, Service, Appointment, ArchivedAppointment, Resource, OpeningHours, ScheduleBreak, Closure, SlotHold,
+)
+
+
+class ClinicScopedAdmin(admin.ModelAdmin):
+    """Admin of a clinic-owned model: only staff of the current clinic (Clinic.staff) and superusers."""
+
+    def has_module_permission(self, request):
+        return tenancy.is_clinic_staff(request.user) and super().has_module_permission(request)
+
+    def has_view_permission(self, request, obj=None):
+        return tenancy.is_clinic_staff(request.user) and super().has_view_permission(request, obj)
+
+    def has_add_permission(self, request):
+        return tenancy.is_clinic_staff(request.user) and super().has_add_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return tenancy.is_clinic_staff(request.user) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return tenancy.is_clinic_staff(request.user) and super().has_delete_permission(request, obj)
+
+
+@admin.register(Clinic)
+class ClinicAdmin(admin.ModelAdmin):
+    """
+    Clinics served by this deployment; every other admin page shows the clinic of the current host.
+    Staff see and edit only the clinics they belong to; adding clinics and staff is for superusers.
+    """
+    list_display = ('name', 'slug', 'hosts', 'google_calendar_id', 'is_active')
+    list_editable = ('is_active',)
+    prepopulated_fields = {'slug': ('name',)}
+    filter_horizontal = ('staff',)
+    fieldsets = (
+        (None, {'fields': ('name', 'slug', 'hosts', 'is_active')}),
+        ('Slots (blank = APPOINTMENT_SLOT_* settings)', {
+            'fields': ('slot_start_hour', 'slot_end_hour', 'slot_duration_minutes'),
+        }),
+        ('Google Calendar (blank = GOOGLE_* settings)', {'fields': ('google_calendar_id', 'google_credentials')}),
+        ('Staff', {'fields': ('staff',)}),
+    )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return queryset if request.user.is_superuser else queryset.filter(staff=request.user)
+
+    def get_readonly_fields(self, request, obj=None):
+        return () if request.user.is_superuser else ('staff',)
+
+    def has_add_permission(self, request):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
 
 
 @admin.register(Dentist)
-class DentistAdmin(admin.ModelAdmin):
+class DentistAdmin(ClinicScopedAdmin):
     list_display = ('name', 'title', 'experience_years', 'updated_at')
     search_fields = ('name', 'title')
 
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(ClinicScopedAdmin):
     list_display = ('name', 'slug', 'order', 'is_active', 'updated_at')
     list_editable = ('order', 'is_active')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
 
 
+@admin.register(Resource)
+class ResourceAdmin(ClinicScopedAdmin):
+    list_display = ('name', 'kind', 'dentist', 'capacity', 'order', 'is_active')
+    list_editable = ('capacity', 'order', 'is_active')
+    list_filter = ('kind', 'is_active')
+    list_select_related = ('dentist',)
+    search_fields = ('name',)
+
+
+@admin.register(OpeningHours)
+class OpeningHoursAdmin(ClinicScopedAdmin):
+    list_display = ('weekday', 'opens', 'closes')
+
+
+@admin.register(ScheduleBreak)
+class ScheduleBreakAdmin(ClinicScopedAdmin):
+    list_display = ('weekday', 'start', 'end', 'label')
+
+
+@admin.register(Closure)
+class ClosureAdmin(ClinicScopedAdmin):
+    list_display = ('start_date', 'end_date', 'reason')
+    date_hierarchy = 'start_date'
+
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(ClinicScopedAdmin):
+    list_display = ('preferred_date', 'slot_time', 'resource', 'created_at', 'expires_at')
+    list_select_related = ('resource',)
+    readonly_fields = ('token',)
+
+
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'service', 'preferred_date', 'preferred_time', 'created_at', 'is_confirmed')
-    list_filter = ('service', 'is_confirmed', 'created_at')
+class AppointmentAdmin(ClinicScopedAdmin):
+    list_display = ('name', 'email', 'phone', 'service', 'preferred_date', 'preferred_time', 'resource', 'created_at', 'is_confirmed')
+    list_filter = ('service', 'resource', 'is_confirmed', 'created_at')
+    list_select_related = ('resource',)
     search_fields = ('name', 'email', 'phone')
     list_editable = ('is_confirmed',)
     date_hierarchy = 'created_at'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text index (dental.search) instead of LIKE '%term%' over four columns
+        if not search_term.strip():
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(ClinicScopedAdmin):
+    """Read-only: rows are moved here by `manage.py archive_appointments`."""
+    list_display = ('name', 'email', 'phone', 'service', 'preferred_date', 'resource', 'created_at', 'archived_at')
+    list_filter = ('service', 'resource')
+    list_select_related = ('resource',)
+    search_fields = ('name', 'email', 'phone')
+    date_hierarchy = 'preferred_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,7 +1,31 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 
 
 class DentalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dental'
     verbose_name = 'Dental Website'
+
+    def ready(self):
+        from . import bootstrap, catalogue_export, schedule, search, tenancy
+        from .models import Appointment, Clinic, Closure, Dentist, OpeningHours, ScheduleBreak, Service, SlotHold
+
+        # Reload the clinic registry (hosts, resolved slot/calendar settings) when a clinic changes
+        post_save.connect(tenancy.invalidate, sender=Clinic, dispatch_uid='tenancy-clinic-save')
+        post_delete.connect(tenancy.invalidate, sender=Clinic, dispatch_uid='tenancy-clinic-delete')
+        m2m_changed.connect(tenancy.invalidate, sender=Clinic.staff.through, dispatch_uid='tenancy-clinic-staff')
+        # Recompile the schedule rule set whenever it changes
+        for model in (OpeningHours, ScheduleBreak, Closure, Clinic):
+            post_save.connect(schedule.invalidate, sender=model, dispatch_uid=f'schedule-{model.__name__}-save')
+            post_delete.connect(schedule.invalidate, sender=model, dispatch_uid=f'schedule-{model.__name__}-delete')
+        # Cached /api/bootstrap/ availability: bookings, cancellations, reschedules and holds
+        for model in (Appointment, SlotHold):
+            post_save.connect(bootstrap.invalidate, sender=model, dispatch_uid=f'bootstrap-{model.__name__}-save')
+            post_delete.connect(bootstrap.invalidate, sender=model, dispatch_uid=f'bootstrap-{model.__name__}-delete')
+        # Refresh the static catalogue export (CATALOGUE_EXPORT_DIR) after staff edit the catalogue
+        for model in (Service, Dentist):
+            post_save.connect(catalogue_export.schedule, sender=model, dispatch_uid=f'catalogue-{model.__name__}-save')
+            post_delete.connect(catalogue_export.schedule, sender=model, dispatch_uid=f'catalogue-{model.__name__}-delete')
+        # SQLite table rebuilds in later migrations drop the full-text search triggers
+        post_migrate.connect(search.ensure_index, sender=self, dispatch_uid='search-ensure-index')
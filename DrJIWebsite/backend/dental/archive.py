@@ -0,0 +1,72 @@
+"""
+Archival of past and cancelled appointments.
+
+Appointments whose date (or, without a date, booking time) is before a cutoff are moved to
+ArchivedAppointment in batches: each batch copies up to `batch_size` rows (oldest id first, same
+id and timestamps) and deletes them from Appointment in one transaction. A stopped run leaves
+every batch either fully moved or untouched, so re-running simply continues. Cancelled bookings
+are moved at once, with cancelled_at set (see dental.booking).
+
+Availability, slot validation and the admin changelist only ever see the live table. Customer
+history and exports use `appointment_history()`, which reads both.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Appointment, ArchivedAppointment
+
+# Columns copied to the archive (everything but the primary key, which is copied as-is)
+COPIED_FIELDS = [
+    f.attname for f in Appointment._meta.concrete_fields if not f.primary_key
+]
+
+
+def default_cutoff():
+    return timezone.localdate() - timedelta(days=getattr(settings, 'ARCHIVE_APPOINTMENTS_AFTER_DAYS', 365))
+
+
+def archivable(cutoff):
+    """Live appointments dated before `cutoff` (undated ones by booking date)."""
+    return Appointment.objects.filter(
+        Q(preferred_date__lt=cutoff) | Q(preferred_date__isnull=True, created_at__date__lt=cutoff)
+    )
+
+
+def _move(queryset, **extra):
+    """Copy the rows of `queryset` to the archive (with `extra` field values) and delete them. Returns the count."""
+    rows = list(queryset.values('pk', *COPIED_FIELDS))
+    if not rows:
+        return 0
+    ids = [row.pop('pk') for row in rows]
+    ArchivedAppointment.objects.bulk_create(
+        [ArchivedAppointment(id=pk, **row, **extra) for pk, row in zip(ids, rows)],
+        # Rows already copied (e.g. restored from a backup) are kept as they are
+        ignore_conflicts=True,
+    )
+    Appointment.objects.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archive_batch(cutoff, batch_size=500):
+    """Move one batch of appointments before `cutoff` to the archive. Returns the number moved."""
+    with transaction.atomic():
+        return _move(archivable(cutoff).order_by('pk')[:batch_size])
+
+
+def archive_cancelled(appointment):
+    """Move a cancelled appointment to the archive (call inside the cancelling transaction)."""
+    return _move(Appointment.objects.filter(pk=appointment.pk), cancelled_at=timezone.now())
+
+
+def appointment_history(**filters):
+    """
+    Appointments matching `filters` from the live table and the archive, newest booking first.
+    Items are Appointment or ArchivedAppointment instances (`is_archived` tells them apart).
+    """
+    live = list(Appointment.objects.filter(**filters).select_related('resource'))
+    archived = list(ArchivedAppointment.objects.filter(**filters).select_related('resource'))
+    return sorted(live + archived, key=lambda a: a.created_at, reverse=True)
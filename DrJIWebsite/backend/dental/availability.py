@@ -0,0 +1,189 @@
+"""
+Slot availability across bookable resources (chairs / dentists).
+
+A slot has a free place on a resource when the resource has fewer bookings than its capacity and
+neither the clinic calendar (see dental.tenancy) nor the resource's own calendar is busy. Bookings
+without a resource (made before resources were configured) take one place from the pool. Active
+SlotHolds (a patient part-way through the booking form) count like bookings. With no active
+resources the clinic is a single chair with capacity 1, as before. Bookable slot times per day
+come from the compiled clinic schedule (dental.schedule).
+
+Any number of resources and days costs one resources query, one grouped count query each for
+bookings and holds, and one Google Calendar lookup (multi-calendar freebusy, or the local mirror).
+
+The Calendar lookup (`calendar_busy`) is a network call unless GOOGLE_CALENDAR_BUSY_SOURCE=mirror.
+Booking paths fetch it before validation and their transaction and pass it in as `busy`, so only
+the DB counts run inside the transaction, under `lock_capacity` (dental.views.prefetch_busy,
+dental.booking).
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import Count, F
+
+from . import calendar_service, schedule, tenancy
+from .models import Appointment, Resource, SlotHold
+
+logger = logging.getLogger(__name__)
+
+
+def get_all_slot_times(date=None):
+    """
+    Return list of slot dicts (time, label) bookable on `date` per the clinic schedule ([] if closed),
+    or every slot bookable on some weekday when no date is given.
+    """
+    rules = schedule.get_rules()
+    return rules.all_slot_times() if date is None else rules.slot_times(date)
+
+
+def active_resources():
+    """Active resources in booking order."""
+    return list(Resource.objects.filter(is_active=True))
+
+
+def _grouped_counts(queryset):
+    counts = {}
+    rows = queryset.values('preferred_date', 'slot_time', 'resource').annotate(n=Count('id')).order_by()
+    for row in rows:
+        key = (row['preferred_date'], row['slot_time'].strftime('%H:%M'))
+        counts.setdefault(key, {})[row['resource']] = row['n']
+    return counts
+
+
+def booking_counts(**filters):
+    """
+    Bookings per slot and resource in one grouped query: {(date, "HH:MM"): {resource_id: n}}.
+    Bookings without a resource are counted under None.
+    """
+    return _grouped_counts(Appointment.objects.filter(slot_time__isnull=False, **filters))
+
+
+def held_counts(**filters):
+    """Active slot holds per slot and resource, in the same shape as booking_counts."""
+    return _grouped_counts(SlotHold.active().filter(**filters))
+
+
+def merge_counts(counts, extra):
+    for key, by_resource in extra.items():
+        slot_counts = counts.setdefault(key, {})
+        for resource_id, n in by_resource.items():
+            slot_counts[resource_id] = slot_counts.get(resource_id, 0) + n
+    return counts
+
+
+def free_resources(resources, slot_counts, busy_calendars=()):
+    """
+    Resources (in booking order) with a free place, given one slot's {resource_id: n} bookings and
+    the calendar ids busy at that slot. Returns [] when the slot is full, and [None] when no resources
+    are configured and the single implicit chair is free.
+    """
+    if not resources:
+        return [] if sum(slot_counts.values()) else [None]
+    free = [
+        r for r in resources
+        if slot_counts.get(r.pk, 0) < r.capacity and not (r.calendar_id and r.calendar_id in busy_calendars)
+    ]
+    places = sum(r.capacity - slot_counts.get(r.pk, 0) for r in free)
+    if places <= slot_counts.get(None, 0):
+        return []
+    return free
+
+
+def lock_capacity():
+    """
+    Serialize capacity checks of the current clinic until the transaction ends; call it first inside
+    transaction.atomic(). The no-op UPDATE of the clinic row takes SQLite's write lock before any read
+    (a transaction that reads first and then writes fails with "database is locked" when it loses the
+    race, instead of waiting) and the clinic row lock on PostgreSQL, so two requests cannot both take
+    the last place of a slot.
+    """
+    from .models import Clinic
+
+    tenant = tenancy.effective()
+    if tenant is not None:
+        Clinic.objects.filter(pk=tenant.id).update(updated_at=F('updated_at'))
+
+
+def calendar_busy(start_date, days=1, resources=None):
+    """
+    Busy slot times of the clinic calendar and the resources' calendars for `days` dates from
+    `start_date`: {calendar_id: {date: set of "HH:MM"}} (calendar_service.get_busy_slot_times_by_calendar).
+    If Calendar cannot be read the failure is logged and {} returned; slots are then limited by
+    bookings and holds only.
+    """
+    if resources is None:
+        resources = active_resources()
+    try:
+        return calendar_service.get_busy_slot_times_by_calendar(
+            start_date, days, [tenancy.calendar_id()] + [r.calendar_id for r in resources],
+        )
+    except Exception:
+        logger.warning('Google Calendar busy lookup failed; availability from bookings only', exc_info=True)
+        return {}
+
+
+def availability_for_range(start_date, days, exclude=None, busy=None):
+    """
+    {date: {"HH:MM": [free resources]}} for every slot of `days` dates from `start_date`.
+    Days the clinic is closed have no slots; if every day is closed nothing is queried at all.
+    `exclude` (an Appointment being rescheduled) does not count against its current slot.
+    `busy` is a prefetched calendar_busy() covering the range; it is looked up when not given.
+    """
+    day_slots = {}
+    for i in range(days):
+        day = start_date + timedelta(days=i)
+        day_slots[day] = [s['time'] for s in get_all_slot_times(day)]
+    if not any(day_slots.values()):
+        return {day: {} for day in day_slots}
+
+    resources = active_resources()
+    date_range = {'preferred_date__gte': start_date, 'preferred_date__lt': start_date + timedelta(days=days)}
+    counts = merge_counts(booking_counts(**date_range), held_counts(**date_range))
+    if exclude is not None and exclude.preferred_date in day_slots and exclude.slot_time:
+        slot_counts = counts.get((exclude.preferred_date, exclude.slot_time.strftime('%H:%M')), {})
+        if slot_counts.get(exclude.resource_id):
+            slot_counts[exclude.resource_id] -= 1
+    clinic_calendar = tenancy.calendar_id()
+    if busy is None:
+        busy = calendar_busy(start_date, days, resources)
+    result = {}
+    for day, slot_times in day_slots.items():
+        day_busy = {calendar_id: by_date.get(day, ()) for calendar_id, by_date in busy.items()}
+        result[day] = {}
+        for slot in slot_times:
+            busy_calendars = {calendar_id for calendar_id, slots in day_busy.items() if slot in slots}
+            if clinic_calendar and clinic_calendar in busy_calendars:
+                result[day][slot] = []
+            else:
+                result[day][slot] = free_resources(resources, counts.get((day, slot), {}), busy_calendars)
+    return result
+
+
+def has_place(free, resource_id=None):
+    """True if `free` (from availability_for_range) has room, on `resource_id` when given."""
+    if resource_id is None:
+        return bool(free)
+    return any(r is not None and r.pk == resource_id for r in free)
+
+
+def available_slots_for_range(start_date, days, resource_id=None):
+    """{date: [slot dicts]} of slots with a free place (on `resource_id` when given)."""
+    return {
+        day: [s for s in get_all_slot_times(day) if has_place(slots[s['time']], resource_id)]
+        for day, slots in availability_for_range(start_date, days).items()
+    }
+
+
+def allocate(date, slot_time, resource_id=None, exclude=None, busy=None):
+    """
+    Pick the resource for a booking: the requested one, or the first free one in booking order.
+    Returns (True, resource) – resource is None when no resources are configured – or (False, None)
+    if the slot is full. `exclude` is an appointment being moved (its own place counts as free).
+    Pass `busy` (calendar_busy(date), fetched beforehand) when called inside a transaction.
+    """
+    free = availability_for_range(date, 1, exclude, busy)[date].get(slot_time.strftime('%H:%M'), [])
+    if not has_place(free, resource_id):
+        return False, None
+    if resource_id is None:
+        return True, free[0]
+    return True, next(r for r in free if r is not None and r.pk == resource_id)
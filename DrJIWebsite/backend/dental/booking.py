@@ -0,0 +1,103 @@
+"""
+Patient-managed bookings: cancel and reschedule.
+
+A booking can be changed by its customer (signed in), by staff of its clinic, or by anyone holding
+its manage token (returned when the appointment is created; signed, so it needs no table).
+
+Both operations run in one transaction that starts with a write, so on SQLite the write lock is
+taken before the capacity check and two moves into the last place of a slot cannot both succeed
+(a reschedule first takes the clinic lock, availability.lock_capacity, like new bookings and holds;
+select_for_update re-reads the appointment on PostgreSQL). The old place is freed and the new one
+claimed together. The Google Calendar busy slots of the new date are fetched before the transaction,
+so no API call is made while the lock is held; the stored event is patched or deleted by id after
+commit – one API call, no calendar search.
+"""
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import archive, availability, calendar_service, tenancy
+from .models import Appointment, SlotHold
+
+TOKEN_SALT = 'dental.appointment-manage'
+SLOT_TAKEN = 'This slot is no longer available. Please choose another.'
+
+
+def manage_token(appointment):
+    return signing.dumps({'a': appointment.pk}, salt=TOKEN_SALT)
+
+
+def can_manage(request, appointment, token=None):
+    user = request.user
+    if user.is_authenticated and appointment.customer_id == user.pk:
+        return True
+    if tenancy.is_clinic_staff(user, appointment.clinic_id):
+        return True
+    if not token:
+        return False
+    try:
+        return signing.loads(token, salt=TOKEN_SALT).get('a') == appointment.pk
+    except signing.BadSignature:
+        return False
+
+
+def is_past(appointment):
+    return appointment.preferred_date is not None and appointment.preferred_date < timezone.localdate()
+
+
+def period_of(slot_time):
+    """The Appointment.PREFERRED_TIME_WINDOWS period containing `slot_time`, or '' (no preference)."""
+    for period, (start, end) in Appointment.PREFERRED_TIME_WINDOWS.items():
+        if start <= slot_time < end:
+            return period
+    return ''
+
+
+def _lock(appointment):
+    """Re-read the row for update, taking the write lock first (see module docstring)."""
+    Appointment.objects.filter(pk=appointment.pk).update(updated_at=timezone.now())
+    return Appointment.objects.select_for_update().select_related('resource').get(pk=appointment.pk)
+
+
+def cancel(appointment):
+    """Cancel: move the booking to the archive (freeing its slot) and delete its calendar event."""
+    with transaction.atomic():
+        locked = _lock(appointment)
+        archive.archive_cancelled(locked)
+        event_id = locked.calendar_event_id
+        transaction.on_commit(lambda: calendar_service.delete_calendar_event(event_id))
+
+
+def reschedule(appointment, preferred_date, slot_time, resource=None, hold=None):
+    """
+    Move the booking to another slot: consume a matching hold, or claim a free place (the booking's
+    current place counts as free). preferred_time follows the new slot. Raises
+    serializers.ValidationError if the slot is taken.
+    """
+    busy = availability.calendar_busy(preferred_date)
+    with transaction.atomic():
+        availability.lock_capacity()
+        locked = _lock(appointment)
+        hold = SlotHold.lookup(hold)
+        if (
+            hold is not None
+            and (hold.preferred_date, hold.slot_time) == (preferred_date, slot_time)
+            and (resource is None or resource.pk == hold.resource_id)
+        ):
+            if not SlotHold.objects.filter(pk=hold.pk).delete()[0]:
+                raise serializers.ValidationError({'slot_time': [SLOT_TAKEN]})
+            resource = hold.resource
+        else:
+            available, resource = availability.allocate(
+                preferred_date, slot_time, resource.pk if resource else None, exclude=locked, busy=busy,
+            )
+            if not available:
+                raise serializers.ValidationError({'slot_time': [SLOT_TAKEN]})
+        locked.preferred_date = preferred_date
+        locked.slot_time = slot_time
+        locked.resource = resource
+        locked.preferred_time = period_of(slot_time)
+        locked.save(update_fields=['preferred_date', 'slot_time', 'preferred_time', 'resource', 'updated_at'])
+        transaction.on_commit(lambda: calendar_service.update_calendar_event(locked))
+    return locked
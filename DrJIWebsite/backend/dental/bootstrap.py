@@ -0,0 +1,140 @@
+"""
+First-page-load payload: dentist profile, active services and the next few days of free slots.
+
+GET /api/bootstrap/ replaces the separate dentists, services and available-slots requests. The
+availability lookup (bookings, holds and the Google Calendar call, which dominates) runs in a
+worker thread while the catalogue is serialized on the request thread. The assembled payload is
+cached for BOOTSTRAP_CACHE_SECONDS and carries one ETag over all three parts, so a client
+revalidating an unchanged page gets a 304. Free slots can go stale by at most the cache time;
+booking re-checks capacity anyway.
+
+Cache keys carry a per-clinic availability version. It is bumped after commit whenever an
+appointment or slot hold dated within the payload's range is created or deleted, and whenever an
+appointment's slot is changed (its old date is not known, so a move from a date in range to one
+beyond it counts too): bookings, cancellations, reschedules and holds (see DentalConfig.ready),
+plus bulk imports. A taken slot
+therefore never shows as free because of the cache. Calendar events and schedule edits are still
+bounded by BOOTSTRAP_CACHE_SECONDS.
+
+The compact JSON payload is kept under BOOTSTRAP_MAX_BYTES by dropping the latest availability days;
+`availability_truncated` tells the client to fetch further days from available-slots.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import tenancy
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'dental:bootstrap:'
+VERSION_KEY = 'dental:bootstrap:availability'
+MAX_DAYS = 14
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='bootstrap')
+
+
+def _free_slots(start, days):
+    """[{"date", "slots"}] of free slots, skipping today's slots that have already started."""
+    from . import availability
+
+    try:
+        by_day = availability.available_slots_for_range(start, days)
+    finally:
+        connections.close_all()  # worker threads are long-lived; do not keep connections open
+    now = timezone.localtime()
+    return [
+        {
+            'date': day.isoformat(),
+            'slots': [s for s in slots if day != now.date() or s['time'] > now.strftime('%H:%M')],
+        }
+        for day, slots in by_day.items()
+    ]
+
+
+def _encode(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), sort_keys=True).encode()
+
+
+def _fit(payload, budget):
+    """Drop trailing availability days until the encoded payload fits `budget` bytes. Returns its size."""
+    size = len(_encode(payload))
+    while size > budget and payload['availability']:
+        payload['availability'].pop()
+        payload['availability_truncated'] = True
+        size = len(_encode(payload))
+    return size
+
+
+def build(request, days):
+    """Assemble the payload; the availability lookup runs alongside the catalogue queries."""
+    # Imported here: this module is loaded at startup for its signal handlers (DentalConfig.ready)
+    from .models import Dentist, Service
+    from .serializers import DentistSerializer, ServiceSerializer
+
+    start = timezone.localdate()
+    # copy_context carries request-scoped state (e.g. the read-replica pin) into the worker
+    future = _executor.submit(contextvars.copy_context().run, _free_slots, start, days)
+    dentist = Dentist.objects.first()
+    payload = {
+        'dentist': DentistSerializer(dentist, context={'request': request}).data if dentist else None,
+        'services': ServiceSerializer(Service.objects.filter(is_active=True), many=True).data,
+        'availability': future.result(),
+        'availability_truncated': False,
+    }
+    budget = getattr(settings, 'BOOTSTRAP_MAX_BYTES', 65536)
+    size = _fit(payload, budget)
+    if payload['availability_truncated']:
+        logger.warning('Bootstrap payload over %d bytes; availability cut to %d day(s)', budget, len(payload['availability']))
+    if size > budget:
+        logger.warning('Bootstrap payload is %d bytes without availability (budget %d)', size, budget)
+    return payload
+
+
+def get(request, days):
+    """(payload, etag) from the cache, building it on a miss. The ETag hashes the whole payload."""
+    version = cache.get(tenancy.cache_key(VERSION_KEY), 0)
+    key = tenancy.cache_key(f'{CACHE_PREFIX}{version}:{timezone.localdate()}:{days}:{request.build_absolute_uri("/")}')
+    cached = cache.get(key)
+    if cached is None:
+        payload = build(request, days)
+        cached = (payload, hashlib.md5(_encode(payload)).hexdigest())
+        cache.set(key, cached, getattr(settings, 'BOOTSTRAP_CACHE_SECONDS', 30))
+    return cached
+
+
+SLOT_FIELDS = {'preferred_date', 'slot_time', 'resource', 'resource_id'}
+
+
+def invalidate(sender=None, instance=None, created=None, update_fields=None, **kwargs):
+    """Signal handler (Appointment / SlotHold): drop the clinic's cached payloads after commit."""
+    if update_fields is not None and not SLOT_FIELDS & set(update_fields):
+        return  # the booking's slot did not change
+    day = getattr(instance, 'preferred_date', None)
+    today = timezone.localdate()
+    # An updated row may have been moved from a date in range: only new and deleted rows are range-checked
+    if created is not False and isinstance(day, date) and not today <= day < today + timedelta(days=MAX_DAYS):
+        return  # outside every payload's range (e.g. archiving past appointments)
+    clinic_id = getattr(instance, 'clinic_id', None)
+    transaction.on_commit(lambda: invalidate_clinic(clinic_id))
+
+
+def invalidate_clinic(clinic_id=None):
+    """Bump the availability version of `clinic_id` (the effective clinic when None)."""
+    with tenancy.activate(clinic_id or tenancy.effective()):
+        key = tenancy.cache_key(VERSION_KEY)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Time-based, so a version lost from the cache never matches an older payload
+            cache.set(key, time.time_ns(), None)
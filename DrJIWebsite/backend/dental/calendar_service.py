@@ -1,18 +1,23 @@
 """
 Google Calendar integration for appointment slots.
-- Reads busy periods so available-slots excludes times already blocked in Google Calendar.
+- Reads busy periods so available-slots excludes times already blocked in Google Calendar,
+  either live (freebusy) or from a local mirror kept current by `manage.py sync_calendar`.
 - Optionally creates a calendar event when an appointment is booked.
 
-Requires: GOOGLE_CALENDAR_ID and GOOGLE_APPLICATION_CREDENTIALS (path to service account JSON).
+Requires: GOOGLE_CALENDAR_ID and GOOGLE_APPLICATION_CREDENTIALS (path to service account JSON), or the
+current clinic's own calendar id / credentials file (see dental.tenancy).
 Share your Google Calendar with the service account email (e.g. xxx@yyy.iam.gserviceaccount.com)
 with "Make changes to events" or "See all event details" for read-only slots.
 """
 import logging
+import threading
 from datetime import datetime, time, timedelta
 
 from django.conf import settings
 from django.utils import timezone
 
+from . import tenancy
+
 logger = logging.getLogger(__name__)
 
 # Scopes: readonly for freebusy; events for creating events
@@ -20,112 +25,435 @@ SCOPES_READ = ['https://www.googleapis.com/auth/calendar.readonly']
 SCOPES_EVENTS = ['https://www.googleapis.com/auth/calendar.events']
 
 
+# API clients are reused for the life of the worker (one per thread: httplib2 is not thread-safe) and
+# credentials file, so google imports, credential loading and the OAuth token fetch happen once per
+# clinic, not per request.
+_clients = threading.local()
+
+
 def _get_calendar_service(scopes=None):
-    """Return Calendar API service or None if not configured."""
-    calendar_id = getattr(settings, 'GOOGLE_CALENDAR_ID', None) or ''
-    creds_path = getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', None)
+    """Return the current clinic's Calendar API service and calendar id, or (None, None) if not configured."""
+    calendar_id = tenancy.calendar_id()
+    creds_path = tenancy.credentials_path()
     if not calendar_id or not creds_path:
         return None, None
+    scopes = scopes or SCOPES_READ
+    key = (creds_path, tuple(scopes))
+    cache = getattr(_clients, 'services', None)
+    if cache is None:
+        cache = _clients.services = {}
+    if key in cache:
+        return cache[key][0], calendar_id
     try:
         from google.oauth2 import service_account
         from googleapiclient.discovery import build
         creds = service_account.Credentials.from_service_account_file(
             creds_path,
-            scopes=scopes or SCOPES_READ,
+            scopes=scopes,
         )
-        service = build('calendar', 'v3', credentials=creds)
+        service = build('calendar', 'v3', credentials=creds, cache_discovery=False)
+        cache[key] = (service, creds)
         return service, calendar_id
     except Exception as e:
         logger.warning('Google Calendar not available: %s', e)
         return None, None
 
 
-def get_busy_slot_times_for_date(date):
+def warm_up():
     """
-    Return a set of slot time strings (e.g. "09:00") that are busy on the given date
-    according to Google Calendar. Returns empty set if Calendar is not configured or on error.
+    Pre-initialise Calendar clients for this thread (imports, credentials, OAuth token) so the
+    first request does not pay for it. Returns True if Calendar is configured and ready.
     """
-    service, calendar_id = _get_calendar_service(SCOPES_READ)
-    if not service:
-        return set()
+    ready = False
+    for scopes in (SCOPES_READ, SCOPES_EVENTS):
+        service, _ = _get_calendar_service(scopes)
+        if service is None:
+            continue
+        _, creds = _clients.services[(tenancy.credentials_path(), tuple(scopes))]
+        try:
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+            ready = True
+        except Exception as e:
+            logger.warning('Google Calendar warm-up failed: %s', e)
+    return ready
+
 
-    start_h = getattr(settings, 'APPOINTMENT_SLOT_START_HOUR', 9)
-    end_h = getattr(settings, 'APPOINTMENT_SLOT_END_HOUR', 17)
-    duration = getattr(settings, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30)
+def _parse_api_datetime(value):
+    """Parse an RFC 3339 timestamp from the Calendar API into an aware datetime."""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = timezone.make_aware(dt, timezone.utc)
+    return dt
 
-    # Day range in local timezone
+
+def _day_bounds(date):
+    """Start and end of the given date in the local timezone."""
     tz = timezone.get_current_timezone()
     day_start = timezone.make_aware(datetime.combine(date, time(0, 0)), tz)
-    day_end = day_start + timedelta(days=1)
+    return day_start, day_start + timedelta(days=1)
 
-    time_min = day_start.isoformat()
-    time_max = day_end.isoformat()
 
-    try:
-        body = {
-            'timeMin': time_min,
-            'timeMax': time_max,
-            'items': [{'id': calendar_id}],
-        }
-        result = service.freebusy().query(body=body).execute()
-        busy_list = result.get('calendars', {}).get(calendar_id, {}).get('busy', [])
-    except Exception as e:
-        logger.exception('Google Calendar freebusy query failed: %s', e)
-        return set()
+def _busy_slots_from_periods(date, periods):
+    """Return the set of slot time strings on `date` that overlap any (start, end) busy period."""
+    from .schedule import get_rules
 
-    # Build set of our slot times that overlap any busy period
-    slot_times = []
-    t = time(start_h, 0)
-    end_t = time(end_h, 0)
-    while (t.hour, t.minute) < (end_t.hour, end_t.minute):
-        slot_times.append((t, t.strftime('%H:%M')))
-        t = (datetime.combine(date, t) + timedelta(minutes=duration)).time()
+    duration = tenancy.slot_duration()
+    tz = timezone.get_current_timezone()
+    periods = [(b_start.astimezone(tz), b_end.astimezone(tz)) for b_start, b_end in periods]
+    if not periods:
+        return set()
 
     busy_slots = set()
-    for slot_time, slot_str in slot_times:
+    for slot in get_rules().slot_times(date):
+        slot_time = datetime.strptime(slot['time'], '%H:%M').time()
         slot_start = timezone.make_aware(datetime.combine(date, slot_time), tz)
         slot_end = slot_start + timedelta(minutes=duration)
-        for b in busy_list:
-            b_start = datetime.fromisoformat(b['start'].replace('Z', '+00:00'))
-            b_end = datetime.fromisoformat(b['end'].replace('Z', '+00:00'))
-            if b_start.tzinfo is None:
-                b_start = timezone.make_aware(b_start, timezone.utc)
-            if b_end.tzinfo is None:
-                b_end = timezone.make_aware(b_end, timezone.utc)
-            b_start = b_start.astimezone(tz)
-            b_end = b_end.astimezone(tz)
+        for b_start, b_end in periods:
             if slot_start < b_end and slot_end > b_start:
-                busy_slots.add(slot_str)
+                busy_slots.add(slot['time'])
                 break
     return busy_slots
 
 
-def create_calendar_event(appointment):
+def get_busy_slot_times_for_date(date):
     """
-    Create a Google Calendar event for the appointment. No-op if Calendar not configured
-    or if appointment has no preferred_date/slot_time.
+    Return a set of slot time strings (e.g. "09:00") that are busy on the given date
+    according to Google Calendar. Returns empty set if Calendar is not configured or on error.
+    With GOOGLE_CALENDAR_BUSY_SOURCE = 'mirror' the local CalendarBusyPeriod table is read instead.
     """
-    if not appointment.preferred_date or not appointment.slot_time:
-        return
-    service, calendar_id = _get_calendar_service(SCOPES_EVENTS)
+    return get_busy_slot_times_for_range(date, 1).get(date, set())
+
+
+def get_busy_slot_times_for_range(start_date, days):
+    """
+    Busy slot times for `days` consecutive dates from `start_date`: {date: set of "HH:MM"}.
+    Costs one freebusy call (or one mirror query) for the whole range.
+    """
+    calendar_id = tenancy.calendar_id()
+    return get_busy_slot_times_by_calendar(start_date, days, [calendar_id]).get(calendar_id, {})
+
+
+def get_busy_slot_times_by_calendar(start_date, days, calendar_ids):
+    """
+    Busy slot times per calendar: {calendar_id: {date: set of "HH:MM"}} for every id in `calendar_ids`.
+    All calendars are read together: one freebusy call (up to 50 calendars each) or one mirror query.
+    """
+    from .schedule import get_rules
+
+    calendar_ids = [c for c in dict.fromkeys(calendar_ids) if c]
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    if not calendar_ids:
+        return {}
+    # Closed days (weekly schedule, holidays) never need a lookup; only the open span is queried
+    rules = get_rules()
+    open_dates = [d for d in dates if not rules.is_closed(d)]
+    if not open_dates:
+        periods = {}
+    else:
+        span = (open_dates[-1] - open_dates[0]).days + 1
+        if getattr(settings, 'GOOGLE_CALENDAR_BUSY_SOURCE', 'live') == 'mirror':
+            periods = _mirrored_busy_periods(open_dates[0], span, calendar_ids)
+        else:
+            periods = _live_busy_periods(open_dates[0], span, calendar_ids)
+    result = {}
+    for calendar_id in calendar_ids:
+        calendar_periods = periods.get(calendar_id)
+        if not calendar_periods:
+            result[calendar_id] = {d: set() for d in dates}
+        else:
+            result[calendar_id] = {d: _busy_slots_from_periods(d, calendar_periods) for d in dates}
+    return result
+
+
+# freebusy.query accepts at most 50 calendars per request
+FREEBUSY_MAX_CALENDARS = 50
+
+
+def _live_busy_periods(start_date, days, calendar_ids):
+    """{calendar_id: [(start, end), ...]} from the freebusy API; empty if not configured or on error."""
+    service, _ = _get_calendar_service(SCOPES_READ)
     if not service:
-        return
+        return {}
+    range_start = _day_bounds(start_date)[0]
+    range_end = _day_bounds(start_date + timedelta(days=days))[0]
+    periods = {}
+    for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+        chunk = calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]
+        try:
+            body = {
+                'timeMin': range_start.isoformat(),
+                'timeMax': range_end.isoformat(),
+                'items': [{'id': calendar_id} for calendar_id in chunk],
+            }
+            result = service.freebusy().query(body=body).execute()
+        except Exception as e:
+            logger.exception('Google Calendar freebusy query failed: %s', e)
+            continue
+        for calendar_id, info in result.get('calendars', {}).items():
+            if info.get('errors'):
+                logger.warning('Google Calendar freebusy error for %s: %s', calendar_id, info['errors'])
+            periods[calendar_id] = [
+                (_parse_api_datetime(b['start']), _parse_api_datetime(b['end'])) for b in info.get('busy', [])
+            ]
+    return periods
+
+
+def _mirrored_busy_periods(start_date, days, calendar_ids):
+    """Busy periods overlapping the range from the local mirror (one indexed query, no API call)."""
+    from .models import CalendarBusyPeriod
+    periods = {}
+    rows = CalendarBusyPeriod.objects.filter(
+        calendar_id__in=calendar_ids,
+        start__lt=_day_bounds(start_date + timedelta(days=days))[0],
+        end__gt=_day_bounds(start_date)[0],
+    ).values_list('calendar_id', 'start', 'end')
+    for calendar_id, start, end in rows:
+        periods.setdefault(calendar_id, []).append((start, end))
+    return periods
+
+
+def _is_sync_token_expired(exc):
+    """Calendar API answers 410 Gone when a sync token is no longer valid."""
+    return http_error_status(exc) == 410
+
+
+def _event_period(event):
+    """Return (start, end) for an event that blocks time, or None (cancelled, free or malformed)."""
+    if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+        return None
+    start, end = event.get('start') or {}, event.get('end') or {}
+    if 'dateTime' in start and 'dateTime' in end:
+        return _parse_api_datetime(start['dateTime']), _parse_api_datetime(end['dateTime'])
+    if 'date' in start and 'date' in end:
+        return (
+            _day_bounds(datetime.strptime(start['date'], '%Y-%m-%d').date())[0],
+            _day_bounds(datetime.strptime(end['date'], '%Y-%m-%d').date())[0],
+        )
+    return None
+
+
+def _list_event_pages(service, calendar_id, sync_token):
+    """Yield (items, next_sync_token) per events.list page; incremental when sync_token is set."""
+    page_token = None
+    while True:
+        params = {'calendarId': calendar_id, 'singleEvents': True, 'maxResults': 2500}
+        if sync_token:
+            params['syncToken'] = sync_token
+        else:
+            params['timeMin'] = timezone.now().isoformat()
+        if page_token:
+            params['pageToken'] = page_token
+        result = service.events().list(**params).execute()
+        yield result.get('items', []), result.get('nextSyncToken')
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _apply_sync(service, calendar_id, state, sync_token):
+    from django.db import transaction
+    from .models import CalendarBusyPeriod
+
+    stats = {'full': not sync_token, 'upserted': 0, 'deleted': 0}
+    mirror = CalendarBusyPeriod.objects.filter(calendar_id=calendar_id)
+    with transaction.atomic():
+        if not sync_token:
+            stats['deleted'] += mirror.delete()[0]
+        next_token = ''
+        for items, page_sync_token in _list_event_pages(service, calendar_id, sync_token):
+            busy, removed = [], []
+            for event in items:
+                period = _event_period(event)
+                if period is None:
+                    removed.append(event['id'])
+                else:
+                    busy.append(CalendarBusyPeriod(
+                        calendar_id=calendar_id, event_id=event['id'], start=period[0], end=period[1],
+                    ))
+            if removed and sync_token:
+                stats['deleted'] += mirror.filter(event_id__in=removed).delete()[0]
+            if busy:
+                CalendarBusyPeriod.objects.bulk_create(
+                    busy,
+                    update_conflicts=True,
+                    unique_fields=['calendar_id', 'event_id'],
+                    update_fields=['start', 'end', 'synced_at'],
+                )
+                stats['upserted'] += len(busy)
+            next_token = page_sync_token or next_token
+        # Past periods are never queried for availability
+        stats['deleted'] += mirror.filter(end__lt=timezone.now()).delete()[0]
+        now = timezone.now()
+        state.sync_token = next_token
+        state.last_synced_at = now
+        if not sync_token:
+            state.last_full_sync_at = now
+        state.save()
+    return stats
+
+
+def sync_busy_periods(service=None, calendar_id=None, full=False):
+    """
+    Mirror busy periods into CalendarBusyPeriod using events.list sync tokens.
+    The first run (or full=True, or an expired token) does a full sync; later runs fetch only changes.
+    Returns {'full': bool, 'upserted': n, 'deleted': n}, or None if Calendar is not configured.
+    `calendar_id` defaults to the current clinic's calendar; `service` may be passed explicitly (e.g. a fake API client).
+    """
+    from .models import CalendarSyncState
+
+    if service is None:
+        service, default_calendar_id = _get_calendar_service(SCOPES_READ)
+        if not service:
+            return None
+        calendar_id = calendar_id or default_calendar_id
+    state, _ = CalendarSyncState.objects.get_or_create(calendar_id=calendar_id)
+    sync_token = '' if full else state.sync_token
+    try:
+        return _apply_sync(service, calendar_id, state, sync_token)
+    except Exception as e:
+        if not sync_token or not _is_sync_token_expired(e):
+            raise
+        logger.info('Calendar sync token expired for %s; running full sync.', calendar_id)
+        # Forget the dead token first, so a failed resync is retried as a full sync next time
+        state.sync_token = ''
+        state.save(update_fields=['sync_token'])
+        return _apply_sync(service, calendar_id, state, '')
+
+
+def event_summary(appointment):
+    """Calendar event title for an appointment."""
+    return f"Appointment: {appointment.name} – {appointment.get_service_display()}"
+
+
+def event_description(appointment):
+    """Calendar event description for an appointment."""
+    description = f"Patient: {appointment.name}\nEmail: {appointment.email}\nPhone: {appointment.phone}\nService: {appointment.get_service_display()}\nMessage: {appointment.message or '—'}"
+    if appointment.resource_id:
+        description += f"\nResource: {appointment.resource.name}"
+    return description
+
+
+def appointment_event_body(appointment):
+    """Calendar event resource for an appointment (tagged with its id for reconciliation)."""
     tz = timezone.get_current_timezone()
     start_dt = timezone.make_aware(
         datetime.combine(appointment.preferred_date, appointment.slot_time),
         tz,
     )
-    duration = getattr(settings, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30)
+    duration = tenancy.slot_duration()
     end_dt = start_dt + timedelta(minutes=duration)
-    title = f"Appointment: {appointment.name} – {appointment.get_service_display()}"
-    body = {
-        'summary': title,
-        'description': f"Patient: {appointment.name}\nEmail: {appointment.email}\nPhone: {appointment.phone}\nService: {appointment.get_service_display()}\nMessage: {appointment.message or '—'}",
+    return {
+        'summary': event_summary(appointment),
+        'description': event_description(appointment),
         'start': {'dateTime': start_dt.isoformat(), 'timeZone': str(tz)},
         'end': {'dateTime': end_dt.isoformat(), 'timeZone': str(tz)},
+        'extendedProperties': {'private': {'appointment_id': str(appointment.pk)}},
+        # Bookings are counted from the database; a transparent event does not show up in
+        # freebusy, so one booking does not block the whole clinic calendar for other chairs.
+        'transparency': 'transparent',
     }
+
+
+def event_matches(event, body):
+    """True if an existing calendar event already has the content and times of `body`."""
+    if event.get('summary', '') != body['summary'] or event.get('description', '') != body['description']:
+        return False
+    if event.get('transparency', 'opaque') != body.get('transparency', 'opaque'):
+        return False
+    try:
+        return all(
+            _parse_api_datetime(event[key]['dateTime']) == _parse_api_datetime(body[key]['dateTime'])
+            for key in ('start', 'end')
+        )
+    except (KeyError, ValueError):
+        return False
+
+
+def http_error_status(exc):
+    """HTTP status of a googleapiclient HttpError (None for other exceptions)."""
+    return getattr(getattr(exc, 'resp', None), 'status', None)
+
+
+def execute_batched(service, requests, batch_size=50):
+    """
+    Execute (key, request) pairs using Google batch HTTP requests of up to `batch_size` calls.
+    Returns {key: (response, exception)}.
+    """
+    results = {}
+
+    def callback(request_id, response, exception):
+        results[request_id] = (response, exception)
+
+    requests = list(requests)
+    for i in range(0, len(requests), batch_size):
+        batch = service.new_batch_http_request(callback=callback)
+        for key, request in requests[i:i + batch_size]:
+            batch.add(request, request_id=key)
+        batch.execute()
+    return results
+
+
+def create_calendar_event(appointment):
+    """
+    Create a Google Calendar event for the appointment and store its id on
+    appointment.calendar_event_id. No-op if Calendar not configured
+    or if appointment has no preferred_date/slot_time.
+    """
+    if not appointment.preferred_date or not appointment.slot_time:
+        return
+    service, calendar_id = _get_calendar_service(SCOPES_EVENTS)
+    if not service:
+        return
+    body = appointment_event_body(appointment)
     try:
-        service.events().insert(calendarId=calendar_id, body=body).execute()
+        event = service.events().insert(calendarId=calendar_id, body=body).execute()
+        appointment.calendar_event_id = event.get('id', '')
+        # update() keeps updated_at (and the .ics feed ETag) unchanged
+        from .models import Appointment
+        Appointment.objects.filter(pk=appointment.pk).update(calendar_event_id=appointment.calendar_event_id)
         logger.info('Created Google Calendar event for appointment id=%s', appointment.id)
     except Exception as e:
         logger.exception('Failed to create Google Calendar event: %s', e)
+
+
+def update_calendar_event(appointment):
+    """
+    Move/refresh the appointment's stored event with one PATCH by id (no calendar search).
+    Creates the event instead if the appointment has none or it was deleted in Google Calendar.
+    """
+    if not appointment.calendar_event_id:
+        create_calendar_event(appointment)
+        return
+    if not appointment.preferred_date or not appointment.slot_time:
+        return
+    service, calendar_id = _get_calendar_service(SCOPES_EVENTS)
+    if not service:
+        return
+    try:
+        service.events().patch(
+            calendarId=calendar_id,
+            eventId=appointment.calendar_event_id,
+            body=appointment_event_body(appointment),
+        ).execute()
+        logger.info('Updated Google Calendar event for appointment id=%s', appointment.id)
+    except Exception as e:
+        if http_error_status(e) in (404, 410):
+            create_calendar_event(appointment)
+        else:
+            logger.exception('Failed to update Google Calendar event: %s', e)
+
+
+def delete_calendar_event(event_id):
+    """Delete an event by id (one API call). An event that is already gone counts as deleted."""
+    if not event_id:
+        return
+    service, calendar_id = _get_calendar_service(SCOPES_EVENTS)
+    if not service:
+        return
+    try:
+        service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        logger.info('Deleted Google Calendar event %s', event_id)
+    except Exception as e:
+        if http_error_status(e) not in (404, 410):
+            logger.exception('Failed to delete Google Calendar event: %s', e)
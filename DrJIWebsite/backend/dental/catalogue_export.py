@@ -0,0 +1,210 @@
+"""
+Static export of the public catalogue, for serving from a CDN next to the frontend.
+
+Each clinic is exported to CATALOGUE_EXPORT_DIR/<clinic slug>/:
+
+    services.json           GET /api/services/
+    services/<slug>.json    GET /api/services/<slug>/
+    dentists.json           GET /api/dentists/
+    manifest.json           {"clinic", "generated_at", "files": {name: {"source", "bytes", "sha256", "encodings"}}}
+
+The documents are rendered by the API viewsets and renderer themselves, so each file is byte for byte
+the response body. Each file gets precompressed .gz / .br siblings (config.staticfiles), for servers
+that serve those directly. Absolute URLs (dentist photos) use CATALOGUE_EXPORT_BASE_URL.
+
+A file is rewritten, and recompressed, only when its SHA-256 differs from the manifest. Documents that
+are no longer produced (deactivated or renamed services) are removed. Every write goes to a temporary
+file that is renamed into place, so a sync to the CDN never picks up a half-written file.
+
+`manage.py export_catalogue` writes the full export (e.g. before a frontend build). With
+CATALOGUE_EXPORT_DIR set, saving or deleting a Service or Dentist also re-exports that clinic's
+services or dentists once the transaction commits (`schedule`). For a new dentist photo this waits
+until the image variants are stored (Dentist.refresh_image_variants, backfill_image_variants).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.staticfiles import compressed_variants
+
+from . import tenancy
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+GROUPS = ('services', 'dentists')
+ENCODINGS = ('.gz', '.br')
+
+_lock = threading.Lock()  # one manifest read-modify-write at a time per process
+
+
+@dataclass
+class Result:
+    """File names (relative to the clinic directory) written, left as they were, and removed."""
+    written: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+
+
+def export_dir():
+    value = getattr(settings, 'CATALOGUE_EXPORT_DIR', '')
+    return Path(value) if value else None
+
+
+def _group(name):
+    return name.split('/')[0].split('.')[0]
+
+
+def _views():
+    from .views import DentistViewSet, ServiceViewSet
+
+    return {
+        'services': ServiceViewSet.as_view({'get': 'list'}),
+        'service': ServiceViewSet.as_view({'get': 'retrieve'}),
+        'dentists': DentistViewSet.as_view({'get': 'list'}),
+    }
+
+
+def _render(view, path, base_url, **kwargs):
+    """Response body of GET `path` as the API sends it (JSON renderer, no middleware)."""
+    # Imported here: this module is loaded at startup (DentalConfig.ready) and django.test is not
+    from django.test import RequestFactory
+
+    url = urlsplit(base_url or getattr(settings, 'CATALOGUE_EXPORT_BASE_URL', 'http://localhost:8000'))
+    request = RequestFactory().get(
+        path, HTTP_HOST=url.netloc, HTTP_ACCEPT='application/json', secure=url.scheme == 'https',
+    )
+    response = view(request, **kwargs)
+    response.render()
+    if response.status_code != 200:
+        raise RuntimeError(f'GET {path} returned {response.status_code}')
+    return response.content
+
+
+def documents(groups=GROUPS, base_url=None):
+    """{file name: (API path, body)} for the bound clinic, limited to `groups`."""
+    from .models import Service
+
+    views = _views()
+    docs = {}
+    if 'services' in groups:
+        docs['services.json'] = ('/api/services/', _render(views['services'], '/api/services/', base_url))
+        for slug in Service.objects.filter(is_active=True).values_list('slug', flat=True):
+            path = f'/api/services/{slug}/'
+            docs[f'services/{slug}.json'] = (path, _render(views['service'], path, base_url, slug=slug))
+    if 'dentists' in groups:
+        docs['dentists.json'] = ('/api/dentists/', _render(views['dentists'], '/api/dentists/', base_url))
+    return docs
+
+
+def _write(path, data):
+    """Atomically replace `path` with `data`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _remove(path):
+    for candidate in [path] + [path.with_name(path.name + suffix) for suffix in ENCODINGS]:
+        if candidate.exists():
+            candidate.unlink()
+
+
+def _load_manifest(root):
+    try:
+        return json.loads((root / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {'files': {}}
+
+
+def export(directory, tenant, groups=GROUPS, base_url=None):
+    """Export `groups` of `tenant`'s catalogue under directory/<slug>/; returns a Result."""
+    root = Path(directory) / tenant.slug
+    result = Result()
+    with tenancy.activate(tenant):
+        docs = documents(groups, base_url)
+    with _lock:
+        manifest = _load_manifest(root)
+        files = manifest.get('files', {})
+        for name in sorted(set(files) - set(docs)):
+            if _group(name) in groups:
+                _remove(root / name)
+                del files[name]
+                result.removed.append(name)
+        for name, (source, body) in sorted(docs.items()):
+            digest = hashlib.sha256(body).hexdigest()
+            path = root / name
+            if files.get(name, {}).get('sha256') == digest and path.exists():
+                result.unchanged.append(name)
+                continue
+            _write(path, body)
+            variants = dict(compressed_variants(body))
+            for suffix in ENCODINGS:
+                sibling = path.with_name(path.name + suffix)
+                if suffix in variants:
+                    _write(sibling, variants[suffix])
+                elif sibling.exists():
+                    sibling.unlink()
+            files[name] = {
+                'source': source,
+                'bytes': len(body),
+                'sha256': digest,
+                'encodings': [suffix.lstrip('.') for suffix in ENCODINGS if suffix in variants],
+            }
+            result.written.append(name)
+        if result.written or result.removed or not (root / MANIFEST).exists():
+            manifest = {'clinic': tenant.slug, 'generated_at': timezone.now().isoformat(), 'files': dict(sorted(files.items()))}
+            _write(root / MANIFEST, json.dumps(manifest, indent=2).encode())
+    return result
+
+
+def _run(clinic_id, group):
+    directory = export_dir()
+    tenant = tenancy.registry().by_id.get(clinic_id)
+    if directory is None or tenant is None:
+        return
+    try:
+        result = export(directory, tenant, (group,))
+    except Exception:
+        # The save itself succeeded; a failed export is retried by the next save or export_catalogue
+        logger.exception('Catalogue export of %s for clinic %s failed', group, tenant.slug)
+        return
+    if result.written or result.removed:
+        logger.info('Catalogue export (%s, %s): wrote %s, removed %s', tenant.slug, group, result.written, result.removed)
+
+
+def schedule(sender, instance, **kwargs):
+    """Signal handler (Service / Dentist saved or deleted): re-export its group once the transaction commits."""
+    if kwargs.get('raw'):
+        return
+    if sender._meta.model_name == 'dentist':
+        # A new photo's variants are written after post_save; refresh_image_variants exports then
+        if 'created' in kwargs and instance.variants_outdated():
+            return
+        schedule_for(instance.clinic_id, 'dentists')
+    else:
+        schedule_for(instance.clinic_id, 'services')
+
+
+def schedule_for(clinic_id, group):
+    """Re-export `group` of a clinic once the current transaction commits (now in autocommit)."""
+    if export_dir() is None:
+        return
+    transaction.on_commit(lambda: _run(clinic_id, group))
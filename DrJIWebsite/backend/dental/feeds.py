@@ -0,0 +1,112 @@
+"""
+Staff-only iCalendar feed of upcoming appointments.
+
+Calendar clients subscribe to /api/appointments/feed/<token>.ics, where token is a signed staff
+user id (see feed_token / `manage.py calendar_feed_url`). The feed shows the clinic the request is
+bound to, and only to that clinic's staff (Clinic.staff) or a superuser. Each poll costs one aggregate query to
+compute the ETag; unchanged feeds answer 304. When something changed, only appointments whose
+updated_at moved are re-rendered; the rest come from the per-event cache.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from . import calendar_service, ics, tenancy
+from .models import Appointment
+
+TOKEN_SALT = 'dental.calendar-feed'
+FEED_CACHE_PREFIX = 'dental:ics-feed:'
+EVENT_CACHE_PREFIX = 'dental:ics-event:'
+
+
+def feed_token(user):
+    """Return the URL-safe feed token for a staff user."""
+    return signing.dumps({'u': user.pk}, salt=TOKEN_SALT)
+
+
+def user_for_token(token):
+    """Return the active staff user of the current clinic for a feed token, or None if invalid/revoked."""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    User = get_user_model()
+    user = User.objects.filter(pk=payload.get('u'), is_active=True, is_staff=True).first()
+    return user if tenancy.is_clinic_staff(user) else None
+
+
+def upcoming_appointments():
+    return Appointment.objects.filter(
+        preferred_date__gte=timezone.localdate(),
+        slot_time__isnull=False,
+    )
+
+
+def feed_etag():
+    """ETag from today's date, number of upcoming bookings and their latest change (one query)."""
+    agg = upcoming_appointments().aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = agg['latest'].isoformat() if agg['latest'] else ''
+    tenant = tenancy.effective()
+    raw = f"{tenant.id if tenant else ''}:{timezone.localdate()}:{agg['count']}:{latest}:{tenancy.slot_duration()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _event_cache_key(appointment):
+    return tenancy.cache_key(f'{EVENT_CACHE_PREFIX}{appointment.pk}:{appointment.updated_at.timestamp()}')
+
+
+def _render_appointment(appointment, duration):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(appointment.preferred_date, appointment.slot_time), tz)
+    return ics.render_event(
+        uid=f'appointment-{appointment.pk}@drjidental',
+        start=start,
+        end=start + timedelta(minutes=duration),
+        summary=calendar_service.event_summary(appointment),
+        description=calendar_service.event_description(appointment),
+        stamp=appointment.updated_at,
+    )
+
+
+def build_feed():
+    """Render the full calendar, re-rendering only events not already in the per-event cache."""
+    duration = tenancy.slot_duration()
+    timeout = getattr(settings, 'CALENDAR_FEED_CACHE_SECONDS', 3600)
+    appointments = list(
+        upcoming_appointments()
+        .select_related('resource')
+        .only(
+            'id', 'name', 'email', 'phone', 'service', 'message', 'preferred_date', 'slot_time', 'updated_at',
+            'resource__name',
+        )
+        .order_by('preferred_date', 'slot_time')
+    )
+    keys = [_event_cache_key(a) for a in appointments]
+    cached = cache.get_many(keys)
+    rendered = {}
+    parts = [ics.calendar_header('Dr. JI Dental – Appointments')]
+    for key, appointment in zip(keys, appointments):
+        block = cached.get(key)
+        if block is None:
+            block = rendered[key] = _render_appointment(appointment, duration)
+        parts.append(block)
+    parts.append(ics.CALENDAR_FOOTER)
+    if rendered:
+        cache.set_many(rendered, timeout)
+    return ''.join(parts)
+
+
+def get_feed(etag):
+    """Return the feed body for the given ETag, building and caching it on a miss."""
+    key = tenancy.cache_key(FEED_CACHE_PREFIX + etag)
+    body = cache.get(key)
+    if body is None:
+        body = build_feed()
+        cache.set(key, body, getattr(settings, 'CALENDAR_FEED_CACHE_SECONDS', 3600))
+    return body
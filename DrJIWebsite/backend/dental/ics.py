@@ -0,0 +1,145 @@
+"""
+Minimal iCalendar (RFC 5545) helpers for appointment import/export.
+Only the properties the clinic needs are handled, so no extra dependency is required.
+"""
+from datetime import datetime
+
+from django.utils import timezone
+
+
+def unfold_lines(lines):
+    """Yield logical content lines, joining folded continuation lines (leading space/tab)."""
+    current = None
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_property(line):
+    """Split 'NAME;PARAM=X:value' into (NAME, {PARAM: X}, value)."""
+    head, _, value = line.partition(':')
+    name, *raw_params = head.split(';')
+    params = {}
+    for p in raw_params:
+        key, _, val = p.partition('=')
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+def unescape_text(value):
+    """Undo RFC 5545 TEXT escaping."""
+    return (
+        value.replace('\\n', '\n').replace('\\N', '\n')
+        .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+    )
+
+
+def iter_events(lines):
+    """
+    Stream VEVENT components from an iterable of lines.
+    Yields (line_number, {NAME: (params, value)}) for each event; line_number is where it begins.
+    """
+    event = None
+    start_line = 0
+    for number, line in enumerate(unfold_lines(lines), start=1):
+        if not line:
+            continue
+        name, params, value = parse_property(line)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {}
+            start_line = number
+        elif name == 'END' and value.upper() == 'VEVENT':
+            if event is not None:
+                yield start_line, event
+            event = None
+        elif event is not None and name not in event:
+            event[name] = (params, value)
+
+
+def parse_datetime(value, params=None):
+    """
+    Parse a DATE or DATE-TIME value. Returns a date for all-day values, otherwise a datetime
+    in the current Django timezone (UTC 'Z' and TZID values are converted; floating times are local).
+    """
+    params = params or {}
+    value = value.strip()
+    if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d').date()
+    tz = timezone.get_current_timezone()
+    if value.endswith('Z'):
+        dt = datetime.strptime(value[:-1], '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc)
+        return dt.astimezone(tz)
+    dt = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    if params.get('TZID'):
+        from zoneinfo import ZoneInfo
+        return dt.replace(tzinfo=ZoneInfo(params['TZID'])).astimezone(tz)
+    return timezone.make_aware(dt, tz)
+
+
+
+def escape_text(value):
+    """Apply RFC 5545 TEXT escaping."""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Fold a content line to 75 octets per RFC 5545 (continuations start with a space)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Do not split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts)
+
+
+def format_utc(dt):
+    """Format an aware datetime as a UTC DATE-TIME value."""
+    return dt.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_event(uid, start, end, summary, description='', stamp=None):
+    """Render one VEVENT block (CRLF-terminated) for aware start/end datetimes."""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_utc(stamp or start)}',
+        f'DTSTART:{format_utc(start)}',
+        f'DTEND:{format_utc(end)}',
+        f'SUMMARY:{escape_text(summary)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape_text(description)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) + '\r\n' for line in lines)
+
+
+def calendar_header(name):
+    """Opening lines of a VCALENDAR stream."""
+    return (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Dr. JI Dental//Appointments//EN\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        f'{fold_line("X-WR-CALNAME:" + escape_text(name))}\r\n'
+    )
+
+
+CALENDAR_FOOTER = 'END:VCALENDAR\r\n'
@@ -0,0 +1,90 @@
+"""
+Responsive variants for uploaded images (Dentist photos).
+
+generate_variants() resizes the original to each width in settings.RESPONSIVE_IMAGE_WIDTHS and stores
+WebP and JPEG copies next to it (dentist/variants/...). It only touches storage, not the database, so it
+can run in worker processes (see `manage.py backfill_image_variants`).
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+def variant_widths():
+    return sorted(getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', (320, 640, 960, 1280)))
+
+
+def generate_variants(name):
+    """
+    Create resized WebP/JPEG variants of the stored image `name`.
+    Returns {'source': name, 'variants': [{'name', 'format', 'width', 'height'}, ...]}.
+    Widths larger than the original are replaced by the original width.
+    """
+    from PIL import Image, ImageOps
+
+    with default_storage.open(name, 'rb') as fh:
+        original = Image.open(fh)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    if original.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', original.size, (255, 255, 255))
+        rgba = original.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        original = background
+    elif original.mode == 'L':
+        original = original.convert('RGB')
+
+    widths = [w for w in variant_widths() if w < original.width]
+    if len(widths) < len(variant_widths()):
+        widths.append(original.width)  # cap at the original size instead of upscaling
+    stem = os.path.splitext(os.path.basename(name))[0]
+    folder = os.path.join(os.path.dirname(name), 'variants')
+
+    variants = []
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS) if width != original.width else original
+        for ext, pil_format, options in FORMATS:
+            buf = io.BytesIO()
+            resized.save(buf, pil_format, **options)
+            target = os.path.join(folder, f'{stem}-{width}w.{ext}').replace('\\', '/')
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            saved = default_storage.save(target, ContentFile(buf.getvalue()))
+            variants.append({'name': saved, 'format': ext, 'width': width, 'height': height})
+    return {'source': name, 'variants': variants}
+
+
+def delete_variants(data):
+    """Remove variant files recorded in an image_variants value."""
+    for variant in (data or {}).get('variants') or []:
+        try:
+            default_storage.delete(variant['name'])
+        except OSError:
+            pass
+
+
+def srcset_data(data, build_url=None):
+    """
+    srcset-ready structure for an image_variants value:
+    {'webp': {'srcset': 'url 320w, ...', 'sources': [{'url', 'width', 'height'}, ...]}, 'jpeg': {...}}
+    """
+    result = {}
+    for variant in (data or {}).get('variants') or []:
+        url = default_storage.url(variant['name'])
+        if build_url:
+            url = build_url(url)
+        entry = result.setdefault(variant['format'], {'srcset': '', 'sources': []})
+        entry['sources'].append({'url': url, 'width': variant['width'], 'height': variant['height']})
+    for entry in result.values():
+        entry['sources'].sort(key=lambda s: s['width'])
+        entry['srcset'] = ', '.join(f"{s['url']} {s['width']}w" for s in entry['sources'])
+    return result
@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dental import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move past appointments to the archive table in transactional batches. '
+        'Safe to interrupt: re-running continues where the last completed batch stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archive appointments dated before YYYY-MM-DD')
+        parser.add_argument('--days', type=int, help='Archive appointments older than DAYS (default ARCHIVE_APPOINTMENTS_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0, metavar='SECONDS', help='Pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many appointments would move')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f'Invalid date "{options["before"]}". Use YYYY-MM-DD.')
+        elif options['days'] is not None:
+            cutoff = timezone.localdate() - timedelta(days=options['days'])
+        else:
+            cutoff = archive.default_cutoff()
+        if cutoff > timezone.localdate():
+            raise CommandError('Cutoff is in the future; only past appointments can be archived.')
+
+        if options['dry_run']:
+            self.stdout.write(f'Would archive {archive.archivable(cutoff).count()} appointment(s) before {cutoff}.')
+            return
+
+        batch_size = max(1, options['batch_size'])
+        total = 0
+        started = time.perf_counter()
+        while True:
+            moved = archive.archive_batch(cutoff, batch_size)
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Archived {total} so far...')
+            if moved < batch_size:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} appointment(s) before {cutoff} in {time.perf_counter() - started:.1f}s.'
+        ))
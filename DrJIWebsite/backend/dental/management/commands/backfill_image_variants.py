@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from dental import catalogue_export
+from dental.images import delete_variants, generate_variants
+from dental.models import Dentist
+
+
+def _init_worker():
+    # Needed when workers are spawned rather than forked (Windows/macOS)
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image variants for existing dentist photos (in parallel worker processes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--force', action='store_true', help='Regenerate even if variants are up to date')
+
+    def handle(self, *args, **options):
+        dentists = [
+            d for d in Dentist.objects.exclude(image='').exclude(image__isnull=True).only('id', 'clinic_id', 'image', 'image_variants')
+            if options['force'] or (d.image_variants or {}).get('source') != d.image.name
+        ]
+        if not dentists:
+            self.stdout.write('All dentist images already have variants.')
+            return
+        by_id = {d.pk: d for d in dentists}
+        done = failed = 0
+        exported = set()
+        # Workers only read/write files; the database is updated here in the parent process
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=_init_worker) as pool:
+            futures = {pool.submit(generate_variants, d.image.name): d.pk for d in dentists}
+            for future in as_completed(futures):
+                dentist = by_id[futures[future]]
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Dentist {dentist.pk} ({dentist.image.name}): {e}')
+                    continue
+                stale = [v for v in (dentist.image_variants or {}).get('variants') or []
+                         if v['name'] not in {n['name'] for n in variants['variants']}]
+                delete_variants({'variants': stale})
+                Dentist.objects.filter(pk=dentist.pk).update(image_variants=variants)
+                exported.add(dentist.clinic_id)
+                done += 1
+        # .update() sends no signals: refresh the static catalogue export of the affected clinics
+        for clinic_id in sorted(exported):
+            catalogue_export.schedule_for(clinic_id, 'dentists')
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {done} image(s); {failed} failed.'))
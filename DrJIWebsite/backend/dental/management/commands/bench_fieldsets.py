@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from dental.models import Service
+
+CASES = [
+    ('services (all fields)', '/api/services/'),
+    ('services (card fields)', '/api/services/?fields=name,slug,short_description,icon'),
+    ('dentists (all fields)', '/api/dentists/'),
+    ('dentists (header)', '/api/dentists/?fields=name,title,image,image_srcset'),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare full vs ?fields= responses of the catalogue endpoints: bytes, columns selected and '
+        'request time (optionally with extra synthetic services, rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extra-services', type=int, default=0, help='Synthetic services to add first')
+        parser.add_argument('--repeat', type=int, default=50, help='Requests per case (median reported)')
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+                self.add_services(options['extra_services'])
+                client = Client()
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{"case":<24} {"status":>6} {"bytes":>9} {"columns":>8} {"median ms":>10}'
+                ))
+                for label, url in CASES:
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(url)
+                    sql = queries.captured_queries[-1]['sql'] if queries.captured_queries else ''
+                    columns = sql.split(' FROM ')[0].count(',') + 1 if sql else 0
+                    timings = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        client.get(url)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    self.stdout.write(
+                        f'{label:<24} {response.status_code:>6} {len(response.content):>9,} {columns:>8} '
+                        f'{statistics.median(timings):>10.2f}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def add_services(self, count):
+        body = 'Detailed treatment description with aftercare advice. ' * 40
+        benefits = '\n'.join(f'Benefit number {i}' for i in range(8))
+        Service.objects.bulk_create([
+            Service(
+                name=f'Bench service {i}', slug=f'bench-service-{i}', short_description='Short card text.',
+                description=body, benefits=benefits, experience_highlight='Highlight', icon='general', order=100 + i,
+            )
+            for i in range(count)
+        ])
@@ -0,0 +1,47 @@
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer, MessagePackRenderer
+from dental.models import Dentist, Service
+from dental.serializers import DentistSerializer, ServiceSerializer
+from dental.availability import get_all_slot_times
+
+
+def envelope(data, message):
+    return {'success': True, 'data': data, 'message': message}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark stdlib JSON vs orjson vs MessagePack rendering on catalogue and slots payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000, help='Renders per measurement')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        payloads = {
+            'services list': envelope(ServiceSerializer(Service.objects.filter(is_active=True), many=True).data, 'OK'),
+            'dentists list': envelope(DentistSerializer(Dentist.objects.all(), many=True).data, 'OK'),
+            'slots (1 day)': envelope(get_all_slot_times(), 'Available slots retrieved.'),
+            'slots (14 days)': envelope(
+                [{'date': today + timedelta(days=i), 'slots': get_all_slot_times()} for i in range(14)], 'OK',
+            ),
+            'mixed types': envelope(
+                [{'at': timezone.now(), 'day': today, 'fee': Decimal('49.90'), 'time': timezone.now().time()}] * 50, 'OK',
+            ),
+        }
+        renderers = [('json (stdlib)', JSONRenderer()), ('orjson', FastJSONRenderer()), ('msgpack', MessagePackRenderer())]
+        number = options['number']
+        for name, data in payloads.items():
+            baseline = JSONRenderer().render(data)
+            same = FastJSONRenderer().render(data) == baseline
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} (orjson output identical: {same})'))
+            for label, renderer in renderers:
+                size = len(renderer.render(data))
+                seconds = timeit.timeit(lambda: renderer.render(data), number=number)
+                self.stdout.write(f'  {label:<15} {size:>8,} bytes  {seconds / number * 1e6:>9.1f} µs/render')
@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from dental import search
+from dental.models import Appointment
+
+FIRST = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+         'Wei', 'Aisha', 'Carlos', 'Sofia', 'Hiroshi', 'Fatima', 'Ivan', 'Priya', 'Kwame', 'Chloe']
+LAST = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+        'Nguyen', 'Chen', 'Patel', 'Kim', 'Okafor', 'Schmidt', 'Rossi', 'Dubois', 'Kowalski', 'Haddad']
+WORDS = ['pain', 'sensitive', 'crown', 'filling', 'wisdom', 'tooth', 'bleeding', 'gums', 'checkup', 'braces',
+         'whitening', 'implant', 'broken', 'chipped', 'insurance', 'morning', 'nervous', 'child', 'swelling', 'night']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare appointment search: admin-style LIKE over name/email/phone/message vs the full-text '
+        'index (dental.search) on N synthetic rows, inside a rolled-back transaction'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query (median reported)')
+
+    def handle(self, *args, **options):
+        rows, repeat = max(1, options['rows']), max(1, options['repeat'])
+        rng = random.Random(42)
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                self.insert(rows, rng)
+                self.stdout.write(f'Inserted {rows} rows in {time.perf_counter() - start:.1f}s (backend: {search.backend()})')
+                probe = Appointment.objects.order_by('-pk').first()
+                queries = [
+                    ('surname', 'Okafor'),
+                    ('full name', 'Priya Haddad'),
+                    ('email prefix', probe.email.split('@')[0]),
+                    ('phone digits', probe.phone.replace('-', '')),
+                    ('phone last 4', probe.phone[-4:]),
+                    ('message words', 'chipped tooth'),
+                ]
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{"query":<14} {"matches":>8} {"LIKE page ms":>13} {"FTS page ms":>12} {"ranked top20 ms":>16}'
+                ))
+                for label, query in queries:
+                    like_qs = self.like_queryset(query)
+                    fts_qs = search.filter_queryset(Appointment.objects.all(), query)
+                    like_ms = self.time_it(lambda: list(like_qs.order_by('-created_at')[:100]), repeat)
+                    fts_ms = self.time_it(lambda: list(fts_qs.order_by('-created_at')[:100]), repeat)
+                    ranked_ms = self.time_it(lambda: search.search_appointments(query, 20), repeat)
+                    self.stdout.write(
+                        f'{label:<14} {fts_qs.count():>8} {like_ms:>13.1f} {fts_ms:>12.1f} {ranked_ms:>16.1f}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def insert(self, rows, rng, batch=5000):
+        first_day = date.today() - timedelta(days=3 * 365)
+        for offset in range(0, rows, batch):
+            objs = []
+            for i in range(offset, min(offset + batch, rows)):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                objs.append(Appointment(
+                    name=f'{first} {last}',
+                    email=f'{first.lower()}.{last.lower()}{i}@example.com',
+                    phone=f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+                    service='general',
+                    preferred_date=first_day + timedelta(days=i % 1000),
+                    message=' '.join(rng.sample(WORDS, 4)) if i % 3 else '',
+                ))
+            Appointment.objects.bulk_create(objs)
+
+    def like_queryset(self, query):
+        """What ModelAdmin.search_fields generates: every term in any column, LIKE '%term%'."""
+        condition = Q()
+        for term in query.split():
+            condition &= (
+                Q(name__icontains=term) | Q(email__icontains=term) | Q(phone__icontains=term) | Q(message__icontains=term)
+            )
+        return Appointment.objects.filter(condition)
+
+    def time_it(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,64 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from config.middleware import HASHED_NAME
+
+
+def brotli_size(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return len(brotli.compress(data, quality=11))
+
+
+class Command(BaseCommand):
+    help = 'Measure transfer sizes (raw / gzip / brotli) of admin static assets and the catalogue API'
+
+    def handle(self, *args, **options):
+        self.report_admin_static()
+        self.report_catalogue()
+
+    def row(self, label, raw, gz, br):
+        def pct(n):
+            return f'{n:>9,} ({100 - n * 100 // raw:>2}% saved)' if n is not None and raw else f'{"n/a":>21}'
+        self.stdout.write(f'{label:<40} {raw:>9,}  gzip {pct(gz)}  br {pct(br)}')
+
+    def report_admin_static(self):
+        root = os.path.join(str(settings.STATIC_ROOT), 'admin')
+        if not os.path.isdir(root):
+            self.stdout.write('Admin static: run `manage.py collectstatic` first.')
+            return
+        totals = {'raw': 0, 'gz': 0, 'br': 0}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                # Count each asset once, by the hashed name templates reference
+                if not HASHED_NAME.search(filename) or not filename.endswith(('.css', '.js', '.svg')):
+                    continue
+                path = os.path.join(dirpath, filename)
+                raw = os.path.getsize(path)
+                totals['raw'] += raw
+                # What StaticFilesMiddleware actually sends: the precompressed sibling if it exists
+                totals['gz'] += os.path.getsize(path + '.gz') if os.path.exists(path + '.gz') else raw
+                totals['br'] += os.path.getsize(path + '.br') if os.path.exists(path + '.br') else raw
+        self.stdout.write(self.style.MIGRATE_HEADING('Admin static (css/js/svg, as served)'))
+        self.row('admin/**', totals['raw'], totals['gz'], totals['br'])
+
+    def report_catalogue(self):
+        from dental.models import Service
+
+        client = Client()
+        paths = ['/api/services/', '/api/dentists/']
+        first = Service.objects.filter(is_active=True).values_list('slug', flat=True).first()
+        if first:
+            paths.append(f'/api/services/{first}/')
+        self.stdout.write(self.style.MIGRATE_HEADING('Catalogue API (JSON envelope)'))
+        for path in paths:
+            raw = client.get(path).content
+            response = client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+            gz = len(response.content) if response.get('Content-Encoding') == 'gzip' else len(gzip.compress(raw))
+            self.row(path, len(raw), gz, brotli_size(raw))
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from dental.feeds import feed_token
+
+
+class Command(BaseCommand):
+    help = 'Print the subscribable .ics appointments feed URL for a staff user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Public backend URL')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = User.objects.filter(username=options['username'], is_staff=True, is_active=True).first()
+        if not user:
+            raise CommandError('No active staff user with that username.')
+        if not user.is_superuser and not user.staffed_clinics.exists():
+            raise CommandError('The user is not staff of any clinic (add them under Clinic.staff in the admin).')
+        path = reverse('appointment_calendar_feed', kwargs={'token': feed_token(user)})
+        self.stdout.write(options['base_url'].rstrip('/') + path)
@@ -0,0 +1,65 @@
+import csv
+import sys
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dental import archive, tenancy
+from dental.management.commands.import_appointments import CSV_FIELDS
+
+EXTRA_FIELDS = ['is_confirmed', 'created_at', 'archived', 'cancelled_at']
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}". Use YYYY-MM-DD.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Export appointments (live and archived) as CSV in the import_appointments column format, '
+        'plus is_confirmed, created_at, archived and cancelled_at.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='CSV file to write (default: stdout)')
+        parser.add_argument('--email', help='Only this patient\'s appointments')
+        parser.add_argument('--start', help='First appointment date (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last appointment date inclusive (YYYY-MM-DD)')
+        parser.add_argument('--clinic', help='Only this clinic (slug); default: every clinic')
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['email']:
+            filters['email__iexact'] = options['email'].strip()
+        if options['start']:
+            filters['preferred_date__gte'] = parse_date(options['start'])
+        if options['end']:
+            filters['preferred_date__lte'] = parse_date(options['end'])
+        if options['clinic']:
+            try:
+                filters['clinic_id'] = tenancy.clinics(options['clinic'])[0].id
+            except LookupError as e:
+                raise CommandError(str(e))
+        appointments = archive.appointment_history(**filters)
+
+        fh = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            writer = csv.writer(fh)
+            writer.writerow(CSV_FIELDS + EXTRA_FIELDS)
+            for a in appointments:
+                writer.writerow([
+                    a.name, a.email, a.phone, a.service,
+                    a.preferred_date.isoformat() if a.preferred_date else '',
+                    a.slot_time.strftime('%H:%M') if a.slot_time else '',
+                    a.preferred_time, a.message,
+                    int(a.is_confirmed), a.created_at.isoformat(), int(a.is_archived),
+                    a.cancelled_at.isoformat() if a.cancelled_at else '',
+                ])
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Exported {len(appointments)} appointment(s) to {options["output"]}.'))
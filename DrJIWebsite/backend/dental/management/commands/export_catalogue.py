@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dental import catalogue_export, tenancy
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the public catalogue (services list, service details, dentists) as static JSON files with '
+        '.gz / .br siblings and a manifest, per clinic; unchanged files are left untouched'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='Export directory (default: CATALOGUE_EXPORT_DIR)')
+        parser.add_argument('--clinic', help='Only this clinic (slug); default: every clinic')
+        parser.add_argument('--base-url', help='Scheme and host for absolute URLs (default: CATALOGUE_EXPORT_BASE_URL)')
+
+    def handle(self, *args, **options):
+        directory = options['output'] or catalogue_export.export_dir()
+        if not directory:
+            raise CommandError('No export directory: pass --output or set CATALOGUE_EXPORT_DIR.')
+        try:
+            clinics = tenancy.clinics(options['clinic'])
+        except LookupError as e:
+            raise CommandError(str(e))
+        for tenant in clinics:
+            result = catalogue_export.export(directory, tenant, base_url=options['base_url'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{tenant.slug}: {len(result.written)} written, {len(result.unchanged)} unchanged, '
+                f'{len(result.removed)} removed'
+            ))
+            for name in result.written:
+                self.stdout.write(f'  + {name}')
+            for name in result.removed:
+                self.stdout.write(f'  - {name}')
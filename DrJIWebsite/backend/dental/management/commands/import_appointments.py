@@ -0,0 +1,196 @@
+"""
+Bulk import appointments from a CSV or ICS file (e.g. when migrating from another booking system).
+
+CSV columns: name, email, phone, service, preferred_date (YYYY-MM-DD), slot_time (HH:MM),
+preferred_time, message. `service` may be the key (e.g. "cleaning") or its display label.
+
+ICS: each VEVENT becomes one appointment. DTSTART gives date and slot; SUMMARY the patient name;
+DESCRIPTION lines "Email: ...", "Phone: ...", "Service: ...", "Message: ..." (the format written by
+calendar_service.create_calendar_event) fill the remaining fields; ATTENDEE mailto: is used as email fallback.
+
+Rows are validated in batches with AppointmentImportSerializer (same slot rules as booking),
+slot capacity is checked with one grouped query per batch (each booked row is assigned the first
+resource with a free place, as online booking does), and valid rows are inserted with bulk_create.
+Invalid rows are reported and skipped; the run continues.
+"""
+import csv
+import re
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from dental import availability, bootstrap, ics, tenancy
+from dental.models import Appointment
+from dental.serializers import AppointmentImportSerializer
+
+CSV_FIELDS = ['name', 'email', 'phone', 'service', 'preferred_date', 'slot_time', 'preferred_time', 'message']
+SERVICE_LOOKUP = {}
+for _key, _label in Appointment.SERVICE_CHOICES:
+    SERVICE_LOOKUP[_key.lower()] = _key
+    SERVICE_LOOKUP[_label.lower()] = _key
+DESCRIPTION_LINE = re.compile(r'^\s*(Patient|Email|Phone|Service|Message)\s*:\s*(.*)$', re.IGNORECASE)
+
+
+def normalise_service(value):
+    value = (value or '').strip()
+    return SERVICE_LOOKUP.get(value.lower(), value)
+
+
+def iter_csv_rows(fh):
+    """Yield (line_number, data) for each CSV row."""
+    reader = csv.DictReader(fh)
+    missing = {'name', 'email', 'phone', 'service'} - set(reader.fieldnames or [])
+    if missing:
+        raise CommandError(f'CSV is missing required column(s): {", ".join(sorted(missing))}')
+    for row in reader:
+        data = {k: (row.get(k) or '').strip() for k in CSV_FIELDS if k in row}
+        for key in ('preferred_date', 'slot_time'):
+            if data.get(key) == '':
+                data[key] = None
+        data['service'] = normalise_service(data.get('service'))
+        yield reader.line_num, data
+
+
+def iter_ics_rows(fh):
+    """Yield (line_number, data) for each VEVENT."""
+    for line_number, event in ics.iter_events(fh):
+        data = {'name': '', 'email': '', 'phone': '', 'service': '', 'message': ''}
+        if 'SUMMARY' in event:
+            summary = ics.unescape_text(event['SUMMARY'][1])
+            data['name'] = re.sub(r'^Appointment:\s*', '', summary).split(' – ')[0].strip()
+        if 'DESCRIPTION' in event:
+            for line in ics.unescape_text(event['DESCRIPTION'][1]).splitlines():
+                match = DESCRIPTION_LINE.match(line)
+                if not match:
+                    continue
+                key, value = match.group(1).lower(), match.group(2).strip()
+                if key == 'patient':
+                    data['name'] = data['name'] or value
+                elif key == 'message':
+                    data['message'] = '' if value == '—' else value
+                else:
+                    data[key] = value
+        if not data['email'] and 'ATTENDEE' in event:
+            data['email'] = re.sub(r'^mailto:', '', event['ATTENDEE'][1], flags=re.IGNORECASE)
+        data['service'] = normalise_service(data['service'])
+        data['preferred_date'] = None
+        data['slot_time'] = None
+        if 'DTSTART' in event:
+            params, value = event['DTSTART']
+            try:
+                start = ics.parse_datetime(value, params)
+            except ValueError:
+                data['preferred_date'] = value  # left for the serializer to reject
+            else:
+                if isinstance(start, datetime):
+                    data['preferred_date'] = start.date().isoformat()
+                    data['slot_time'] = start.strftime('%H:%M')
+                else:
+                    data['preferred_date'] = start.isoformat()
+        yield line_number, data
+
+
+class Command(BaseCommand):
+    help = 'Import appointments from a CSV or ICS file in validated batches (bulk insert, row-level errors)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .ics file')
+        parser.add_argument('--format', choices=['csv', 'ics'], help='File format (default: from extension)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--allow-past', action='store_true', help='Accept dates in the past (historic bookings)')
+        parser.add_argument('--confirmed', action='store_true', help='Mark imported appointments as confirmed')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; do not write to the database')
+        parser.add_argument('--clinic', help='Clinic (slug) to import into; default: the default clinic')
+
+    def handle(self, *args, **options):
+        # Availability checks and new rows are per clinic
+        try:
+            clinic = tenancy.clinics(options['clinic'])[0] if options['clinic'] else tenancy.effective()
+        except LookupError as e:
+            raise CommandError(str(e))
+        with tenancy.activate(clinic):
+            self.import_file(options)
+
+    def import_file(self, options):
+        path = options['path']
+        fmt = options['format'] or ('ics' if path.lower().endswith('.ics') else 'csv')
+        batch_size = max(1, options['batch_size'])
+        self.allow_past = options['allow_past']
+        self.confirmed = options['confirmed']
+        self.dry_run = options['dry_run']
+        self.imported = 0
+        self.failed = 0
+        self.resources = availability.active_resources()
+        # Places claimed earlier in this file: {(date, "HH:MM"): {resource_id: n}} (needed for dry runs,
+        # where earlier batches are not in the database)
+        self.claimed = {}
+
+        try:
+            fh = open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+        with fh:
+            rows = iter_ics_rows(fh) if fmt == 'ics' else iter_csv_rows(fh)
+            batch = []
+            for item in rows:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    self.process_batch(batch)
+                    batch = []
+            if batch:
+                self.process_batch(batch)
+
+        verb = 'Would import' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {self.imported} appointment(s); {self.failed} row(s) rejected.'))
+
+    def report(self, line_number, errors):
+        self.failed += 1
+        if isinstance(errors, dict):
+            errors = '; '.join(
+                f'{field}: {" ".join(str(m) for m in msgs) if isinstance(msgs, list) else msgs}'
+                for field, msgs in errors.items()
+            )
+        self.stderr.write(f'Line {line_number}: {errors}')
+
+    def process_batch(self, batch):
+        context = {'allow_past': self.allow_past}
+        valid = []
+        for line_number, data in batch:
+            serializer = AppointmentImportSerializer(data=data, context=context)
+            if serializer.is_valid():
+                valid.append((line_number, serializer.validated_data))
+            else:
+                self.report(line_number, serializer.errors)
+
+        dates = {attrs['preferred_date'] for _, attrs in valid if attrs.get('preferred_date') and attrs.get('slot_time')}
+        counts = availability.booking_counts(preferred_date__in=dates) if dates else {}
+        if self.dry_run:
+            availability.merge_counts(counts, {k: v for k, v in self.claimed.items() if k[0] in dates})
+
+        now = timezone.now()
+        to_create = []
+        for line_number, attrs in valid:
+            if attrs.get('preferred_date') and attrs.get('slot_time'):
+                slot_key = (attrs['preferred_date'], attrs['slot_time'].strftime('%H:%M'))
+                slot_counts = counts.setdefault(slot_key, {})
+                free = availability.free_resources(self.resources, slot_counts)
+                requested = attrs.get('resource')
+                if not availability.has_place(free, requested.pk if requested else None):
+                    self.report(line_number, {'slot_time': 'This slot is already booked.'})
+                    continue
+                attrs['resource'] = requested or free[0]
+                resource_id = attrs['resource'].pk if attrs['resource'] else None
+                slot_counts[resource_id] = slot_counts.get(resource_id, 0) + 1
+                claims = self.claimed.setdefault(slot_key, {})
+                claims[resource_id] = claims.get(resource_id, 0) + 1
+            # Imported by staff: nothing for the staff digest to announce
+            to_create.append(Appointment(is_confirmed=self.confirmed, staff_notified_at=now, **attrs))
+
+        if to_create and not self.dry_run:
+            with transaction.atomic():
+                Appointment.objects.bulk_create(to_create)
+                # bulk_create sends no post_save: refresh cached bootstrap availability here
+                transaction.on_commit(bootstrap.invalidate_clinic)
+        self.imported += len(to_create)
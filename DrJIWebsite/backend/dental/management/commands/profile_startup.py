@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = '''
+import json, sys, time
+t0 = time.perf_counter()
+import config.wsgi
+t1 = time.perf_counter()
+timings = {'load_app': t1 - t0}
+if %(warmup)r:
+    from config.warmup import warm_up
+    timings.update(warm_up())
+    timings['warm_up'] = time.perf_counter() - t1
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profile a cold worker start: import time per module/package (python -X importtime) and warm-up cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Number of modules to list')
+        parser.add_argument('--no-warmup', action='store_true', help='Only measure loading the WSGI application')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE % {'warmup': not options['no_warmup']}],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'Startup probe failed.')
+
+        modules = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            modules.append((int(self_us), int(cumulative_us), name.strip()))
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        by_package = defaultdict(int)
+        for self_us, _, name in modules:
+            by_package[name.split('.')[0]] += self_us
+        total_us = sum(self_us for self_us, _, _ in modules)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Startup timings'))
+        for key, seconds in timings.items():
+            self.stdout.write(f'  {key:<28} {seconds * 1000:>9.1f} ms')
+        self.stdout.write(f'  {"imports (sum of self time)":<28} {total_us / 1000:>9.1f} ms  ({len(modules)} modules)')
+
+        top = options['top']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Top {top} packages by import time'))
+        for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+            self.stdout.write(f'  {package:<40} {self_us / 1000:>9.1f} ms')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Top {top} modules by cumulative import time'))
+        for self_us, cumulative_us, name in sorted(modules, key=lambda m: -m[1])[:top]:
+            self.stdout.write(f'  {name:<40} {cumulative_us / 1000:>9.1f} ms  (self {self_us / 1000:.1f} ms)')
@@ -0,0 +1,208 @@
+"""
+Reconcile Appointment rows with Google Calendar events.
+
+Walks appointments in date-range chunks. For each chunk it lists the calendar events in the same window
+(events created by this app carry extendedProperties.private.appointment_id) and then:
+- creates events for appointments that have none;
+- patches events whose time or text drifted, or that the appointment has moved away from;
+- deletes tagged events whose appointment no longer exists (live or archived) or was cancelled,
+  or that duplicate the stored event.
+All writes go out as Google batch HTTP requests of up to 50 calls.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dental import calendar_service, tenancy
+from dental.models import Appointment, ArchivedAppointment
+
+BATCH_SIZE = 50
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}". Use YYYY-MM-DD.')
+
+
+def list_tagged_events(service, calendar_id, time_min, time_max):
+    """Return {event_id: event} for app-created events in the window."""
+    events = {}
+    page_token = None
+    while True:
+        params = {
+            'calendarId': calendar_id,
+            'timeMin': time_min.isoformat(),
+            'timeMax': time_max.isoformat(),
+            'singleEvents': True,
+            'maxResults': 2500,
+        }
+        if page_token:
+            params['pageToken'] = page_token
+        result = service.events().list(**params).execute()
+        for event in result.get('items', []):
+            private = (event.get('extendedProperties') or {}).get('private') or {}
+            if private.get('appointment_id'):
+                events[event['id']] = event
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return events
+
+
+class Command(BaseCommand):
+    help = 'Reconcile appointments with Google Calendar events in date-range chunks using batched API calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date (YYYY-MM-DD, default today)')
+        parser.add_argument('--end', help='Last date inclusive (YYYY-MM-DD, default start + 365 days)')
+        parser.add_argument('--chunk-days', type=int, default=30)
+        parser.add_argument('--dry-run', action='store_true', help='Report planned changes without writing to the calendar')
+        parser.add_argument('--clinic', help='Only this clinic (slug); default: every active clinic')
+
+    def handle(self, *args, **options):
+        try:
+            clinics = tenancy.clinics(options['clinic'])
+        except LookupError as e:
+            raise CommandError(str(e))
+        configured = False
+        for clinic in clinics:
+            with tenancy.activate(clinic):
+                service, calendar_id = calendar_service._get_calendar_service(calendar_service.SCOPES_EVENTS)
+                if service:
+                    configured = True
+                    self.reconcile_clinic(clinic, service, calendar_id, options)
+        if not configured:
+            raise CommandError('Google Calendar is not configured (GOOGLE_CALENDAR_ID / GOOGLE_APPLICATION_CREDENTIALS).')
+
+    def reconcile_clinic(self, clinic, service, calendar_id, options):
+        start = parse_date(options['start']) if options['start'] else timezone.localdate()
+        end = parse_date(options['end']) if options['end'] else start + timedelta(days=365)
+        chunk_days = max(1, options['chunk_days'])
+        self.service = service
+        self.calendar_id = calendar_id
+        self.dry_run = options['dry_run']
+        self.stats = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'failed': 0}
+
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), end + timedelta(days=1))
+            self.reconcile_chunk(chunk_start, chunk_end)
+            chunk_start = chunk_end
+
+        prefix = 'Dry run – would have ' if self.dry_run else ''
+        s = self.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"{clinic.slug}: {prefix}created {s['created']}, updated {s['updated']}, deleted {s['deleted']} event(s); "
+            f"{s['unchanged']} in sync, {s['failed']} failed."
+        ))
+
+    def reconcile_chunk(self, chunk_start, chunk_end):
+        """Reconcile appointments with preferred_date in [chunk_start, chunk_end)."""
+        appointments = list(
+            Appointment.objects.filter(
+                preferred_date__gte=chunk_start,
+                preferred_date__lt=chunk_end,
+                slot_time__isnull=False,
+            ).select_related('resource')
+        )
+        time_min = calendar_service._day_bounds(chunk_start)[0]
+        time_max = calendar_service._day_bounds(chunk_end)[0]
+        events = list_tagged_events(self.service, self.calendar_id, time_min, time_max)
+
+        # Stored event ids of every appointment referenced by an event in this window (one query)
+        referenced = {int(e['extendedProperties']['private']['appointment_id']) for e in events.values()
+                      if e['extendedProperties']['private']['appointment_id'].isdigit()}
+        stored_ids = dict(
+            Appointment.objects.filter(pk__in=referenced).values_list('pk', 'calendar_event_id')
+        )
+        # Archived appointments keep their events (history); cancelled ones do not
+        stored_ids.update(
+            ArchivedAppointment.objects.filter(pk__in=referenced, cancelled_at__isnull=True)
+            .values_list('pk', 'calendar_event_id')
+        )
+        # Adopt an orphaned event when the appointment lost its id (e.g. insert succeeded, save failed)
+        event_for_appointment = {}
+        for event_id, event in events.items():
+            appt_id = event['extendedProperties']['private']['appointment_id']
+            event_for_appointment.setdefault(appt_id, event_id)
+
+        creates, patches, deletes = {}, {}, {}
+        to_save = []
+        keep = set()
+        for appointment in appointments:
+            body = calendar_service.appointment_event_body(appointment)
+            event_id = appointment.calendar_event_id
+            if not event_id and str(appointment.pk) in event_for_appointment:
+                event_id = appointment.calendar_event_id = event_for_appointment[str(appointment.pk)]
+                stored_ids[appointment.pk] = event_id
+                to_save.append(appointment)
+            if not event_id:
+                creates[appointment.pk] = (appointment, body)
+            elif event_id in events and calendar_service.event_matches(events[event_id], body):
+                keep.add(event_id)
+                self.stats['unchanged'] += 1
+            else:
+                # Drifted, or the event lives outside this window (appointment was moved)
+                keep.add(event_id)
+                patches[appointment.pk] = (appointment, body)
+
+        for event_id, event in events.items():
+            if event_id in keep:
+                continue
+            appt_id = event['extendedProperties']['private']['appointment_id']
+            appt_pk = int(appt_id) if appt_id.isdigit() else None
+            if appt_pk in stored_ids and stored_ids[appt_pk] == event_id:
+                continue  # belongs to an appointment in another chunk; that chunk patches it
+            deletes[event_id] = event
+
+        if self.dry_run:
+            self.stats['created'] += len(creates)
+            self.stats['updated'] += len(patches)
+            self.stats['deleted'] += len(deletes)
+            return
+        if to_save:
+            Appointment.objects.bulk_update(to_save, ['calendar_event_id'])
+
+        events_api = self.service.events()
+        requests = []
+        for pk, (appointment, body) in patches.items():
+            requests.append((f'patch-{pk}', events_api.patch(
+                calendarId=self.calendar_id, eventId=appointment.calendar_event_id, body=body,
+            )))
+        for event_id in deletes:
+            requests.append((f'delete-{event_id}', events_api.delete(calendarId=self.calendar_id, eventId=event_id)))
+        results = calendar_service.execute_batched(self.service, requests, BATCH_SIZE)
+
+        for key, (_, exception) in results.items():
+            kind, _, ref = key.partition('-')
+            if exception is None:
+                self.stats['updated' if kind == 'patch' else 'deleted'] += 1
+            elif kind == 'patch' and calendar_service.http_error_status(exception) in (404, 410):
+                # Stored event was removed from the calendar: recreate it
+                creates[int(ref)] = patches[int(ref)]
+            elif kind == 'delete' and calendar_service.http_error_status(exception) in (404, 410):
+                self.stats['deleted'] += 1
+            else:
+                self.stats['failed'] += 1
+                self.stderr.write(f'{key}: {exception}')
+
+        requests = [
+            (f'create-{pk}', events_api.insert(calendarId=self.calendar_id, body=body))
+            for pk, (_, body) in creates.items()
+        ]
+        results = calendar_service.execute_batched(self.service, requests, BATCH_SIZE)
+        created = []
+        for key, (response, exception) in results.items():
+            if exception is not None:
+                self.stats['failed'] += 1
+                self.stderr.write(f'{key}: {exception}')
+                continue
+            appointment = creates[int(key.partition('-')[2])][0]
+            appointment.calendar_event_id = response['id']
+            created.append(appointment)
+        if created:
+            # bulk_update does not touch updated_at, so the .ics feed ETag is unaffected
+            Appointment.objects.bulk_update(created, ['calendar_event_id'])
+        self.stats['created'] += len(created)
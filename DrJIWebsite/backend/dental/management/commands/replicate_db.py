@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary database into the DATABASE_READ_REPLICAS files (local replica testing). '
+        'With --loop the replicas trail the primary by up to SECONDS, simulating replication lag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=float, metavar='SECONDS', help='Keep running, copying every SECONDS')
+
+    def handle(self, *args, **options):
+        aliases = list(getattr(settings, 'DATABASE_READ_REPLICAS', ()))
+        if not aliases:
+            raise CommandError('No replicas configured (set DATABASE_REPLICAS).')
+        for alias in ['default'] + aliases:
+            if settings.DATABASES[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f'{alias} is not SQLite; use the database server\'s own replication.')
+        primary = str(settings.DATABASES['default']['NAME'])
+        interval = options['loop']
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary)
+            try:
+                for alias in aliases:
+                    target = sqlite3.connect(str(settings.DATABASES[alias]['NAME']))
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(f'Replicated to {", ".join(aliases)} in {(time.perf_counter() - started) * 1000:.1f} ms.')
+            if not interval:
+                return
+            time.sleep(interval)
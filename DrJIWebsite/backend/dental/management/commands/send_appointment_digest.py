@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dental import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Email staff one summary of appointments not yet notified (APPOINTMENT_NOTIFY_MODE=digest). '
+        'Run from cron, or with --loop as a long-running worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, metavar='SECONDS', help='Keep running, sending a digest every SECONDS')
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+        while True:
+            try:
+                count = notifications.send_digest()
+            except Exception as e:
+                if not interval:
+                    raise
+                self.stderr.write(f'Digest failed, retrying next run: {e}')
+            else:
+                self.stdout.write(f'Digest: {count} appointment(s) sent.' if count else 'Digest: nothing pending.')
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dental import calendar_service, tenancy
+from dental.models import Resource
+
+
+class Command(BaseCommand):
+    help = (
+        'Mirror Google Calendar busy periods into the local CalendarBusyPeriod table '
+        '(full sync first, then incremental via sync tokens). Run from cron every few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Discard the sync token and resync everything')
+        parser.add_argument('--clinic', help='Only this clinic (slug); default: every active clinic')
+
+    def handle(self, *args, **options):
+        try:
+            clinics = tenancy.clinics(options['clinic'])
+        except LookupError as e:
+            raise CommandError(str(e))
+        synced = 0
+        for clinic in clinics:
+            with tenancy.activate(clinic):
+                # The clinic calendar plus any per-resource calendars
+                calendar_ids = [None] + sorted(set(
+                    Resource.objects.filter(is_active=True).exclude(calendar_id='').values_list('calendar_id', flat=True)
+                ))
+                for calendar_id in calendar_ids:
+                    stats = calendar_service.sync_busy_periods(calendar_id=calendar_id, full=options['full'])
+                    if stats is None:
+                        break  # no calendar configured for this clinic
+                    synced += 1
+                    kind = 'full' if stats['full'] else 'incremental'
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{clinic.slug}: {calendar_id or 'clinic calendar'}: {kind} sync, "
+                        f"{stats['upserted']} busy period(s) upserted, {stats['deleted']} removed."
+                    ))
+        if not synced:
+            raise CommandError('Google Calendar is not configured (GOOGLE_CALENDAR_ID / GOOGLE_APPLICATION_CREDENTIALS).')
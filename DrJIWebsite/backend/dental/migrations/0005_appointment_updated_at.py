@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0004_add_appointment_slot_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
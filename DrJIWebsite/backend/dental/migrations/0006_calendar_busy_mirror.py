@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0005_appointment_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(max_length=255, unique=True)),
+                ('sync_token', models.TextField(blank=True)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CalendarBusyPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(max_length=255)),
+                ('event_id', models.CharField(max_length=1024)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['calendar_id', 'start', 'end'], name='dental_cale_calenda_c81751_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='calendarbusyperiod',
+            constraint=models.UniqueConstraint(fields=('calendar_id', 'event_id'), name='unique_calendar_event'),
+        ),
+    ]
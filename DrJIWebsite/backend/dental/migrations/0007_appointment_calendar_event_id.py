@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0006_calendar_busy_mirror'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='calendar_event_id',
+            field=models.CharField(blank=True, help_text='Google Calendar event ID', max_length=1024),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0007_appointment_calendar_event_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dentist',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
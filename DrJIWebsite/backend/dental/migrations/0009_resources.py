@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0008_dentist_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('kind', models.CharField(choices=[('chair', 'Chair'), ('dentist', 'Dentist')], default='chair', max_length=20)),
+                ('capacity', models.PositiveSmallIntegerField(default=1, help_text='Appointments per time slot')),
+                ('calendar_id', models.CharField(blank=True, help_text='Optional Google Calendar whose busy times block only this resource', max_length=255)),
+                ('order', models.PositiveIntegerField(default=0, help_text='Lower numbers are booked first')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['preferred_date', 'slot_time'], name='dental_appo_preferr_d73a78_idx'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='dentist',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resources', to='dental.dentist'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='resource',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='dental.resource'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0009_resources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Closure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, help_text='Leave blank for a single day')),
+                ('reason', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], unique=True)),
+                ('opens', models.TimeField()),
+                ('closes', models.TimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Opening hours',
+                'ordering': ['weekday'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleBreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], null=True)),
+                ('start', models.TimeField()),
+                ('end', models.TimeField()),
+                ('label', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'ordering': ['weekday', 'start'],
+            },
+        ),
+    ]
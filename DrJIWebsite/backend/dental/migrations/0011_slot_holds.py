@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:40
+
+import dental.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0010_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(default=dental.models.new_hold_token, max_length=64, unique=True)),
+                ('preferred_date', models.DateField()),
+                ('slot_time', models.TimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(default=dental.models.default_hold_expiry)),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='dental.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['preferred_date', 'slot_time', 'expires_at'], name='dental_slot_preferr_d3d8b2_idx'), models.Index(fields=['expires_at'], name='dental_slot_expires_b4854e_idx')],
+            },
+        ),
+    ]
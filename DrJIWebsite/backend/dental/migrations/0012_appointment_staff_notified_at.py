@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:43
+
+from django.db import migrations, models
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Bookings made before this field existed were already emailed one by one
+    Appointment = apps.get_model('dental', 'Appointment')
+    Appointment.objects.filter(staff_notified_at__isnull=True).update(staff_notified_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0011_slot_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='staff_notified_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+    ]
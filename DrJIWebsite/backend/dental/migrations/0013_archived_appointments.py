@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dental', '0012_appointment_staff_notified_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('service', models.CharField(choices=[('general', 'General Dentistry'), ('cleaning', 'Teeth Cleaning & Polishing'), ('root_canal', 'Root Canal Treatment'), ('extraction', 'Tooth Extraction'), ('implants', 'Dental Implants'), ('orthodontics', 'Braces & Orthodontics'), ('whitening', 'Teeth Whitening'), ('cosmetic', 'Cosmetic Dentistry'), ('pediatric', 'Pediatric Dentistry'), ('gum_treatment', 'Gum Treatment')], max_length=50)),
+                ('preferred_date', models.DateField(blank=True, null=True)),
+                ('slot_time', models.TimeField(blank=True, help_text='Booked time slot e.g. 09:00', null=True)),
+                ('preferred_time', models.CharField(blank=True, choices=[('', 'No preference'), ('morning', 'Morning (8 AM – 12 PM)'), ('afternoon', 'Afternoon (12 PM – 5 PM)'), ('evening', 'Evening (5 PM – 7 PM)')], default='', max_length=20)),
+                ('message', models.TextField(blank=True)),
+                ('is_confirmed', models.BooleanField(default=False)),
+                ('staff_notified_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('calendar_event_id', models.CharField(blank=True, help_text='Google Calendar event ID', max_length=1024)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_appointments', to=settings.AUTH_USER_MODEL)),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_appointments', to='dental.resource')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['email'], name='dental_arch_email_b0f4a9_idx'), models.Index(fields=['preferred_date'], name='dental_arch_preferr_d88bf8_idx')],
+            },
+        ),
+    ]
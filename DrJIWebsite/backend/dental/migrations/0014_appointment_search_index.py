@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    # FTS5 table + triggers on SQLite, GIN index on PostgreSQL (see dental.search)
+    from dental import search
+    search.install_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from dental import search
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0013_archived_appointments'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
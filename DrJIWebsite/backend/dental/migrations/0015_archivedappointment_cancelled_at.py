@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0014_appointment_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
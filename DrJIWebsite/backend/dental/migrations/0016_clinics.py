@@ -0,0 +1,167 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:11
+
+import dental.tenancy
+from django.db import migrations, models
+import django.db.models.deletion
+
+MODELS = ['appointment', 'archivedappointment', 'closure', 'dentist', 'openinghours', 'resource', 'schedulebreak', 'service', 'slothold']
+
+
+def create_default_clinic(apps, schema_editor):
+    """Existing data becomes the default clinic's (TENANT_DEFAULT, 'default' unless set)."""
+    from django.conf import settings
+
+    Clinic = apps.get_model('dental', 'Clinic')
+    clinic, _ = Clinic.objects.get_or_create(
+        slug=getattr(settings, 'TENANT_DEFAULT', 'default') or 'default',
+        defaults={'name': 'Dr. JI Dental'},
+    )
+    for model_name in MODELS:
+        apps.get_model('dental', model_name).objects.filter(clinic__isnull=True).update(clinic=clinic)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dental', '0015_archivedappointment_cancelled_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Clinic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(help_text='Value of the X-Clinic header', max_length=100, unique=True)),
+                ('hosts', models.TextField(blank=True, help_text='Host names served as this clinic, one per line')),
+                ('google_calendar_id', models.CharField(blank=True, max_length=255)),
+                ('google_credentials', models.CharField(blank=True, help_text='Service account JSON path (default: GOOGLE_APPLICATION_CREDENTIALS)', max_length=500)),
+                ('slot_start_hour', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('slot_end_hour', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('slot_duration_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='closure',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='dentist',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='openinghours',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='schedulebreak',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+        ),
+        migrations.RunPython(create_default_clinic, migrations.RunPython.noop),
+        # The NOT NULL step runs without a database default: create_default_clinic has already set
+        # every row's clinic. The callable default (live clinic registry) exists in the model state
+        # only, so the migration never runs it.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name='clinic',
+                    field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+                )
+                for model_name in MODELS
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name='clinic',
+                    field=models.ForeignKey(default=dental.tenancy.default_clinic_id, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dental.clinic'),
+                )
+                for model_name in MODELS
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='dental_appo_preferr_d73a78_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='archivedappointment',
+            name='dental_arch_email_b0f4a9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='archivedappointment',
+            name='dental_arch_preferr_d88bf8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='slothold',
+            name='dental_slot_preferr_d3d8b2_idx',
+        ),
+        migrations.AlterField(
+            model_name='openinghours',
+            name='weekday',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='slug',
+            field=models.SlugField(max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['clinic', 'preferred_date', 'slot_time'], name='dental_appo_clinic__cda41a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['clinic', 'email'], name='dental_arch_clinic__17c5f9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedappointment',
+            index=models.Index(fields=['clinic', 'preferred_date'], name='dental_arch_clinic__228b4a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['clinic', 'preferred_date', 'slot_time', 'expires_at'], name='dental_slot_clinic__1362b7_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='openinghours',
+            constraint=models.UniqueConstraint(fields=('clinic', 'weekday'), name='unique_clinic_weekday'),
+        ),
+        migrations.AddConstraint(
+            model_name='service',
+            constraint=models.UniqueConstraint(fields=('clinic', 'slug'), name='unique_clinic_service_slug'),
+        ),
+    ]
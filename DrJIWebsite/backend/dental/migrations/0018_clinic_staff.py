@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def add_existing_staff(apps, schema_editor):
+    """Staff accounts that existed before clinic membership keep working on the default clinic."""
+    Clinic = apps.get_model('dental', 'Clinic')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    clinic = Clinic.objects.filter(slug=getattr(settings, 'TENANT_DEFAULT', 'default') or 'default').first()
+    if clinic is not None:
+        clinic.staff.add(*User.objects.filter(is_staff=True, is_superuser=False).values_list('pk', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dental', '0017_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clinic',
+            name='staff',
+            field=models.ManyToManyField(blank=True, help_text='Staff users who may use the admin, staff search and .ics feed of this clinic', related_name='staffed_clinics', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(add_existing_staff, migrations.RunPython.noop),
+    ]
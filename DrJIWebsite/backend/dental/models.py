@@ -1,8 +1,82 @@
+import logging
+import secrets
+from datetime import time, timedelta
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import tenancy
+
+logger = logging.getLogger(__name__)
+
+
+class Clinic(models.Model):
+    """
+    A clinic served by this deployment (see dental.tenancy). Blank slot and calendar fields fall back
+    to the APPOINTMENT_SLOT_* and GOOGLE_* settings.
+    """
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=100, unique=True, help_text='Value of the X-Clinic header')
+    hosts = models.TextField(blank=True, help_text='Host names served as this clinic, one per line')
+    google_calendar_id = models.CharField(max_length=255, blank=True)
+    google_credentials = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text='Service account JSON path (default: GOOGLE_APPLICATION_CREDENTIALS)',
+    )
+    slot_start_hour = models.PositiveSmallIntegerField(null=True, blank=True)
+    slot_end_hour = models.PositiveSmallIntegerField(null=True, blank=True)
+    slot_duration_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Staff accounts are shared by all clinics; only the listed ones work on this clinic (superusers: all)
+    staff = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name='staffed_clinics',
+        help_text='Staff users who may use the admin, staff search and .ics feed of this clinic',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
 
-class Dentist(models.Model):
+    def host_list(self):
+        return [h.strip().lower() for h in self.hosts.splitlines() if h.strip()]
+
+
+class ClinicManager(models.Manager):
+    """Rows of the current clinic only (see dental.tenancy)."""
+
+    def get_queryset(self):
+        return tenancy.scoped(super().get_queryset())
+
+
+class ClinicScoped(models.Model):
+    """Base for clinic-owned models: a clinic FK defaulting to the current clinic, and a scoped manager."""
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.PROTECT,
+        default=tenancy.default_clinic_id,
+        editable=False,
+        related_name='+',
+    )
+
+    objects = ClinicManager()
+    # Every clinic's rows: for querysets built at import time (scoped per request by the caller)
+    all_clinics = models.Manager()
+
+    class Meta:
+        abstract = True
+
+
+class Dentist(ClinicScoped):
     """Dentist profile for About page."""
     name = models.CharField(max_length=200)
     title = models.CharField(max_length=200, blank=True)
@@ -11,6 +85,8 @@ class Dentist(models.Model):
     philosophy = models.TextField(blank=True)
     image = models.ImageField(upload_to='dentist/', blank=True, null=True)
     certifications = models.TextField(blank=True, help_text='One per line')
+    # Resized WebP/JPEG copies of `image` with their dimensions (see dental.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,11 +96,35 @@ class Dentist(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.variants_outdated():
+            self.refresh_image_variants()
+
+    def variants_outdated(self):
+        source = self.image.name if self.image else ''
+        return (self.image_variants or {}).get('source', '') != source
+
+    def refresh_image_variants(self):
+        """Regenerate variants for the current image and store them without touching updated_at."""
+        from . import images
+        images.delete_variants(self.image_variants)
+        try:
+            self.image_variants = images.generate_variants(self.image.name) if self.image else {}
+        except Exception as e:
+            # Serializer falls back to the original `image` URL
+            logger.exception('Failed to generate image variants for dentist id=%s: %s', self.pk, e)
+            self.image_variants = {}
+        Dentist.objects.filter(pk=self.pk).update(image_variants=self.image_variants)
+        # post_save skipped the export while variants were outdated (see catalogue_export.schedule)
+        from . import catalogue_export
+        catalogue_export.schedule_for(self.clinic_id, 'dentists')
 
-class Service(models.Model):
+
+class Service(ClinicScoped):
     """Dental services offered."""
     name = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=200)
     short_description = models.CharField(max_length=300, blank=True)
     description = models.TextField(blank=True)
     benefits = models.TextField(blank=True, help_text='One benefit per line')
@@ -37,13 +137,130 @@ class Service(models.Model):
 
     class Meta:
         ordering = ['order', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'slug'], name='unique_clinic_service_slug'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Appointment(models.Model):
-    """Appointment booking requests."""
+class Resource(ClinicScoped):
+    """
+    Bookable chair or dentist. Each slot can take up to `capacity` appointments per resource.
+    With no active resources the clinic behaves as a single chair (one booking per slot).
+    """
+    KIND_CHOICES = [
+        ('chair', 'Chair'),
+        ('dentist', 'Dentist'),
+    ]
+    name = models.CharField(max_length=200)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='chair')
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resources',
+    )
+    capacity = models.PositiveSmallIntegerField(default=1, help_text='Appointments per time slot')
+    calendar_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text='Optional Google Calendar whose busy times block only this resource',
+    )
+    order = models.PositiveIntegerField(default=0, help_text='Lower numbers are booked first')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return self.name
+
+
+WEEKDAY_CHOICES = [
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+]
+
+
+class OpeningHours(ClinicScoped):
+    """
+    Weekly opening hours. Weekdays without a row are closed; with no rows at all the clinic is open
+    every day from the clinic's slot start hour to its end hour (see dental.schedule).
+    """
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    opens = models.TimeField()
+    closes = models.TimeField()
+
+    class Meta:
+        ordering = ['weekday']
+        verbose_name_plural = 'Opening hours'
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'weekday'], name='unique_clinic_weekday'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_weekday_display()}: {self.opens:%H:%M} – {self.closes:%H:%M}"
+
+    def clean(self):
+        if self.opens is not None and self.closes is not None and self.opens >= self.closes:
+            raise ValidationError({'closes': 'Closing time must be after opening time.'})
+
+
+class ScheduleBreak(ClinicScoped):
+    """Recurring break without appointments (e.g. lunch). Leave weekday blank for every day."""
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, null=True, blank=True)
+    start = models.TimeField()
+    end = models.TimeField()
+    label = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['weekday', 'start']
+
+    def __str__(self):
+        day = self.get_weekday_display() if self.weekday is not None else 'Every day'
+        return f"{day}: {self.start:%H:%M} – {self.end:%H:%M} {self.label}".strip()
+
+    def clean(self):
+        if self.start is not None and self.end is not None and self.start >= self.end:
+            raise ValidationError({'end': 'End time must be after start time.'})
+
+
+class Closure(ClinicScoped):
+    """Dates the clinic is closed (holidays, training days), inclusive."""
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, help_text='Leave blank for a single day')
+    reason = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        ordering = ['start_date']
+
+    def __str__(self):
+        if self.end_date and self.end_date != self.start_date:
+            return f"{self.start_date} – {self.end_date} {self.reason}".strip()
+        return f"{self.start_date} {self.reason}".strip()
+
+    def clean(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'End date cannot be before start date.'})
+
+    def save(self, *args, **kwargs):
+        if not self.end_date:
+            self.end_date = self.start_date
+        super().save(*args, **kwargs)
+
+
+class AppointmentFields(ClinicScoped):
+    """Booking fields shared by live appointments and the archive."""
     SERVICE_CHOICES = [
         ('general', 'General Dentistry'),
         ('cleaning', 'Teeth Cleaning & Polishing'),
@@ -68,10 +285,41 @@ class Appointment(models.Model):
         ('afternoon', 'Afternoon (12 PM – 5 PM)'),
         ('evening', 'Evening (5 PM – 7 PM)'),
     ]
+    # Start-time windows [from, to) matching the PREFERRED_TIME_CHOICES labels
+    PREFERRED_TIME_WINDOWS = {
+        'morning': (time(8, 0), time(12, 0)),
+        'afternoon': (time(12, 0), time(17, 0)),
+        'evening': (time(17, 0), time(19, 0)),
+    }
     preferred_time = models.CharField(max_length=20, choices=PREFERRED_TIME_CHOICES, default='', blank=True)
     message = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
     is_confirmed = models.BooleanField(default=False)
+    # When staff were emailed about this booking (immediately or in a digest); null = pending
+    staff_notified_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    calendar_event_id = models.CharField(max_length=1024, blank=True, help_text='Google Calendar event ID')
+
+    is_archived = False
+    cancelled_at = None
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.name} - {self.get_service_display()} ({self.created_at.date()})"
+
+
+class Appointment(AppointmentFields):
+    """Appointment booking requests."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Chair/dentist the booking occupies (assigned at booking time when resources are configured)
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='appointments',
+    )
     # Link to customer account when booked while signed in (single dentist clinic)
     customer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -83,6 +331,147 @@ class Appointment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['clinic', 'preferred_date', 'slot_time']),
+        ]
+
+
+class ArchivedAppointment(AppointmentFields):
+    """
+    Past appointment moved out of the live table by `manage.py archive_appointments`, or a cancelled
+    one. Keeps the original id and timestamps; read together with Appointment via dental.archive.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    # Set when the patient cancelled (the booking is archived at once to free its slot)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_appointments',
+    )
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_appointments',
+    )
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['clinic', 'email']),
+            models.Index(fields=['clinic', 'preferred_date']),
+        ]
+
+
+def new_hold_token():
+    return secrets.token_urlsafe(24)
+
+
+def default_hold_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'SLOT_HOLD_SECONDS', 300))
+
+
+class SlotHold(ClinicScoped):
+    """
+    Short-lived reservation of a slot while the patient fills in the booking form.
+    Active holds count against capacity; expired rows are ignored and deleted lazily.
+    """
+    token = models.CharField(max_length=64, unique=True, default=new_hold_token)
+    preferred_date = models.DateField()
+    slot_time = models.TimeField()
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='holds',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=default_hold_expiry)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['clinic', 'preferred_date', 'slot_time', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
 
     def __str__(self):
-        return f"{self.name} - {self.get_service_display()} ({self.created_at.date()})"
+        return f"{self.preferred_date} {self.slot_time:%H:%M} (until {self.expires_at:%H:%M:%S})"
+
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+
+    @classmethod
+    def active(cls):
+        return cls.objects.filter(expires_at__gt=timezone.now())
+
+    @classmethod
+    def lookup(cls, token):
+        """Return the active hold for `token` (unique index lookup), or None."""
+        if not token:
+            return None
+        hold = cls.objects.filter(token=token).select_related('resource').first()
+        if hold is None or hold.is_expired():
+            return None
+        return hold
+
+    @classmethod
+    def reclaim_expired(cls):
+        """Delete expired holds (indexed range delete; called when new holds are placed)."""
+        return cls.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+class CalendarBusyPeriod(models.Model):
+    """Busy block mirrored from Google Calendar (kept up to date by `manage.py sync_calendar`)."""
+    calendar_id = models.CharField(max_length=255)
+    event_id = models.CharField(max_length=1024)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['calendar_id', 'event_id'], name='unique_calendar_event'),
+        ]
+        indexes = [
+            models.Index(fields=['calendar_id', 'start', 'end']),
+        ]
+
+    def __str__(self):
+        return f"{self.calendar_id}: {self.start} – {self.end}"
+
+
+class CalendarSyncState(models.Model):
+    """Incremental sync token for a mirrored Google Calendar."""
+    calendar_id = models.CharField(max_length=255, unique=True)
+    sync_token = models.TextField(blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.calendar_id
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key of a POST (see config.idempotency). The unique `key` row is the in-flight lock;
+    once the request succeeds it also holds the response to replay until `expires_at`.
+    """
+    key = models.CharField(max_length=64, unique=True, help_text='SHA-256 of clinic, endpoint and client key')
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, help_text='Empty while in flight')
+    response = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
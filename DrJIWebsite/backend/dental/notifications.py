@@ -0,0 +1,130 @@
+"""
+Staff email notifications for new appointments.
+
+APPOINTMENT_NOTIFY_MODE:
+- 'immediate' (default): one email per booking, sent from the request.
+- 'digest': bookings are left pending (staff_notified_at is null) and `manage.py send_appointment_digest`
+  (cron, or --loop as a worker) sends one summary of everything pending per run. Bookings for a date
+  within APPOINTMENT_DIGEST_URGENT_DAYS of today (0 = same day) are still emailed immediately.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from .models import Appointment
+
+logger = logging.getLogger(__name__)
+
+
+def _recipients():
+    return getattr(settings, 'APPOINTMENT_NOTIFY_EMAILS', None) or []
+
+
+def _date_str(appointment):
+    return appointment.preferred_date.strftime('%A, %B %d, %Y') if appointment.preferred_date else 'Not specified'
+
+
+def _slot_str(appointment):
+    return appointment.slot_time.strftime('%I:%M %p').lstrip('0') if appointment.slot_time else 'Not specified'
+
+
+def appointment_details(appointment):
+    """Patient / appointment / message sections shared by the single and digest emails."""
+    body = (
+        '--- PATIENT ---\n'
+        f'Name: {appointment.name}\n'
+        f'Email: {appointment.email}\n'
+        f'Phone: {appointment.phone}\n\n'
+        '--- APPOINTMENT ---\n'
+        f'Service: {appointment.get_service_display()}\n'
+        f'Date: {_date_str(appointment)}\n'
+        f'Time: {_slot_str(appointment)}\n\n'
+    )
+    if appointment.preferred_time:
+        body += f'Preferred period: {appointment.get_preferred_time_display()}\n'
+    if appointment.resource_id:
+        body += f'Resource: {appointment.resource.name}\n'
+    body += f'Booked at (UTC): {appointment.created_at.isoformat()}\n'
+    if appointment.message:
+        body += f'\n--- MESSAGE ---\n{appointment.message}\n'
+    return body
+
+
+def _mark_notified(appointments):
+    # update() keeps updated_at (and the .ics feed ETag) unchanged
+    Appointment.objects.filter(pk__in=[a.pk for a in appointments]).update(staff_notified_at=timezone.now())
+
+
+def is_urgent(appointment):
+    """True if the booking is too close to wait for the next digest."""
+    if not appointment.preferred_date:
+        return False
+    days = getattr(settings, 'APPOINTMENT_DIGEST_URGENT_DAYS', 0)
+    return appointment.preferred_date <= timezone.localdate() + timedelta(days=days)
+
+
+def send_appointment_notification(appointment):
+    """Send full appointment details to configured staff email when a new appointment is booked."""
+    recipients = _recipients()
+    if not recipients:
+        return
+    subject = (
+        f'New appointment booked: {appointment.name} – {appointment.get_service_display()} '
+        f'({_date_str(appointment)}, {_slot_str(appointment)})'
+    )
+    body = 'A new appointment has been booked. Details below.\n\n' + appointment_details(appointment)
+    try:
+        send_mail(
+            subject=subject,
+            message=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=recipients,
+            fail_silently=False,
+        )
+    except Exception as e:
+        logger.exception('Failed to send appointment notification email: %s', e)
+        return
+    _mark_notified([appointment])
+
+
+def notify_new_appointment(appointment):
+    """Email staff now, or leave the booking for the next digest (see module docstring)."""
+    if getattr(settings, 'APPOINTMENT_NOTIFY_MODE', 'immediate') == 'digest' and not is_urgent(appointment):
+        return
+    send_appointment_notification(appointment)
+
+
+def send_digest():
+    """
+    Email one summary of all bookings not yet notified and mark them notified.
+    Returns the number of bookings included (0 if none or no recipients). On SMTP failure nothing
+    is marked, so the next run retries.
+    """
+    recipients = _recipients()
+    if not recipients:
+        return 0
+    pending = list(
+        Appointment.objects.filter(staff_notified_at__isnull=True)
+        .select_related('resource')
+        .order_by('preferred_date', 'slot_time', 'created_at')
+    )
+    if not pending:
+        return 0
+    count = len(pending)
+    subject = f'{count} new appointment{"s" if count != 1 else ""} booked'
+    parts = [f'{count} appointment{"s have" if count != 1 else " has"} been booked since the last summary.\n']
+    for i, appointment in enumerate(pending, 1):
+        parts.append(f'\n===== {i}. {appointment.name} – {_date_str(appointment)}, {_slot_str(appointment)} =====\n')
+        parts.append(appointment_details(appointment))
+    send_mail(
+        subject=subject,
+        message=''.join(parts),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=recipients,
+        fail_silently=False,
+    )
+    _mark_notified(pending)
+    return count
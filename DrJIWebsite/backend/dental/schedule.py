@@ -0,0 +1,164 @@
+"""
+Clinic schedule compiled into an in-memory rule set.
+
+OpeningHours, ScheduleBreak and Closure rows are compiled once into a RuleSet: the bookable slot
+times of each weekday plus merged closure date ranges. Slot generation, slot validation and the
+Google Calendar lookups consult it, so a closed day is answered without a DB query or API call.
+
+The compiled rules are memoised per process and clinic, and tagged with a version number kept in
+the Django cache under the clinic's key (settings.CACHES is shared by the worker processes). Saving or
+deleting any schedule row (or the clinic) bumps that clinic's version once the transaction commits
+(see DentalConfig.ready), and each process recompiles on its next lookup. Bumping before the commit
+would let another worker compile the old rows and memoise them under the new version.
+
+A process reads the version at most once per SCHEDULE_CHECK_SECONDS and clinic (a FileBasedCache
+read is a file open and an unpickle, and slot code calls get_rules many times per request), so other
+workers see a change within that time; the process that made it sees it at once.
+
+cache.incr is atomic on Redis, but on the file and locmem backends it is a get followed by a set, so
+two concurrent bumps can store the same number. That is harmless: both bumps run after their commits,
+so a process that reads the new number compiles both changes. Several hosts need Redis anyway.
+"""
+import bisect
+import contextlib
+import time as _time
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from . import tenancy
+
+VERSION_KEY = 'dental:schedule:version'
+
+_compiled = {}  # clinic id -> RuleSet
+_checked = {}  # clinic id -> time.monotonic() of the last version read
+
+
+class RuleSet:
+    """Compiled schedule: slot dicts per weekday and sorted, non-overlapping closure ranges."""
+
+    def __init__(self, weekly, closures, version=None):
+        self.weekly = weekly
+        self.closures = closures
+        self.version = version
+        self._closure_starts = [start for start, _ in closures]
+        self._all_slots = sorted({s['time']: s for day in weekly for s in day}.values(), key=lambda s: s['time'])
+
+    def is_closed(self, date):
+        if not self.weekly[date.weekday()]:
+            return True
+        i = bisect.bisect_right(self._closure_starts, date) - 1
+        return i >= 0 and date <= self.closures[i][1]
+
+    def slot_times(self, date):
+        """Slot dicts (time, label) bookable on `date`; [] when the clinic is closed."""
+        if self.is_closed(date):
+            return []
+        return list(self.weekly[date.weekday()])
+
+    def all_slot_times(self):
+        """Every slot that is bookable on at least one weekday."""
+        return list(self._all_slots)
+
+    def is_open_slot(self, date, slot_time):
+        value = slot_time.strftime('%H:%M')
+        return any(s['time'] == value for s in self.slot_times(date))
+
+
+def _day_slots(opens, closes, breaks, duration):
+    """Slot dicts from `opens` up to `closes`, skipping slots that overlap a (start, end) break."""
+    slots = []
+    day = datetime(2000, 1, 1)
+    t = datetime.combine(day, opens)
+    end = datetime.combine(day, closes)
+    while t < end:
+        slot_end = t + timedelta(minutes=duration)
+        if not any(t < datetime.combine(day, b_end) and slot_end > datetime.combine(day, b_start)
+                   for b_start, b_end in breaks):
+            label = t.strftime('%I:%M %p').lstrip('0')  # 9:00 AM
+            slots.append({'time': t.strftime('%H:%M'), 'label': label})
+        t = slot_end
+    return tuple(slots)
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+def compile_rules(version=None):
+    """Build the current clinic's RuleSet from the schedule tables (three small queries)."""
+    from .models import Closure, OpeningHours, ScheduleBreak
+
+    duration = tenancy.slot_duration()
+    # Bind the clinic explicitly: outside a request the managers would otherwise span every clinic.
+    # Read the primary: rules compiled from a lagging replica would be memoised under the new version.
+    with tenancy.activate(tenancy.effective()):
+        hours = {h.weekday: (h.opens, h.closes) for h in OpeningHours.objects.using(DEFAULT_DB_ALIAS)}
+        breaks = list(ScheduleBreak.objects.using(DEFAULT_DB_ALIAS).values_list('weekday', 'start', 'end'))
+        closures = _merge_ranges(Closure.objects.using(DEFAULT_DB_ALIAS).values_list('start_date', 'end_date'))
+    if not hours:
+        start_hour, end_hour = tenancy.slot_hours()
+        default = (time(start_hour, 0), time(end_hour, 0))
+        hours = {weekday: default for weekday in range(7)}
+    weekly = tuple(
+        _day_slots(*hours[weekday], [(s, e) for w, s, e in breaks if w is None or w == weekday], duration)
+        if weekday in hours else ()
+        for weekday in range(7)
+    )
+    return RuleSet(weekly, closures, version)
+
+
+def _new_version():
+    # Time-based, so a version lost from the cache never matches rules compiled before
+    return _time.time_ns()
+
+
+def get_rules():
+    """
+    The current clinic's RuleSet; recompiled only after its schedule changed. The version is read from
+    the cache at most once per SCHEDULE_CHECK_SECONDS.
+    """
+    tenant = tenancy.effective()
+    clinic_id = tenant.id if tenant else None
+    rules = _compiled.get(clinic_id)
+    now = _time.monotonic()
+    if rules is not None and now - _checked.get(clinic_id, 0) < getattr(settings, 'SCHEDULE_CHECK_SECONDS', 1):
+        return rules
+    key = tenancy.cache_key(VERSION_KEY)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    if rules is None or rules.version != version:
+        rules = _compiled[clinic_id] = compile_rules(version)
+    _checked[clinic_id] = now
+    return rules
+
+
+def invalidate(instance=None, **kwargs):
+    """Signal handler: drop the compiled rules of the row's clinic in every process, after commit."""
+    from django.db import transaction
+    from .models import Clinic
+
+    clinic_id = instance.pk if isinstance(instance, Clinic) else getattr(instance, 'clinic_id', None)
+    transaction.on_commit(lambda: _bump(clinic_id))
+
+
+def _bump(clinic_id):
+    """Bump the clinic's cache version (the effective clinic's when clinic_id is None)."""
+    with tenancy.activate(clinic_id) if clinic_id else contextlib.nullcontext():
+        tenant = tenancy.effective()
+        _compiled.pop(tenant.id if tenant else None, None)
+        key = tenancy.cache_key(VERSION_KEY)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
@@ -0,0 +1,183 @@
+"""
+Full-text search over live appointments (patient name, email, phone, message).
+
+SQLite: a contentless FTS5 table, dental_appointment_fts (rowid = appointment id), is kept in sync
+by INSERT/UPDATE/DELETE triggers on dental_appointment, so bulk_create, update() and raw SQL are
+indexed too. The phone is indexed as written and as digits only, so "555-0100" and "5550100" both
+match. Results are ranked with bm25. SQLite migrations that rebuild dental_appointment drop its
+triggers, so ensure_index() (post_migrate) re-installs and refills the index when they are missing.
+
+PostgreSQL: the same columns form a to_tsvector('simple', ...) expression with a GIN index on it,
+ranked with ts_rank. Other databases, and SQLite builds without FTS5, fall back to icontains.
+
+Every search term must match (as a word prefix) somewhere in the four columns.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from . import tenancy
+
+FTS_TABLE = 'dental_appointment_fts'
+FTS_TRIGGERS = ('dental_appointment_fts_insert', 'dental_appointment_fts_delete', 'dental_appointment_fts_update')
+PG_INDEX = 'dental_appointment_search'
+TERM = re.compile(r'\w+', re.UNICODE)
+
+_FTS_COLUMNS = 'name, email, phone, phone_digits, message'
+_DIGITS = "replace(replace(replace(replace(replace(replace({0}, ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '')"
+
+
+def _fts_values(row):
+    return f"{row}.name, {row}.email, {row}.phone, {_DIGITS.format(row + '.phone')}, {row}.message"
+
+
+# Deleting from a contentless table needs the old column values, which the triggers pass on
+SQLITE_DROP = [f'DROP TRIGGER IF EXISTS {name}' for name in FTS_TRIGGERS] + [f'DROP TABLE IF EXISTS {FTS_TABLE}']
+SQLITE_CREATE = SQLITE_DROP + [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({_FTS_COLUMNS}, content='', tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER dental_appointment_fts_insert AFTER INSERT ON dental_appointment BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+    END""",
+    f"""CREATE TRIGGER dental_appointment_fts_delete AFTER DELETE ON dental_appointment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_fts_values('old')});
+    END""",
+    f"""CREATE TRIGGER dental_appointment_fts_update AFTER UPDATE OF name, email, phone, message ON dental_appointment BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_fts_values('old')});
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+    END""",
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) SELECT id, {_fts_values('dental_appointment')} FROM dental_appointment",
+]
+
+# The GIN index and the search query must use exactly this expression
+PG_VECTOR = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(phone, '') "
+    "|| ' ' || regexp_replace(coalesce(phone, ''), '\\D', '', 'g') || ' ' || coalesce(message, ''))"
+)
+PG_CREATE = [f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON dental_appointment USING gin ({PG_VECTOR})']
+PG_DROP = [f'DROP INDEX IF EXISTS {PG_INDEX}']
+
+_fts_available = None
+
+
+def _has_fts5(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def install_index(conn):
+    """(Re)create the search index on `conn` and fill it from the current rows. No-op where unsupported."""
+    global _fts_available
+    if conn.vendor == 'sqlite' and _has_fts5(conn):
+        statements = SQLITE_CREATE
+    elif conn.vendor == 'postgresql':
+        statements = PG_CREATE
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _fts_available = None
+
+
+def drop_index(conn):
+    global _fts_available
+    statements = SQLITE_DROP if conn.vendor == 'sqlite' else PG_DROP if conn.vendor == 'postgresql' else []
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _fts_available = None
+
+
+def ensure_index(using='default', **kwargs):
+    """post_migrate handler: re-install the SQLite index if a table rebuild dropped its triggers."""
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE 'dental_appointment%'")
+        names = {row[0] for row in cursor.fetchall()}
+    # Before migration 0014 (or on a database without dental tables) there is nothing to repair
+    if FTS_TABLE in names and not set(FTS_TRIGGERS) <= names:
+        install_index(conn)
+
+
+def terms(query):
+    """Word tokens of a search box query, lower-cased (punctuation is dropped, as the index does)."""
+    return [t.lower() for t in TERM.findall(query or '')][:20]
+
+
+def backend():
+    """'fts5', 'postgres' or 'like'."""
+    global _fts_available
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    if connection.vendor != 'sqlite':
+        return 'like'
+    if _fts_available is None:
+        with connection.cursor() as cursor:
+            _fts_available = FTS_TABLE in connection.introspection.table_names(cursor)
+    return 'fts5' if _fts_available else 'like'
+
+
+def _pg_tsquery(words):
+    return ' & '.join(f'{w}:*' for w in words)
+
+
+def _fts5_match(words):
+    # Each term quoted (no FTS5 operators from user input) and prefix-matched; implicit AND
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def filter_queryset(queryset, query):
+    """Restrict an Appointment queryset to matches for `query` (every term must match)."""
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    kind = backend()
+    if kind == 'fts5':
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (_fts5_match(words),))
+        )
+    if kind == 'postgres':
+        return queryset.filter(
+            RawSQL(f"{PG_VECTOR} @@ to_tsquery('simple', %s)", (_pg_tsquery(words),), output_field=BooleanField())
+        )
+    condition = Q()
+    for w in words:
+        condition &= (
+            Q(name__icontains=w) | Q(email__icontains=w) | Q(phone__icontains=w) | Q(message__icontains=w)
+        )
+    return queryset.filter(condition)
+
+
+def search_appointments(query, limit=20):
+    """Up to `limit` live appointments matching `query`, best match first (newest first on LIKE fallback)."""
+    from .models import Appointment
+
+    words = terms(query)
+    if not words:
+        return []
+    queryset = Appointment.objects.select_related('resource')
+    kind = backend()
+    if kind == 'fts5':
+        # Top-k by bm25 inside the FTS index, then one primary-key fetch
+        # ...restricted to the current clinic's rows (as the manager is), so other clinics do not use up the top k
+        tenant = tenancy.current()
+        clinic_sql, params = ('', [])
+        if tenant:
+            clinic_sql, params = f' AND rowid IN (SELECT id FROM {Appointment._meta.db_table} WHERE clinic_id = %s)', [tenant.id]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{clinic_sql} ORDER BY rank LIMIT %s',
+                [_fts5_match(words), *params, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        by_id = queryset.in_bulk(ids)
+        return [by_id[pk] for pk in ids if pk in by_id]
+    if kind == 'postgres':
+        rank = RawSQL(f"ts_rank({PG_VECTOR}, to_tsquery('simple', %s))", (_pg_tsquery(words),), output_field=FloatField())
+        return list(filter_queryset(queryset, query).annotate(search_rank=rank).order_by('-search_rank', '-created_at')[:limit])
+    return list(filter_queryset(queryset, query).order_by('-created_at')[:limit])
@@ -1,17 +1,29 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Dentist, Service, Appointment
+from config.fieldsets import SparseFieldsMixin
+from . import tenancy
+from .images import srcset_data
+from .models import Dentist, Service, Appointment, Resource, SlotHold
 
 
-class DentistSerializer(serializers.ModelSerializer):
+class DentistSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Dentist
         fields = [
             'id', 'name', 'title', 'bio', 'experience_years',
-            'philosophy', 'certifications', 'image'
+            'philosophy', 'certifications', 'image', 'image_srcset'
         ]
+        # Model fields read by method fields (for ?fields= column narrowing, see config.fieldsets)
+        field_sources = {'image_srcset': ['image_variants']}
+
+    def get_image_srcset(self, obj):
+        request = self.context.get('request')
+        return srcset_data(obj.image_variants, request.build_absolute_uri if request else None)
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     benefits_list = serializers.SerializerMethodField()
 
     class Meta:
@@ -20,6 +32,7 @@ class ServiceSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'short_description', 'description',
             'benefits', 'benefits_list', 'experience_highlight', 'icon', 'order'
         ]
+        field_sources = {'benefits_list': ['benefits']}
 
     def get_benefits_list(self, obj):
         if not obj.benefits:
@@ -27,12 +40,93 @@ class ServiceSerializer(serializers.ModelSerializer):
         return [b.strip() for b in obj.benefits.splitlines() if b.strip()]
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class ResourceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Resource
+        fields = ['id', 'name', 'kind', 'dentist']
+
+
+class ClinicResourceField(serializers.PrimaryKeyRelatedField):
+    """Resource by id, limited to the current clinic (the field queryset is built at import time from `all_clinics`)."""
+
+    def get_queryset(self):
+        return tenancy.scoped(super().get_queryset())
+
+
+class SlotFieldsMixin:
+    """Validation shared by serializers with preferred_date / slot_time / resource fields."""
+
+    def validate_preferred_date(self, value):
+        if value is None:
+            return value
+        from django.utils import timezone
+        if value < timezone.localdate():
+            raise serializers.ValidationError('Preferred date cannot be in the past.')
+        return value
+
+    def validate_slot_time(self, value):
+        if value is None:
+            return value
+        from .schedule import get_rules
+        slots = [s['time'] for s in get_rules().all_slot_times()]
+        value_str = value.strftime('%H:%M')
+        if not slots or value_str < slots[0] or value_str > slots[-1]:
+            raise serializers.ValidationError('Selected time is outside working hours.')
+        if value_str not in slots:
+            raise serializers.ValidationError('Invalid slot time.')
+        return value
+
+    def validate_schedule(self, attrs):
+        """
+        Reject dates the clinic is closed, slots outside that day's hours and slots that have already
+        started today (no DB or API call).
+        """
+        preferred_date = attrs.get('preferred_date')
+        if not preferred_date:
+            return
+        from django.utils import timezone
+        from .schedule import get_rules
+        rules = get_rules()
+        if rules.is_closed(preferred_date):
+            raise serializers.ValidationError({'preferred_date': 'The clinic is closed on this date.'})
+        slot_time = attrs.get('slot_time')
+        if slot_time and not rules.is_open_slot(preferred_date, slot_time):
+            raise serializers.ValidationError({'slot_time': 'Selected time is outside working hours on this date.'})
+        now = timezone.localtime()
+        if slot_time and preferred_date == now.date() and slot_time <= now.time():
+            raise serializers.ValidationError({'slot_time': 'This time has already passed. Please choose a later slot.'})
+
+    def allocate_resource(self, attrs):
+        """
+        Check the slot still has a place and set attrs['resource'] to the requested or first free one.
+        Calendar conflicts come from context['busy'] (dental.views.prefetch_busy), fetched before validation.
+        """
+        from .availability import allocate
+        requested = attrs.get('resource')
+        available, resource = allocate(
+            attrs['preferred_date'], attrs['slot_time'], requested.pk if requested else None,
+            busy=self.context.get('busy'),
+        )
+        if not available:
+            raise serializers.ValidationError(
+                {'slot_time': 'This slot is no longer available. Please choose another.'}
+            )
+        attrs['resource'] = resource
+
+
+class AppointmentSerializer(SlotFieldsMixin, serializers.ModelSerializer):
+    # Optional: book a specific chair/dentist; otherwise the first free resource is assigned
+    resource = ClinicResourceField(
+        queryset=Resource.all_clinics.filter(is_active=True), required=False, allow_null=True,
+    )
+    # Token from POST /api/appointments/holds/; a matching active hold is consumed instead of re-checking capacity
+    hold = serializers.CharField(write_only=True, required=False, allow_blank=True)
+
     class Meta:
         model = Appointment
         fields = [
             'id', 'name', 'email', 'phone', 'service',
-            'preferred_date', 'slot_time', 'preferred_time', 'message', 'created_at', 'customer'
+            'preferred_date', 'slot_time', 'preferred_time', 'message', 'created_at', 'customer', 'resource', 'hold'
         ]
         read_only_fields = ['created_at', 'customer']
 
@@ -51,38 +145,97 @@ class AppointmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Message must be 2000 characters or fewer.')
         return value or ''
 
-    def validate_preferred_date(self, value):
-        if value is None:
-            return value
-        from django.utils import timezone
-        if value < timezone.localdate():
-            raise serializers.ValidationError('Preferred date cannot be in the past.')
-        return value
-
-    def validate_slot_time(self, value):
-        if value is None:
-            return value
-        from datetime import time
-        from django.conf import settings
-        start_h = getattr(settings, 'APPOINTMENT_SLOT_START_HOUR', 9)
-        end_h = getattr(settings, 'APPOINTMENT_SLOT_END_HOUR', 17)
-        slot_min = getattr(settings, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30)
-        # Check value is on a valid slot boundary
-        total_minutes = value.hour * 60 + value.minute
-        start_minutes = start_h * 60
-        end_minutes = end_h * 60
-        if total_minutes < start_minutes or total_minutes >= end_minutes:
-            raise serializers.ValidationError('Selected time is outside working hours.')
-        if (total_minutes - start_minutes) % slot_min != 0:
-            raise serializers.ValidationError('Invalid slot time.')
-        return value
-
     def validate(self, attrs):
+        self.validate_schedule(attrs)
+        hold = SlotHold.lookup(attrs.pop('hold', ''))
         preferred_date = attrs.get('preferred_date')
         slot_time = attrs.get('slot_time')
         if preferred_date and slot_time:
-            if Appointment.objects.filter(preferred_date=preferred_date, slot_time=slot_time).exists():
+            requested = attrs.get('resource')
+            if (
+                hold is not None
+                and (hold.preferred_date, hold.slot_time) == (preferred_date, slot_time)
+                and (requested is None or requested.pk == hold.resource_id)
+            ):
+                attrs['resource'] = hold.resource
+                attrs['hold'] = hold
+            else:
+                # No (matching) hold, or it expired: book only if the slot is still free
+                self.allocate_resource(attrs)
+        return attrs
+
+    def create(self, validated_data):
+        hold = validated_data.pop('hold', None)
+        with transaction.atomic():
+            # Consume the hold in the same transaction as the insert; a second submit finds it gone
+            if hold is not None and not SlotHold.objects.filter(pk=hold.pk).delete()[0]:
                 raise serializers.ValidationError(
                     {'slot_time': 'This slot is no longer available. Please choose another.'}
                 )
+            return super().create(validated_data)
+
+
+class SlotHoldSerializer(SlotFieldsMixin, serializers.ModelSerializer):
+    resource = ClinicResourceField(
+        queryset=Resource.all_clinics.filter(is_active=True), required=False, allow_null=True,
+    )
+
+    class Meta:
+        model = SlotHold
+        fields = ['token', 'preferred_date', 'slot_time', 'resource', 'expires_at']
+        read_only_fields = ['token', 'expires_at']
+
+    def validate(self, attrs):
+        self.validate_schedule(attrs)
+        self.allocate_resource(attrs)
+        return attrs
+
+
+class AppointmentRescheduleSerializer(SlotFieldsMixin, serializers.Serializer):
+    """New slot for an existing booking. Capacity is checked by dental.booking.reschedule."""
+    preferred_date = serializers.DateField()
+    slot_time = serializers.TimeField()
+    resource = ClinicResourceField(
+        queryset=Resource.all_clinics.filter(is_active=True), required=False, allow_null=True,
+    )
+    hold = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        self.validate_schedule(attrs)
+        return attrs
+
+
+class AppointmentHistorySerializer(serializers.Serializer):
+    """Read-only booking history item; accepts Appointment and ArchivedAppointment instances."""
+    id = serializers.IntegerField()
+    service = serializers.CharField()
+    service_display = serializers.CharField(source='get_service_display')
+    preferred_date = serializers.DateField()
+    slot_time = serializers.TimeField()
+    preferred_time = serializers.CharField()
+    message = serializers.CharField()
+    is_confirmed = serializers.BooleanField()
+    resource = serializers.PrimaryKeyRelatedField(read_only=True)
+    created_at = serializers.DateTimeField()
+    is_archived = serializers.BooleanField()
+    cancelled_at = serializers.DateTimeField()
+
+
+class AppointmentImportSerializer(AppointmentSerializer):
+    """
+    Row serializer for bulk imports. Same field and slot rules as AppointmentSerializer,
+    but slot conflicts and resource assignment are handled once per batch by the import command, not per row.
+    Pass context={'allow_past': True} to accept historic bookings.
+    """
+
+    def validate_preferred_date(self, value):
+        if self.context.get('allow_past'):
+            return value
+        return super().validate_preferred_date(value)
+
+    def validate(self, attrs):
+        attrs.pop('hold', None)
+        # Historic bookings may predate the current opening hours
+        if not self.context.get('allow_past'):
+            self.validate_schedule(attrs)
         return attrs
@@ -0,0 +1,272 @@
+"""
+Several clinics served from one deployment.
+
+Each request is bound to a Clinic by TenantMiddleware: the clinic slug in the TENANT_HEADER header
+(default X-Clinic) when sent, otherwise the request host (Clinic.hosts), otherwise the default clinic
+(TENANT_DEFAULT). With TENANT_STRICT_HOSTS an unknown host is a 404 instead, except under
+TENANT_EXEMPT_PATHS (health checks).
+
+Clinic-owned models (dental.models.ClinicScoped) use a manager that filters on the current clinic,
+and new rows get it as their clinic. Outside a request (management commands, shell) no clinic is
+bound: querysets span every clinic while settings and new rows use the default clinic; commands that
+work per clinic loop over `clinics()` under `activate()`. Slot hours, slot length, the Google Calendar id and the
+service-account file are resolved once per clinic into an immutable Tenant (clinic value, else the
+global setting; only the default clinic inherits GOOGLE_CALENDAR_ID). The registry of clinics is
+memoised per process and reloaded when a Clinic is saved, so resolving a request costs one cache read
+and no queries. As for the compiled schedule, the trigger is a version number in the Django cache,
+which all workers share (settings.CACHES). It is bumped once the save commits and the registry is
+loaded from the primary.
+
+Cache keys that depend on clinic data go through `cache_key()`. Customer accounts and the Calendar
+mirror (keyed by calendar id) are shared by all clinics.
+
+Staff accounts are shared too, but a staff user works only on the clinics that list them in
+Clinic.staff (superusers on every clinic): `is_clinic_staff()` is checked by the admin, staff search,
+the .ics feed and cancel/reschedule. The memberships are part of the registry, so the check costs no
+query; changing them reloads the registry like saving a clinic.
+"""
+import contextlib
+import contextvars
+import os
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+from django.http import JsonResponse
+from django.http.request import split_domain_port
+
+VERSION_KEY = 'dental:clinics:version'
+
+_current = contextvars.ContextVar('dental_clinic', default=None)
+_registry = None
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """A clinic with its settings resolved (see module docstring)."""
+    id: int
+    slug: str
+    name: str
+    calendar_id: str
+    credentials: str
+    slot_start_hour: int
+    slot_end_hour: int
+    slot_duration: int
+    staff_ids: frozenset = frozenset()
+
+
+class Registry:
+    """Active clinics by id, slug and host, plus the default one."""
+
+    def __init__(self, tenants, hosts, default, version=None):
+        self.by_id = {t.id: t for t in tenants}
+        self.by_slug = {t.slug: t for t in tenants}
+        self.by_host = hosts
+        self.default = default
+        self.version = version
+
+
+def _credentials_path(value):
+    if not value:
+        return getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', '') or ''
+    return value if os.path.isabs(value) else str(settings.BASE_DIR / value)
+
+
+def _tenant(clinic, is_default, staff_ids=frozenset()):
+    def setting(value, name, default):
+        return value if value is not None else getattr(settings, name, default)
+
+    return Tenant(
+        id=clinic.pk,
+        slug=clinic.slug,
+        name=clinic.name,
+        calendar_id=clinic.google_calendar_id or (getattr(settings, 'GOOGLE_CALENDAR_ID', '') if is_default else ''),
+        credentials=_credentials_path(clinic.google_credentials),
+        slot_start_hour=setting(clinic.slot_start_hour, 'APPOINTMENT_SLOT_START_HOUR', 9),
+        slot_end_hour=setting(clinic.slot_end_hour, 'APPOINTMENT_SLOT_END_HOUR', 17),
+        slot_duration=setting(clinic.slot_duration_minutes, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30),
+        staff_ids=frozenset(staff_ids),
+    )
+
+
+def load_registry(version=None):
+    """Build the Registry from the Clinic table and the staff memberships (two queries)."""
+    from .models import Clinic
+
+    try:
+        # Primary, not a replica: the registry is memoised under the current version until the next change
+        clinics = list(Clinic.objects.using(DEFAULT_DB_ALIAS).filter(is_active=True).order_by('pk'))
+        staff = {}
+        memberships = Clinic.staff.through.objects.using(DEFAULT_DB_ALIAS).values_list('clinic_id', 'user_id')
+        for clinic_id, user_id in memberships:
+            staff.setdefault(clinic_id, set()).add(user_id)
+    except DatabaseError:
+        # Table not migrated yet: no clinics, and a version that never matches so the next call retries
+        return Registry([], {}, None)
+    default_slug = getattr(settings, 'TENANT_DEFAULT', 'default')
+    default = next((c for c in clinics if c.slug == default_slug), clinics[0] if clinics else None)
+    tenants, hosts = [], {}
+    for clinic in clinics:
+        tenant = _tenant(clinic, clinic is default, staff.get(clinic.pk, ()))
+        tenants.append(tenant)
+        for host in clinic.host_list():
+            hosts.setdefault(host, tenant)
+    return Registry(tenants, hosts, next((t for t in tenants if default and t.id == default.pk), None), version)
+
+
+def _new_version():
+    # Time-based, so a version lost from the cache never matches a registry loaded before
+    return time.time_ns()
+
+
+def registry():
+    """The current Registry; reloaded only after a Clinic changed (one cache read otherwise)."""
+    global _registry
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), None)
+        version = cache.get(VERSION_KEY)
+    if _registry is None or _registry.version != version:
+        _registry = load_registry(version)
+    return _registry
+
+
+def invalidate(**kwargs):
+    """Signal handler: reload the clinic registry in every process, once the change is committed."""
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    global _registry
+    _registry = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _new_version(), None)
+
+
+def current():
+    """The clinic bound to this request / block, or None."""
+    return _current.get()
+
+
+def effective():
+    """The current clinic, else the default one (None only before any clinic exists)."""
+    return _current.get() or registry().default
+
+
+def is_clinic_staff(user, tenant=None):
+    """True if `user` is active staff of `tenant` (default: the effective clinic) or a superuser."""
+    if not (user is not None and user.is_authenticated and user.is_active and user.is_staff):
+        return False
+    if user.is_superuser:
+        return True
+    if tenant is None:
+        tenant = effective()
+    elif not isinstance(tenant, Tenant):
+        tenant = registry().by_id.get(tenant)
+    return tenant is not None and user.pk in tenant.staff_ids
+
+
+def default_clinic_id():
+    """Field default for ClinicScoped.clinic: the effective clinic's id."""
+    tenant = effective()
+    return tenant.id if tenant else None
+
+
+def scoped(queryset):
+    """
+    `queryset` restricted to the current clinic (the ClinicScoped manager applies this). With no clinic
+    bound it is left as is, so maintenance commands see every clinic and nothing queries at import time.
+    """
+    tenant = _current.get()
+    return queryset.filter(clinic_id=tenant.id) if tenant else queryset
+
+
+def cache_key(key):
+    """`key` namespaced by the effective clinic."""
+    tenant = effective()
+    return f'clinic:{tenant.id}:{key}' if tenant else key
+
+
+def slot_duration():
+    tenant = effective()
+    return tenant.slot_duration if tenant else getattr(settings, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30)
+
+
+def slot_hours():
+    """(first hour, end hour) used when the clinic has no OpeningHours rows."""
+    tenant = effective()
+    if tenant:
+        return tenant.slot_start_hour, tenant.slot_end_hour
+    return getattr(settings, 'APPOINTMENT_SLOT_START_HOUR', 9), getattr(settings, 'APPOINTMENT_SLOT_END_HOUR', 17)
+
+
+def calendar_id():
+    tenant = effective()
+    return tenant.calendar_id if tenant else (getattr(settings, 'GOOGLE_CALENDAR_ID', None) or '')
+
+
+def credentials_path():
+    tenant = effective()
+    return tenant.credentials if tenant else (getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', None) or '')
+
+
+@contextlib.contextmanager
+def activate(tenant):
+    """Bind `tenant` (a Tenant or a clinic id) for the block."""
+    if tenant is not None and not isinstance(tenant, Tenant):
+        tenant = registry().by_id.get(tenant)
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def clinics(slug=None):
+    """Every active clinic, or only the one with `slug` (LookupError if there is none)."""
+    tenants = list(registry().by_id.values())
+    if slug:
+        tenants = [t for t in tenants if t.slug == slug]
+        if not tenants:
+            raise LookupError(f'No active clinic with slug "{slug}".')
+    return tenants
+
+
+def resolve(request):
+    """(tenant, error message) for a request; see the module docstring for the order."""
+    reg = registry()
+    header = getattr(settings, 'TENANT_HEADER', 'X-Clinic')
+    slug = request.headers.get(header, '').strip().lower() if header else ''
+    if slug:
+        tenant = reg.by_slug.get(slug)
+        return tenant, None if tenant else f'Unknown clinic "{slug}".'
+    host, _ = split_domain_port(request.get_host())
+    tenant = reg.by_host.get(host)
+    if tenant is None:
+        exempt = request.path.startswith(tuple(getattr(settings, 'TENANT_EXEMPT_PATHS', ('/health/',))))
+        if getattr(settings, 'TENANT_STRICT_HOSTS', False) and reg.by_id and not exempt:
+            return None, 'No clinic is served at this address.'
+        tenant = reg.default
+    return tenant, None
+
+
+class TenantMiddleware:
+    """Bind the request's clinic for the rest of the middleware chain and the view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tenant, error = resolve(request)
+        if error:
+            return JsonResponse({'success': False, 'message': error}, status=404)
+        request.tenant = tenant
+        token = _current.set(tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,131 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dental import availability, booking, schedule, tenancy
+from dental.models import Appointment, ArchivedAppointment, Clinic
+
+User = get_user_model()
+
+
+def open_day(after):
+    rules = schedule.get_rules()
+    day = after
+    while rules.is_closed(day):
+        day += timedelta(days=1)
+    return day
+
+
+class ManageBookingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create(username='owner')
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.other = User.objects.create(username='other')
+        Clinic.objects.get(pk=tenancy.registry().default.id).staff.add(self.staff)
+        # Membership changes reload the clinic registry on commit, which never comes inside TestCase
+        tenancy._bump()
+        self.addCleanup(tenancy._bump)
+        with tenancy.activate(tenancy.registry().default):
+            self.day = open_day(timezone.localdate() + timedelta(days=2))
+            self.slots = [s['time'] for s in schedule.get_rules().slot_times(self.day)]
+        self.appointment = self.book(self.slots[0], customer=self.owner)
+        # No Google Calendar in tests: every slot is free apart from bookings
+        patcher = mock.patch.object(availability.calendar_service, 'get_busy_slot_times_by_calendar', return_value={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def book(self, slot, customer=None, day=None):
+        return Appointment.objects.create(
+            clinic_id=tenancy.registry().default.id, name='Pat Patient', email='pat@example.com',
+            phone='0123456789', service='general', preferred_date=day or self.day,
+            slot_time=datetime.strptime(slot, '%H:%M').time(), preferred_time='morning', customer=customer,
+        )
+
+    def post(self, action, data=None, user=None, appointment=None):
+        self.client.force_authenticate(user)
+        appointment = appointment or self.appointment
+        return self.client.post(f'/api/appointments/{appointment.pk}/{action}/', data or {}, format='json')
+
+    def move_to(self, slot, data=None, user=None):
+        data = {'preferred_date': self.day.isoformat(), 'slot_time': slot, **(data or {})}
+        return self.post('reschedule', data, user=user)
+
+    def test_token_owner_and_staff_can_reschedule(self):
+        token = booking.manage_token(self.appointment)
+        for slot, kwargs in [
+            (self.slots[1], {'data': {'token': token}}),
+            (self.slots[2], {'user': self.owner}),
+            (self.slots[3], {'user': self.staff}),
+        ]:
+            response = self.move_to(slot, **kwargs)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.appointment.refresh_from_db()
+            self.assertEqual(self.appointment.slot_time.strftime('%H:%M'), slot)
+
+    def test_other_user_and_bad_token_are_forbidden(self):
+        self.assertEqual(self.move_to(self.slots[1], user=self.other).status_code, 403)
+        self.assertEqual(self.move_to(self.slots[1], data={'token': 'not-a-token'}).status_code, 403)
+        other_booking = self.book(self.slots[2])
+        token = booking.manage_token(other_booking)
+        self.assertEqual(self.move_to(self.slots[1], data={'token': token}).status_code, 403)
+        self.assertEqual(self.post('cancel', user=self.other).status_code, 403)
+        self.assertTrue(Appointment.objects.filter(pk=self.appointment.pk).exists())
+
+    def test_move_into_full_slot_is_rejected(self):
+        self.book(self.slots[1])
+        response = self.move_to(self.slots[1], user=self.owner)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slot_time', response.json()['errors'])
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.slot_time.strftime('%H:%M'), self.slots[0])
+
+    def test_move_into_same_slot_succeeds(self):
+        response = self.move_to(self.slots[0], user=self.owner)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_reschedule_updates_preferred_time(self):
+        slot = next(s for s in self.slots if s >= '12:00')
+        self.assertEqual(self.move_to(slot, user=self.owner).status_code, 200)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.preferred_time, booking.period_of(self.appointment.slot_time))
+        self.assertNotEqual(self.appointment.preferred_time, 'morning')
+
+    def test_slot_that_has_started_today_is_rejected(self):
+        # Noon on the booking's day: the slots before it have started
+        now = timezone.make_aware(datetime.combine(self.day, time(12, 0)))
+        with mock.patch('django.utils.timezone.localtime', return_value=now), \
+                mock.patch('django.utils.timezone.localdate', return_value=self.day):
+            response = self.move_to(self.slots[1], user=self.owner)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already passed', response.json()['errors']['slot_time'][0])
+
+    def test_cancel_frees_slot_and_archives(self):
+        with tenancy.activate(tenancy.registry().default):
+            self.assertEqual(availability.allocate(self.day, self.appointment.slot_time), (False, None))
+        response = self.post('cancel', user=self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Appointment.all_clinics.filter(pk=self.appointment.pk).exists())
+        archived = ArchivedAppointment.all_clinics.get(pk=self.appointment.pk)
+        self.assertIsNotNone(archived.cancelled_at)
+        with tenancy.activate(tenancy.registry().default):
+            self.assertEqual(availability.allocate(self.day, self.appointment.slot_time), (True, None))
+
+    def test_move_beyond_bootstrap_range_drops_cached_availability(self):
+        from django.core.cache import cache
+
+        from dental import bootstrap
+
+        far_day = open_day(timezone.localdate() + timedelta(days=bootstrap.MAX_DAYS + 5))
+        with tenancy.activate(tenancy.registry().default):
+            slot = schedule.get_rules().slot_times(far_day)[0]['time']
+            key = tenancy.cache_key(bootstrap.VERSION_KEY)
+            before = cache.get(key, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('reschedule', {'preferred_date': far_day.isoformat(), 'slot_time': slot}, user=self.owner)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotEqual(cache.get(key, 0), before)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import httplib2
+from django.test import TestCase
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+
+from dental.calendar_service import sync_busy_periods
+from dental.models import CalendarBusyPeriod, CalendarSyncState
+
+CALENDAR_ID = 'clinic@example.com'
+
+
+def event(event_id, start, hours=1):
+    return {
+        'id': event_id,
+        'start': {'dateTime': start.isoformat()},
+        'end': {'dateTime': (start + timedelta(hours=hours)).isoformat()},
+    }
+
+
+class FakeEvents:
+    """events() of a fake Calendar API: 410 Gone for expired sync tokens, `full_pages` for a full listing."""
+
+    def __init__(self, full_pages, expired_tokens=(), fail_full=False):
+        self.full_pages = full_pages
+        self.expired_tokens = set(expired_tokens)
+        self.fail_full = fail_full
+        self.calls = []
+
+    def list(self, **params):
+        self.calls.append(params)
+        return FakeRequest(self, params)
+
+
+class FakeRequest:
+    def __init__(self, events, params):
+        self.events = events
+        self.params = params
+
+    def execute(self):
+        token = self.params.get('syncToken')
+        if token in self.events.expired_tokens:
+            raise HttpError(httplib2.Response({'status': 410}), b'{"error": {"code": 410, "message": "Gone"}}')
+        if token is None and self.events.fail_full:
+            raise HttpError(httplib2.Response({'status': 503}), b'{"error": {"code": 503}}')
+        index = int(self.params.get('pageToken') or 0)
+        page = dict(self.events.full_pages[index])
+        if index + 1 < len(self.events.full_pages):
+            page['nextPageToken'] = str(index + 1)
+        return page
+
+
+class FakeService:
+    def __init__(self, events):
+        self._events = events
+
+    def events(self):
+        return self._events
+
+
+class ExpiredSyncTokenTests(TestCase):
+    def setUp(self):
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        CalendarSyncState.objects.create(calendar_id=CALENDAR_ID, sync_token='expired-token')
+        # Mirror rows from earlier syncs: one still in the calendar, one deleted since
+        for event_id in ('kept', 'deleted-meanwhile'):
+            CalendarBusyPeriod.objects.create(
+                calendar_id=CALENDAR_ID, event_id=event_id, start=self.start, end=self.start + timedelta(hours=1),
+            )
+
+    def test_expired_token_runs_full_resync_and_replaces_mirror(self):
+        events = FakeEvents(
+            full_pages=[
+                {'items': [event('kept', self.start + timedelta(hours=2)), event('new', self.start)]},
+                {'items': [event('next-page', self.start + timedelta(days=1))], 'nextSyncToken': 'fresh-token'},
+            ],
+            expired_tokens={'expired-token'},
+        )
+
+        stats = sync_busy_periods(FakeService(events), CALENDAR_ID)
+
+        self.assertTrue(stats['full'])
+        self.assertEqual(events.calls[0]['syncToken'], 'expired-token')
+        self.assertNotIn('syncToken', events.calls[1])
+        self.assertEqual(CalendarSyncState.objects.get(calendar_id=CALENDAR_ID).sync_token, 'fresh-token')
+        periods = CalendarBusyPeriod.objects.filter(calendar_id=CALENDAR_ID)
+        self.assertEqual(sorted(periods.values_list('event_id', flat=True)), ['kept', 'new', 'next-page'])
+        self.assertEqual(periods.get(event_id='kept').start, self.start + timedelta(hours=2))
+
+    def test_expired_token_is_cleared_when_full_resync_fails(self):
+        events = FakeEvents(full_pages=[], expired_tokens={'expired-token'}, fail_full=True)
+
+        with self.assertRaises(HttpError):
+            sync_busy_periods(FakeService(events), CALENDAR_ID)
+
+        self.assertEqual(CalendarSyncState.objects.get(calendar_id=CALENDAR_ID).sync_token, '')
+        # The mirror is untouched until a full sync succeeds
+        self.assertEqual(CalendarBusyPeriod.objects.filter(calendar_id=CALENDAR_ID).count(), 2)
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.db_router import PIN_COOKIE, ReplicaRoutingMiddleware, _user_key
+
+REPLICA = 'replica_test'
+
+# A second SQLite database standing in for a lagging replica: the test runner creates (and migrates) it
+# like `default`, but nothing is copied into it, so a read that reaches it does not see the primary's rows.
+if REPLICA not in connections.settings:
+    _default = connections.settings[DEFAULT_DB_ALIAS]
+    connections.settings[REPLICA] = {
+        **_default,
+        'NAME': f"{_default['NAME']}_replica",
+        'TEST': {**_default['TEST'], 'NAME': None, 'MIRROR': None},
+    }
+
+User = get_user_model()
+
+
+def read_view(request):
+    """Where an unqualified read goes, and whether it sees the user `ada`."""
+    queryset = User.objects.filter(username='ada')
+    return HttpResponse(f'{queryset.db} {queryset.exists()}')
+
+
+def atomic_read_view(request):
+    with transaction.atomic():
+        queryset = User.objects.filter(username='ada')
+        return HttpResponse(f'{queryset.db} {queryset.exists()}')
+
+
+def write_view(request):
+    User.objects.create(username='grace')
+    queryset = User.objects.filter(username='grace')
+    return HttpResponse(f'{queryset.db} {queryset.exists()}')
+
+
+@override_settings(
+    DATABASE_READ_REPLICAS=[REPLICA],
+    READ_YOUR_WRITES_SECONDS=5,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    # Not TestCase: its wrapping transaction would route every read to the primary
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create(username='ada')
+
+    def call(self, view, request, user=None):
+        from django.contrib.auth.models import AnonymousUser
+
+        request.user = user or AnonymousUser()
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_unpinned_safe_read_uses_replica(self):
+        response = self.call(read_view, self.factory.get('/'))
+        self.assertEqual(response.content.decode(), f'{REPLICA} False')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_read_inside_atomic_uses_primary(self):
+        response = self.call(atomic_read_view, self.factory.get('/'))
+        self.assertEqual(response.content.decode(), f'{DEFAULT_DB_ALIAS} True')
+
+    def test_unsafe_method_uses_primary(self):
+        response = self.call(read_view, self.factory.post('/'))
+        self.assertEqual(response.content.decode(), f'{DEFAULT_DB_ALIAS} True')
+
+    def test_write_moves_rest_of_request_to_primary(self):
+        response = self.call(write_view, self.factory.get('/'))
+        self.assertEqual(response.content.decode(), f'{DEFAULT_DB_ALIAS} True')
+
+    def test_write_pins_client_by_cookie(self):
+        response = self.call(write_view, self.factory.post('/'))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertEqual(cookie['samesite'], 'Lax')
+
+        pinned = self.factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = cookie.value
+        self.assertEqual(self.call(read_view, pinned).content.decode(), f'{DEFAULT_DB_ALIAS} True')
+
+        expired = self.factory.get('/')
+        expired.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.call(read_view, expired).content.decode(), f'{REPLICA} False')
+
+    def test_write_pins_user_by_cache_marker(self):
+        from django.core.cache import cache
+
+        self.call(write_view, self.factory.post('/'), user=self.user)
+        self.assertIsNotNone(cache.get(_user_key(self.user.pk)))
+
+        # Same user from another device: no cookie, only the Bearer token
+        token = RefreshToken.for_user(self.user).access_token
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.call(read_view, request).content.decode(), f'{DEFAULT_DB_ALIAS} True')
+
+        other = User.objects.create(username='linus')
+        token = RefreshToken.for_user(other).access_token
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.call(read_view, request).content.decode(), f'{REPLICA} False')
+
+    def test_cross_site_cookie_on_https(self):
+        with self.settings(CORS_ALLOW_CREDENTIALS=True):
+            response = self.call(write_view, self.factory.post('/', secure=True))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['samesite'], 'None')
+        self.assertTrue(cookie['secure'])
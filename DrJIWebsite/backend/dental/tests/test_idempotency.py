@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from config.idempotency import _row_key, idempotent
+from dental.models import IdempotencyKey
+
+
+class CountingView(APIView):
+    authentication_classes = []
+    calls = 0
+    status_code = 201
+
+    @idempotent('test')
+    def post(self, request):
+        CountingView.calls += 1
+        return Response({'call': CountingView.calls}, status=CountingView.status_code)
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        CountingView.calls = 0
+        CountingView.status_code = 201
+        self.factory = APIRequestFactory()
+
+    def post(self, body, key='retry-1'):
+        request = self.factory.post('/test/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        response = CountingView.as_view()(request)
+        response.render()
+        return response
+
+    def test_retry_replays_first_response(self):
+        first = self.post({'a': 1})
+        retry = self.post({'a': 1})
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.post({'a': 1})
+        self.assertEqual(self.post({'a': 2}).status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_failed_request_releases_key(self):
+        CountingView.status_code = 400
+        self.post({'a': 1})
+        self.assertFalse(IdempotencyKey.objects.exists())
+        CountingView.status_code = 201
+        self.assertEqual(self.post({'a': 1}).status_code, 201)
+        self.assertEqual(CountingView.calls, 2)
+
+    def test_in_flight_key_is_not_run_twice(self):
+        IdempotencyKey.objects.create(
+            key=_row_key('test', 'retry-1', None), fingerprint='x', expires_at=timezone.now() + timedelta(minutes=1),
+        )
+        with self.settings(IDEMPOTENCY_WAIT_SECONDS=0.1):
+            self.assertEqual(self.post({'a': 1}).status_code, 409)
+        self.assertEqual(CountingView.calls, 0)
+
+    def test_expired_lock_is_taken_over(self):
+        IdempotencyKey.objects.create(
+            key=_row_key('test', 'retry-1', None), fingerprint='x', expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(self.post({'a': 1}).status_code, 201)
+        self.assertEqual(CountingView.calls, 1)
@@ -0,0 +1,104 @@
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dental import booking, feeds, tenancy
+from dental.models import Appointment, Clinic, Service
+
+User = get_user_model()
+
+
+class TenantIsolationTests(TestCase):
+    def setUp(self):
+        self.main = Clinic.objects.get(pk=tenancy.registry().default.id)
+        self.north = Clinic.objects.create(name='North', slug='north', hosts='north.example.com\nNorth.Example.org')
+        self.main_staff = User.objects.create(username='main-staff', is_staff=True)
+        self.north_staff = User.objects.create(username='north-staff', is_staff=True)
+        self.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.main.staff.add(self.main_staff)
+        self.north.staff.add(self.north_staff)
+        # Clinic and membership changes reload the registry on commit, which never comes inside TestCase
+        tenancy._bump()
+        self.addCleanup(tenancy._bump)
+        self.factory = RequestFactory()
+
+    def book(self, clinic):
+        return Appointment.objects.create(
+            clinic=clinic, name='Pat Patient', email='pat@example.com', phone='0123456789', service='general',
+            preferred_date=timezone.localdate() + timedelta(days=3), slot_time=time(10, 0),
+        )
+
+    def test_header_selects_clinic(self):
+        request = self.factory.get('/api/services/', HTTP_X_CLINIC='North')
+        tenant, error = tenancy.resolve(request)
+        self.assertIsNone(error)
+        self.assertEqual(tenant.id, self.north.pk)
+
+        tenant, error = tenancy.resolve(self.factory.get('/api/services/', HTTP_X_CLINIC='nowhere'))
+        self.assertIsNone(tenant)
+        self.assertIn('nowhere', error)
+
+    def test_host_selects_clinic(self):
+        tenant, _ = tenancy.resolve(self.factory.get('/api/services/', HTTP_HOST='north.example.org:8443'))
+        self.assertEqual(tenant.id, self.north.pk)
+        tenant, _ = tenancy.resolve(self.factory.get('/api/services/', HTTP_HOST='unknown.example.com'))
+        self.assertEqual(tenant.id, self.main.pk)
+
+    def test_strict_hosts_reject_unknown_host(self):
+        client = APIClient()
+        with self.settings(TENANT_STRICT_HOSTS=True, ALLOWED_HOSTS=['*']):
+            self.assertEqual(client.get('/api/services/', HTTP_HOST='unknown.example.com').status_code, 404)
+            self.assertEqual(client.get('/api/services/', HTTP_HOST='north.example.com').status_code, 200)
+            self.assertNotEqual(client.get('/health/live', HTTP_HOST='unknown.example.com').status_code, 404)
+
+    def test_querysets_are_scoped_to_bound_clinic(self):
+        Service.objects.create(clinic=self.main, name='Cleaning', slug='cleaning')
+        Service.objects.create(clinic=self.north, name='Whitening', slug='whitening')
+        with tenancy.activate(self.north.pk):
+            self.assertEqual(list(Service.objects.values_list('slug', flat=True)), ['whitening'])
+            created = Service.objects.create(name='Implants', slug='implants')
+        self.assertEqual(created.clinic_id, self.north.pk)
+        with tenancy.activate(self.main.pk):
+            self.assertEqual(list(Service.objects.values_list('slug', flat=True)), ['cleaning'])
+
+        response = APIClient().get('/api/services/', HTTP_X_CLINIC='north')
+        self.assertEqual({s['slug'] for s in response.json()}, {'whitening', 'implants'})
+
+    def test_staff_manage_only_their_clinics_bookings(self):
+        appointment = self.book(self.north)
+        request = self.factory.post('/')
+        for user, allowed in [(self.north_staff, True), (self.main_staff, False), (self.admin, True)]:
+            request.user = user
+            self.assertIs(booking.can_manage(request, appointment), allowed, user.username)
+
+    def test_staff_search_and_feed_need_clinic_membership(self):
+        client = APIClient()
+        client.force_authenticate(self.main_staff)
+        self.assertEqual(client.get('/api/appointments/search/?q=pat', HTTP_X_CLINIC='north').status_code, 403)
+        self.assertEqual(client.get('/api/appointments/search/?q=pat', HTTP_X_CLINIC=self.main.slug).status_code, 200)
+
+        token = feeds.feed_token(self.main_staff)
+        with tenancy.activate(self.north.pk):
+            self.assertIsNone(feeds.user_for_token(token))
+        with tenancy.activate(self.main.pk):
+            self.assertEqual(feeds.user_for_token(token), self.main_staff)
+
+    def test_admin_is_limited_to_clinic_staff(self):
+        self.book(self.north)
+        self.main_staff.user_permissions.add(*self.view_permissions())
+        client = APIClient()
+        client.force_login(self.main_staff)
+        self.assertEqual(client.get('/admin/dental/appointment/', HTTP_X_CLINIC='north').status_code, 403)
+        self.assertEqual(client.get('/admin/dental/appointment/', HTTP_X_CLINIC=self.main.slug).status_code, 200)
+        response = client.get('/admin/dental/clinic/')
+        self.assertEqual([c.pk for c in response.context['cl'].result_list], [self.main.pk])
+
+    def view_permissions(self):
+        from django.contrib.auth.models import Permission
+
+        return Permission.objects.filter(
+            content_type__app_label='dental', codename__in=['view_appointment', 'view_clinic'],
+        )
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DentistViewSet, ServiceViewSet, AppointmentViewSet
+from .views import DentistViewSet, ServiceViewSet, ResourceViewSet, AppointmentViewSet, BootstrapView, appointment_calendar_feed
 
 router = DefaultRouter()
 router.register(r'dentists', DentistViewSet, basename='dentist')
 router.register(r'services', ServiceViewSet, basename='service')
+router.register(r'resources', ResourceViewSet, basename='resource')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
 
 urlpatterns = [
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+    path('appointments/feed/<str:token>.ics', appointment_calendar_feed, name='appointment_calendar_feed'),
     path('', include(router.urls)),
 ]
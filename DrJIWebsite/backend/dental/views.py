@@ -1,101 +1,117 @@
 import logging
-from datetime import time, timedelta
+from datetime import datetime, timedelta
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateField
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from config.fieldsets import SparseFieldsetsMixin
+from config.idempotency import idempotent
 from config.utils import success_response, error_response
-from .models import Dentist, Service, Appointment
-from .serializers import DentistSerializer, ServiceSerializer, AppointmentSerializer
-from . import calendar_service
+from .models import Dentist, Service, Appointment, Resource, SlotHold
+from .serializers import (
+    DentistSerializer, ServiceSerializer, AppointmentSerializer, AppointmentHistorySerializer,
+    AppointmentRescheduleSerializer, ResourceSerializer, SlotHoldSerializer,
+)
+from . import archive, availability, booking, bootstrap, calendar_service, feeds, notifications, search, tenancy
 
 logger = logging.getLogger(__name__)
 
 
-def get_all_slot_times():
-    """Return list of (time, label) for configured working hours and slot duration."""
-    start_h = getattr(settings, 'APPOINTMENT_SLOT_START_HOUR', 9)
-    end_h = getattr(settings, 'APPOINTMENT_SLOT_END_HOUR', 17)
-    duration = getattr(settings, 'APPOINTMENT_SLOT_DURATION_MINUTES', 30)
-    slots = []
-    t = time(start_h, 0)
-    end_t = time(end_h, 0)
-    while (t.hour, t.minute) < (end_t.hour, end_t.minute):
-        label = t.strftime('%I:%M %p').lstrip('0')  # 9:00 AM
-        slots.append({'time': t.strftime('%H:%M'), 'label': label})
-        t = (timezone.datetime.combine(timezone.datetime.today(), t) + timedelta(minutes=duration)).time()
-    return slots
+def get_available_slots_for_date(date, resource_id=None):
+    """Return list of slot dicts (time, label) that are free on the given date (DB + Google Calendar)."""
+    return availability.available_slots_for_range(date, 1, resource_id)[date]
 
 
-def get_available_slots_for_date(date):
-    """Return list of slot dicts (time, label) that are free on the given date (DB + Google Calendar)."""
-    all_slots = get_all_slot_times()
-    booked = set(
-        Appointment.objects.filter(preferred_date=date)
-        .exclude(slot_time__isnull=True)
-        .values_list('slot_time', flat=True)
-    )
-    booked_str = {t.strftime('%H:%M') for t in booked}
-    try:
-        google_busy = calendar_service.get_busy_slot_times_for_date(date)
-    except Exception:
-        google_busy = set()
-    busy = booked_str | google_busy
-    return [s for s in all_slots if s['time'] not in busy]
-
-
-def send_appointment_notification(appointment):
-    """Send full appointment details to configured staff email when a new appointment is booked."""
-    recipients = getattr(settings, 'APPOINTMENT_NOTIFY_EMAILS', None) or []
-    if not recipients:
-        return
-    date_str = appointment.preferred_date.strftime('%A, %B %d, %Y') if appointment.preferred_date else 'Not specified'
-    slot_str = appointment.slot_time.strftime('%I:%M %p').lstrip('0') if appointment.slot_time else 'Not specified'
-    subject = f'New appointment booked: {appointment.name} – {appointment.get_service_display()} ({date_str}, {slot_str})'
-    body = (
-        'A new appointment has been booked. Details below.\n\n'
-        '--- PATIENT ---\n'
-        f'Name: {appointment.name}\n'
-        f'Email: {appointment.email}\n'
-        f'Phone: {appointment.phone}\n\n'
-        '--- APPOINTMENT ---\n'
-        f'Service: {appointment.get_service_display()}\n'
-        f'Date: {date_str}\n'
-        f'Time: {slot_str}\n\n'
-    )
-    if getattr(appointment, 'preferred_time', None) and appointment.preferred_time:
-        body += f'Preferred period: {appointment.get_preferred_time_display()}\n'
-    body += f'Booked at (UTC): {appointment.created_at.isoformat()}\n'
-    if appointment.message:
-        body += f'\n--- MESSAGE ---\n{appointment.message}\n'
+def find_next_available_slots(start_date, count, period=None, resource_id=None, max_days=60, window_days=14):
+    """
+    First `count` free slots from `start_date` onwards, optionally within a PREFERRED_TIME_WINDOWS period
+    and on one resource. Days are scanned in windows of `window_days` (one booking query each) and the
+    scan stops as soon as enough slots are found. Slots that have already started today are skipped.
+    """
+    window = Appointment.PREFERRED_TIME_WINDOWS.get(period) if period else None
+    now = timezone.localtime()
+    found = []
+    scanned = 0
+    while scanned < max_days and len(found) < count:
+        chunk = min(window_days, max_days - scanned)
+        day_start = start_date + timedelta(days=scanned)
+        for day, slots in availability.available_slots_for_range(day_start, chunk, resource_id).items():
+            for slot in slots:
+                slot_t = datetime.strptime(slot['time'], '%H:%M').time()
+                if window and not (window[0] <= slot_t < window[1]):
+                    continue
+                if day == now.date() and slot_t <= now.time():
+                    continue
+                found.append({'date': day.isoformat(), **slot})
+                if len(found) == count:
+                    return found
+        scanned += chunk
+    return found
+
+
+def prefetch_busy(data):
+    """
+    Calendar busy slots on the `preferred_date` of a booking or hold request, looked up before the
+    serializer validates it so the Google Calendar call stays out of validation and transactions.
+    None when there is no usable date (validation reports that).
+    """
+    value = data.get('preferred_date') if hasattr(data, 'get') else None
+    if not value:
+        return None
     try:
-        send_mail(
-            subject=subject,
-            message=body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipients,
-            fail_silently=False,
-        )
-    except Exception as e:
-        logger.exception('Failed to send appointment notification email: %s', e)
+        day = DateField().to_internal_value(value)
+    except ValidationError:
+        return None
+    if day < timezone.localdate():
+        return None
+    return availability.calendar_busy(day)
+
 
+class ClinicQuerysetMixin:
+    """Scope the class-level queryset (built at import time from `all_clinics`) to the request's clinic."""
 
-class DentistViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Dentist.objects.all()
+    def get_queryset(self):
+        return tenancy.scoped(super().get_queryset())
+
+
+class DentistViewSet(ClinicQuerysetMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Dentist.all_clinics.all()
     serializer_class = DentistSerializer
 
 
-class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Service.objects.filter(is_active=True)
+class ServiceViewSet(ClinicQuerysetMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Service.all_clinics.filter(is_active=True)
     serializer_class = ServiceSerializer
     lookup_field = 'slug'
     lookup_url_kwarg = 'slug'
 
 
-class AppointmentViewSet(viewsets.GenericViewSet):
-    queryset = Appointment.objects.all()
+class ResourceViewSet(ClinicQuerysetMixin, SparseFieldsetsMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Resource.all_clinics.filter(is_active=True)
+    serializer_class = ResourceSerializer
+
+
+def parse_resource_param(request):
+    """
+    Optional `resource` query parameter: (resource_id or None, error response or None).
+    """
+    value = request.query_params.get('resource')
+    if not value:
+        return None, None
+    if not value.isdigit() or not Resource.objects.filter(pk=int(value), is_active=True).exists():
+        return None, error_response('Unknown resource.', status_code=status.HTTP_400_BAD_REQUEST)
+    return int(value), None
+
+
+class AppointmentViewSet(ClinicQuerysetMixin, viewsets.GenericViewSet):
+    queryset = Appointment.all_clinics.all()
     serializer_class = AppointmentSerializer
 
     @action(detail=False, methods=['get'], url_path='available-slots')
@@ -104,7 +120,6 @@ class AppointmentViewSet(viewsets.GenericViewSet):
         if not date_str:
             return error_response('Query parameter "date" (YYYY-MM-DD) is required.', status_code=status.HTTP_400_BAD_REQUEST)
         try:
-            from datetime import datetime
             dt = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return error_response('Invalid date format. Use YYYY-MM-DD.', status_code=status.HTTP_400_BAD_REQUEST)
@@ -113,27 +128,213 @@ class AppointmentViewSet(viewsets.GenericViewSet):
                 'Please select today or a future date. Slots are not available for past dates.',
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
-        slots = get_available_slots_for_date(dt)
+        resource_id, error = parse_resource_param(request)
+        if error:
+            return error
+        slots = get_available_slots_for_date(dt, resource_id)
         return success_response(data=slots, message='Available slots retrieved.')
 
-    def create(self, request):
-        serializer = AppointmentSerializer(data=request.data)
-        if serializer.is_valid():
-            appointment = serializer.save(
-                customer=request.user if request.user.is_authenticated else None
-            )
-            send_appointment_notification(appointment)
+    @action(detail=False, methods=['get'], url_path='next-available')
+    def next_available(self, request):
+        """First N free slots from `from` (default today), optionally filtered by `period` and `resource`."""
+        today = timezone.localdate()
+        date_str = request.query_params.get('from')
+        start = today
+        if date_str:
             try:
-                calendar_service.create_calendar_event(appointment)
-            except Exception:
-                pass
-            return success_response(
-                data=serializer.data,
-                message='Appointment created successfully.',
-                status_code=status.HTTP_201_CREATED,
+                start = datetime.strptime(date_str, '%Y-%m-%d').date()
+            except ValueError:
+                return error_response('Invalid date format. Use YYYY-MM-DD.', status_code=status.HTTP_400_BAD_REQUEST)
+        start = max(start, today)
+        try:
+            count = int(request.query_params.get('count', 5))
+        except ValueError:
+            return error_response('Query parameter "count" must be a number.', status_code=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= count <= 20:
+            return error_response('Query parameter "count" must be between 1 and 20.', status_code=status.HTTP_400_BAD_REQUEST)
+        period = request.query_params.get('period') or None
+        if period and period not in Appointment.PREFERRED_TIME_WINDOWS:
+            return error_response(
+                'Invalid period. Use one of: ' + ', '.join(Appointment.PREFERRED_TIME_WINDOWS) + '.',
+                status_code=status.HTTP_400_BAD_REQUEST,
             )
+        resource_id, error = parse_resource_param(request)
+        if error:
+            return error
+        slots = find_next_available_slots(
+            start,
+            count,
+            period=period,
+            resource_id=resource_id,
+            max_days=getattr(settings, 'NEXT_AVAILABLE_MAX_DAYS', 60),
+        )
+        return success_response(data=slots, message='Next available slots retrieved.')
+
+    @action(detail=False, methods=['post'], url_path='holds')
+    def create_hold(self, request):
+        """
+        Reserve a slot for SLOT_HOLD_SECONDS while the booking form is completed. Pass the returned
+        token as `hold` when creating the appointment, and a previous token as `release` to swap slots.
+        """
+        serializer = SlotHoldSerializer(data=request.data, context={'busy': prefetch_busy(request.data)})
+        with transaction.atomic():
+            availability.lock_capacity()
+            SlotHold.reclaim_expired()
+            release = request.data.get('release')
+            if release:
+                SlotHold.objects.filter(token=release).delete()
+            if serializer.is_valid():
+                serializer.save()
+                return success_response(
+                    data=serializer.data,
+                    message='Slot held.',
+                    status_code=status.HTTP_201_CREATED,
+                )
+            # Keep the previous hold if the new slot cannot be held
+            transaction.set_rollback(True)
         return error_response(
             message='Validation failed.',
             errors=serializer.errors,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
+
+    @action(detail=False, methods=['delete'], url_path=r'holds/(?P<token>[^/.]+)')
+    def release_hold(self, request, token=None):
+        SlotHold.objects.filter(token=token).delete()
+        return success_response(message='Hold released.')
+
+    @action(detail=False, methods=['get'], url_path='mine')
+    def mine(self, request):
+        """Signed-in customer's bookings, including archived past ones, newest first."""
+        if not request.user.is_authenticated:
+            return error_response('Sign in to see your appointments.', status_code=status.HTTP_401_UNAUTHORIZED)
+        history = archive.appointment_history(customer=request.user)
+        return success_response(
+            data=AppointmentHistorySerializer(history, many=True).data,
+            message='Appointments retrieved.',
+        )
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def staff_search(self, request):
+        """Clinic staff search by patient name, email, phone or message, best match first (?q=...&limit=20)."""
+        if not tenancy.is_clinic_staff(request.user):
+            return error_response('Staff only.', status_code=status.HTTP_403_FORBIDDEN)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return error_response('Query parameter "q" is required.', status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return error_response('"limit" must be a number.', status_code=status.HTTP_400_BAD_REQUEST)
+        results = search.search_appointments(query, limit)
+        return success_response(
+            data=AppointmentSerializer(results, many=True).data,
+            message='Search results retrieved.',
+        )
+
+    @idempotent('appointment')
+    def create(self, request):
+        serializer = AppointmentSerializer(data=request.data, context={'busy': prefetch_busy(request.data)})
+        try:
+            with transaction.atomic():
+                # Capacity check (or hold) and insert under the clinic's lock
+                availability.lock_capacity()
+                appointment = None
+                if serializer.is_valid():
+                    appointment = serializer.save(
+                        customer=request.user if request.user.is_authenticated else None
+                    )
+        except ValidationError as e:
+            # The hold was consumed by another submit (AppointmentSerializer.create)
+            return error_response(message='Validation failed.', errors=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+        if appointment is None:
+            return error_response(
+                message='Validation failed.',
+                errors=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        notifications.notify_new_appointment(appointment)
+        try:
+            calendar_service.create_calendar_event(appointment)
+        except Exception:
+            pass
+        return success_response(
+            # The manage token lets the patient cancel/reschedule without an account
+            data={**serializer.data, 'manage_token': booking.manage_token(appointment)},
+            message='Appointment created successfully.',
+            status_code=status.HTTP_201_CREATED,
+        )
+
+    def _managed_appointment(self, request):
+        """(appointment, None) if the caller may change this booking, else (None, error response)."""
+        appointment = self.get_object()
+        token = request.data.get('token') or request.query_params.get('token')
+        if not booking.can_manage(request, appointment, token):
+            return None, error_response('You cannot change this appointment.', status_code=status.HTTP_403_FORBIDDEN)
+        if booking.is_past(appointment):
+            return None, error_response('Past appointments cannot be changed.', status_code=status.HTTP_400_BAD_REQUEST)
+        return appointment, None
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a booking (customer, staff, or `token` from booking). Frees the slot and deletes the calendar event."""
+        appointment, error = self._managed_appointment(request)
+        if error:
+            return error
+        booking.cancel(appointment)
+        return success_response(message='Appointment cancelled.')
+
+    @action(detail=True, methods=['post'])
+    def reschedule(self, request, pk=None):
+        """Move a booking to another free slot (`preferred_date`, `slot_time`, optional `resource` / `hold`)."""
+        appointment, error = self._managed_appointment(request)
+        if error:
+            return error
+        serializer = AppointmentRescheduleSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response(message='Validation failed.', errors=serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            appointment = booking.reschedule(appointment, **serializer.validated_data)
+        except ValidationError as e:
+            return error_response(message='Validation failed.', errors=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+        return success_response(
+            data=AppointmentSerializer(appointment).data,
+            message='Appointment rescheduled.',
+        )
+
+
+class BootstrapView(APIView):
+    """Dentist, active services and the next `days` days of free slots in one response (see dental.bootstrap)."""
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', getattr(settings, 'BOOTSTRAP_DAYS', 7)))
+        except ValueError:
+            return error_response('Query parameter "days" must be a number.', status_code=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= bootstrap.MAX_DAYS:
+            return error_response(
+                f'Query parameter "days" must be between 1 and {bootstrap.MAX_DAYS}.',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        payload, etag = bootstrap.get(request, days)
+        etag = f'"{etag}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = success_response(data=payload, message='Site data retrieved.')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        response['Vary'] = 'Accept'
+        return response
+
+
+def appointment_calendar_feed(request, token):
+    """Staff-only .ics feed of upcoming appointments. Returns 304 when the ETag is unchanged."""
+    if feeds.user_for_token(token) is None:
+        return JsonResponse({'success': False, 'message': 'Invalid or revoked feed token.'}, status=404)
+    etag = f'"{feeds.feed_etag()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(feeds.get_feed(etag.strip('"')), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,12 @@
+# Gunicorn settings (picked up automatically when started from backend/):
+#   gunicorn config.wsgi
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+
+
+def post_worker_init(worker):
+    """Warm up each worker (DB connection, views, Calendar client) before it accepts requests."""
+    from config.warmup import warm_up
+    warm_up()
@@ -1,7 +1,11 @@
-import type { Dentist, Service, AppointmentPayload, TimeSlot } from '@/types';
+import type { Dentist, Service, AppointmentPayload, BookedAppointment, TimeSlot, SlotHold, SiteBootstrap } from '@/types';
 
 // In production (e.g. Vercel), set VITE_API_URL to your backend API base (e.g. https://your-backend.com/api)
 const API_BASE = import.meta.env.VITE_API_URL ?? '/api';
+// Multi-clinic backends pick the clinic by host; set VITE_CLINIC (clinic slug) when the API host is shared
+const CLINIC = import.meta.env.VITE_CLINIC ?? '';
+// Static catalogue from `manage.py export_catalogue` on the CDN (the clinic's directory, e.g. https://cdn.example.com/catalogue/default)
+const CATALOGUE_URL = (import.meta.env.VITE_CATALOGUE_URL ?? '').replace(/\/$/, '');
 
 const AUTH_TOKEN_KEY = 'drji_access_token';
 const AUTH_USER_KEY = 'drji_user';
@@ -40,8 +44,10 @@ async function request<T>(
   };
   const token = getStoredToken();
   if (token) headers['Authorization'] = `Bearer ${token}`;
+  if (CLINIC) headers['X-Clinic'] = CLINIC;
 
-  const res = await fetch(url, { ...options, headers });
+  // credentials: the API sets a short-lived cookie after writes so our next reads skip lagging replicas
+  const res = await fetch(url, { credentials: 'include', ...options, headers });
 
   if (!res.ok) {
     const err = await res.json().catch(() => ({ message: res.statusText }));
@@ -56,10 +62,47 @@ async function request<T>(
   return json as T;
 }
 
+/** `?fields=a,b` for the catalogue endpoints (only those fields are serialized and read from the DB). */
+function fieldsQuery(fields?: string[]): string {
+  return fields && fields.length ? `?fields=${encodeURIComponent(fields.join(','))}` : '';
+}
+
+let bootstrapPromise: Promise<SiteBootstrap> | null = null;
+
+/** Dentist, services and the next days' free slots in one request, shared by every page of the visit. */
+export function loadBootstrap(): Promise<SiteBootstrap> {
+  if (!bootstrapPromise) {
+    bootstrapPromise = request<SiteBootstrap>('/bootstrap/').catch((e) => {
+      bootstrapPromise = null;
+      throw e;
+    });
+  }
+  return bootstrapPromise;
+}
+
+let cataloguePromise: Promise<Pick<SiteBootstrap, 'dentist' | 'services'>> | null = null;
+
+/** Dentist and services for the content pages: the static export when VITE_CATALOGUE_URL is set, else the bootstrap. */
+export function loadCatalogue(): Promise<Pick<SiteBootstrap, 'dentist' | 'services'>> {
+  if (!CATALOGUE_URL) return loadBootstrap();
+  if (!cataloguePromise) {
+    const file = <T>(name: string) =>
+      fetch(`${CATALOGUE_URL}/${name}`).then((res) => {
+        if (!res.ok) throw new Error(res.statusText);
+        return res.json() as Promise<T>;
+      });
+    cataloguePromise = Promise.all([file<Dentist[]>('dentists.json'), file<Service[]>('services.json')])
+      .then(([dentists, services]) => ({ dentist: dentists[0] ?? null, services }))
+      .catch(() => loadBootstrap());  // export missing or CDN unreachable: ask the API
+  }
+  return cataloguePromise;
+}
+
 export const api = {
   get: <T>(path: string) => request<T>(path, { method: 'GET' }),
   post: <T>(path: string, body: unknown) =>
     request<T>(path, { method: 'POST', body: JSON.stringify(body) }),
+  delete: <T>(path: string) => request<T>(path, { method: 'DELETE' }),
 
   auth: {
     signup: (data: { name: string; email: string; password: string; confirm_password: string }) =>
@@ -74,13 +117,16 @@ export const api = {
       api.post<{ detail: string }>('/auth/reset-password/', { email, otp, new_password }),
   },
 
+  bootstrap: (days?: number) =>
+    api.get<SiteBootstrap>(days ? `/bootstrap/?days=${days}` : '/bootstrap/'),
+
   dentists: {
-    list: () => api.get<Dentist[]>('/dentists/'),
+    list: (fields?: (keyof Dentist)[]) => api.get<Dentist[]>(`/dentists/${fieldsQuery(fields)}`),
     get: (id: number) => api.get<Dentist>(`/dentists/${id}/`),
   },
 
   services: {
-    list: () => api.get<Service[]>('/services/'),
+    list: (fields?: (keyof Service)[]) => api.get<Service[]>(`/services/${fieldsQuery(fields)}`),
     get: (slug: string) => api.get<Service>(`/services/${slug}/`),
   },
 
@@ -88,6 +134,14 @@ export const api = {
     getAvailableSlots: (date: string) =>
       api.get<TimeSlot[]>(`/appointments/available-slots/?date=${encodeURIComponent(date)}`),
     create: (data: AppointmentPayload) =>
-      api.post<AppointmentPayload>('/appointments/', data),
+      api.post<BookedAppointment>('/appointments/', data),
+    cancel: (id: number, token?: string) =>
+      api.post<void>(`/appointments/${id}/cancel/`, { token }),
+    reschedule: (id: number, data: { preferred_date: string; slot_time: string; resource?: number | null; hold?: string; token?: string }) =>
+      api.post<AppointmentPayload>(`/appointments/${id}/reschedule/`, data),
+    hold: (preferred_date: string, slot_time: string, release?: string | null) =>
+      api.post<SlotHold>('/appointments/holds/', { preferred_date, slot_time, release: release || undefined }),
+    releaseHold: (token: string) =>
+      api.delete<void>(`/appointments/holds/${encodeURIComponent(token)}/`),
   },
 };
@@ -1,19 +1,19 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/api/client'
+import { loadCatalogue } from '@/api/client'
 import type { Dentist } from '@/types'
 import { Link } from 'react-router-dom'
 
+// Rendered width of the profile photo (see .about-profile grid below)
+const IMAGE_SIZES = '(min-width: 768px) 280px, 100vw'
+
 export default function About() {
   const [dentist, setDentist] = useState<Dentist | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
   useEffect(() => {
-    api.dentists
-      .list()
-      .then((list) => {
-        if (list.length > 0) setDentist(list[0])
-      })
+    loadCatalogue()
+      .then((site) => setDentist(site.dentist))
       .catch((e) => setError(e instanceof Error ? e.message : 'Failed to load'))
       .finally(() => setLoading(false))
   }, [])
@@ -64,7 +64,17 @@ export default function About() {
         <article className="about-profile">
           {dentist.image && (
             <div className="about-image-wrap">
-              <img src={dentist.image} alt={dentist.name} />
+              <picture>
+                {dentist.image_srcset?.webp && (
+                  <source type="image/webp" srcSet={dentist.image_srcset.webp.srcset} sizes={IMAGE_SIZES} />
+                )}
+                <img
+                  src={dentist.image_srcset?.jpeg?.sources[0]?.url ?? dentist.image}
+                  srcSet={dentist.image_srcset?.jpeg?.srcset}
+                  sizes={IMAGE_SIZES}
+                  alt={dentist.name}
+                />
+              </picture>
             </div>
           )}
           <div className="about-details">
@@ -111,6 +121,7 @@ export default function About() {
           box-shadow: var(--shadow-lg);
           aspect-ratio: 1;
         }
+        .about-image-wrap picture { display: block; width: 100%; height: 100%; }
         .about-image-wrap img { width: 100%; height: 100%; object-fit: cover; }
         .about-details h2 { margin-bottom: 0.25rem; }
         .about-title { color: var(--color-primary); margin-bottom: 1rem; }
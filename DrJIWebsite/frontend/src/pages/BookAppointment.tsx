@@ -1,5 +1,5 @@
 import { useState, FormEvent, useEffect } from 'react'
-import { api } from '@/api/client'
+import { api, loadBootstrap } from '@/api/client'
 import { SERVICE_OPTIONS, type TimeSlot } from '@/types'
 
 const MAX_MESSAGE_LENGTH = 2000
@@ -74,6 +74,8 @@ export default function BookAppointment() {
   const [slotsError, setSlotsError] = useState<string | null>(null)
   const [slotsFetchKey, setSlotsFetchKey] = useState(0)
   const [selectedSlot, setSelectedSlot] = useState<string | null>(null)
+  // Slot reserved on the server while the form is filled in (released when the date changes)
+  const [holdToken, setHoldToken] = useState<string | null>(null)
 
   const now = new Date()
   const [calMonth, setCalMonth] = useState(now.getMonth())
@@ -89,7 +91,14 @@ export default function BookAppointment() {
     setSlotsLoading(true)
     setSlotsError(null)
     setSelectedSlot(null)
-    api.appointments.getAvailableSlots(selectedDate)
+    // First look comes from the page-load bootstrap when it covers the date; retries always ask live
+    const slotsRequest = slotsFetchKey === 0
+      ? loadBootstrap()
+          .then((site) => site.availability.find((d) => d.date === selectedDate)?.slots)
+          .catch(() => undefined)
+          .then((slots) => slots ?? api.appointments.getAvailableSlots(selectedDate))
+      : api.appointments.getAvailableSlots(selectedDate)
+    slotsRequest
       .then((slots) => {
         setAvailableSlots(slots)
         setSlotsError(null)
@@ -104,14 +113,28 @@ export default function BookAppointment() {
   const handleCalendarSelect = (year: number, month: number, day: number) => {
     if (isPast(year, month, day)) return
     const dateStr = toYMD(new Date(year, month, day))
+    if (holdToken) {
+      api.appointments.releaseHold(holdToken).catch(() => {})
+      setHoldToken(null)
+    }
     setSelectedDate(dateStr)
     setForm((prev) => ({ ...prev, preferred_date: dateStr, slot_time: '' }))
   }
 
   const handleSlotSelect = (time: string) => {
+    if (!selectedDate) return
     setSelectedSlot(time)
     setForm((prev) => ({ ...prev, slot_time: time }))
     setErrors((prev) => ({ ...prev, slot_time: undefined, preferred_date: undefined }))
+    api.appointments.hold(selectedDate, time, holdToken)
+      .then((hold) => setHoldToken(hold.token))
+      .catch(() => {
+        // Taken since the list was loaded: refresh the slots
+        setSelectedSlot(null)
+        setForm((prev) => ({ ...prev, slot_time: '' }))
+        setErrors((prev) => ({ ...prev, slot_time: 'This slot was just taken. Please choose another.' }))
+        setSlotsFetchKey((k) => k + 1)
+      })
   }
 
   const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement | HTMLTextAreaElement>) => {
@@ -139,7 +162,9 @@ export default function BookAppointment() {
         preferred_date: form.preferred_date,
         slot_time: form.slot_time,
         message: form.message.trim() || undefined,
+        hold: holdToken || undefined,
       })
+      setHoldToken(null)
       setSuccess(true)
       setForm(initialForm)
       setSelectedDate(null)
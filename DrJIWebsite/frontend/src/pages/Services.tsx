@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { api } from '@/api/client'
+import { loadCatalogue } from '@/api/client'
 import type { Service } from '@/types'
 import { SERVICE_OPTIONS } from '@/types'
 import ServiceCard from '@/components/ServiceCard'
@@ -25,9 +25,8 @@ export default function Services() {
   const [usedFallback, setUsedFallback] = useState(false)
 
   useEffect(() => {
-    api.services
-      .list()
-      .then((data) => {
+    loadCatalogue()
+      .then(({ services: data }) => {
         setServices(data)
         setUsedFallback(false)
       })
@@ -7,6 +7,12 @@ export interface Dentist {
   philosophy: string;
   certifications: string;
   image?: string | null;
+  image_srcset?: Partial<Record<'webp' | 'jpeg', ImageSourceSet>>;
+}
+
+export interface ImageSourceSet {
+  srcset: string;  // "url 320w, url 640w, ..."
+  sources: { url: string; width: number; height: number }[];
 }
 
 export interface Service {
@@ -27,6 +33,13 @@ export interface TimeSlot {
   label: string;  // "9:00 AM"
 }
 
+export interface SiteBootstrap {
+  dentist: Dentist | null;
+  services: Service[];
+  availability: { date: string; slots: TimeSlot[] }[];  // free slots, today onwards
+  availability_truncated: boolean;  // fewer days than asked (payload size budget)
+}
+
 export interface AppointmentPayload {
   name: string;
   email: string;
@@ -36,6 +49,21 @@ export interface AppointmentPayload {
   slot_time: string;       // "09:00" (required when booking)
   preferred_time?: string;
   message?: string;
+  resource?: number | null; // chair/dentist id (optional; first free one is assigned)
+  hold?: string;            // token from appointments.hold (slot reserved while the form is filled in)
+}
+
+export interface BookedAppointment extends AppointmentPayload {
+  id: number;
+  manage_token: string;  // keep to cancel/reschedule later without an account
+}
+
+export interface SlotHold {
+  token: string;
+  preferred_date: string;
+  slot_time: string;
+  resource: number | null;
+  expires_at: string;
 }
 
 export const PREFERRED_TIME_OPTIONS: { value: string; label: string }[] = [